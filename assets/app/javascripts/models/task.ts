@@ -3,6 +3,9 @@ import { CancellableToken } from "../utils/cancellable";
 import { ResourceError } from "../utils/errors";
 import { request } from "../utils/request";
 
+const WAIT_BACKOFF_MIN = 250;
+const WAIT_BACKOFF_MAX = 4000;
+
 enum Statuses {
     Queued,
     Pending,
@@ -57,15 +60,27 @@ export class Task extends Model {
         );
     }
 
-    static waitFor(id: string, token?: CancellableToken): Promise<Task> {
+    static waitFor(
+        id: string,
+        token?: CancellableToken,
+        backoff: number = 0,
+    ): Promise<Task> {
         return Task.queryId(id, token).then((task: Task) => {
             if (task.status == Statuses.Success) {
                 return task;
             } else if (task.status == Statuses.Failure) {
                 throw new ResourceError("Task could not be completed.");
-            } else {
-                return Task.waitFor(id, token);
             }
+
+            // Wait longer between each poll, so slow tasks do not keep the
+            // client polling the server in a tight loop.
+            let nextBackoff = Math.min(
+                Math.max(backoff * 2, WAIT_BACKOFF_MIN),
+                WAIT_BACKOFF_MAX,
+            );
+            return new Promise((resolve) => {
+                window.setTimeout(resolve, nextBackoff);
+            }).then(() => Task.waitFor(id, token, nextBackoff));
         });
     }
 }
@@ -63,6 +63,69 @@ def run_serve(args):
     sys.exit(0)
 
 
+def backfill_recent_posters(request):
+    """Backfill recently seen posters from the database."""
+    from ..interfaces import IRecentPosterService
+
+    recent_poster_svc = request.find_service(IRecentPosterService)
+    return recent_poster_svc.backfill()
+
+
+POST_BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_post_bodies(request):
+    """Render bodies of posts that were not rendered with the current
+    formatter version. Each batch of posts is committed separately.
+    """
+    from ..helpers.formatters import FORMATTER_VERSION, rerender_post
+    from ..interfaces import IPostQueryService
+
+    dbsession = request.find_service(name="db")
+    post_query_svc = request.find_service(IPostQueryService)
+
+    count = 0
+    after_id = 0
+    while True:
+        posts = post_query_svc.list_unformatted(
+            FORMATTER_VERSION, after_id=after_id, limit=POST_BACKFILL_BATCH_SIZE
+        )
+        if not posts:
+            break
+        for post in posts:
+            rerender_post(dbsession, request, post, topic=post.topic)
+        after_id = posts[-1].id
+        count += len(posts)
+        request.tm.commit()
+        request.tm.begin()
+    return count
+
+
+BACKFILL_TARGETS = {
+    "post_bodies": backfill_post_bodies,
+    "recent_posters": backfill_recent_posters,
+}
+
+
+def run_backfill(args):
+    """Run the given backfill against the application data."""
+    import pyramid.scripting
+
+    from .. import make_configurator, setup_logger
+    from ..settings import settings_from_env
+
+    settings = settings_from_env()
+    setup_logger(settings)
+    config = make_configurator(settings)
+    app = config.make_wsgi_app()
+    with pyramid.scripting.prepare(registry=app.registry) as env:
+        request = env["request"]
+        with request.tm:
+            count = BACKFILL_TARGETS[args.target](request)
+    print("Backfilled %s %s." % (count, args.target))
+    sys.exit(0)
+
+
 def run_gensecret(args):
     """Generates a NaCl secret."""
     from pyramid_nacl_session import generate_secret
@@ -86,6 +149,10 @@ def main():
     serve.add_argument("--reload", action="store_true")
     serve.set_defaults(func=run_serve)
 
+    backfill = subparsers.add_parser("backfill")
+    backfill.add_argument("target", choices=sorted(BACKFILL_TARGETS))
+    backfill.set_defaults(func=run_backfill)
+
     gensecret = subparsers.add_parser("gensecret")
     gensecret.set_defaults(func=run_gensecret)
 
@@ -1,11 +1,34 @@
+import os
 from typing import Any, Callable, Dict, Optional
 
+import requests
 import venusian  # type: ignore
 from pyramid.config import Configurator  # type: ignore
 
 Services = Optional[Dict[str, Callable]]
 Payload = Dict[str, Any]
 
+HTTP_POOL_MAXSIZE = 8
+
+_http_session: Optional[requests.Session] = None
+_http_session_pid: Optional[int] = None
+
+
+def get_http_session() -> requests.Session:
+    """Returns a per-process :class:`requests.Session` for filters to reuse
+    keep-alive connections to upstream services. The session is recreated
+    after fork so connections are never shared between processes.
+    """
+    global _http_session, _http_session_pid
+    if _http_session is None or _http_session_pid != os.getpid():
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=HTTP_POOL_MAXSIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _http_session = session
+        _http_session_pid = os.getpid()
+    return _http_session
+
 
 def register_filter(name: str) -> Callable:  # pragma: no cover
     def _wrapped(cls: Callable):
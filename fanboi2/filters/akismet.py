@@ -1,29 +1,77 @@
-from typing import Any, Dict, Optional
+import hashlib
+from typing import Any, Dict, Optional, Union
 
 import requests
+import dogpile.cache  # type: ignore
 
 from ..version import __VERSION__
-from . import Payload, Services, register_filter
+from . import Payload, Services, get_http_session, register_filter
 
 PostData = Optional[Dict[str, Any]]
+Settings = Optional[Union[str, Dict[str, Any]]]
+
+DEFAULT_URL = "https://{key}.rest.akismet.com/1.1/"
 
 
 @register_filter(name="akismet")
 class Akismet(object):
-    """Basic integration between Pyramid and Akismet."""
+    """Basic integration between Pyramid and Akismet.
+
+    Settings can either be an API key or a :type:`dict` containing ``key``
+    and optionally ``url`` of the API endpoint, in which ``{key}`` will be
+    replaced with the API key. Verdicts are cached for :attr:`cache_ttl`
+    seconds by body and IP address if the ``cache`` service is available.
+    """
+
+    __use_services__ = ("cache",)
+
+    cache_ttl = 300
 
-    def __init__(self, key: str, services: Services = None):
-        self.key = key
+    def __init__(self, settings: Settings, services: Services = None):
+        if not isinstance(settings, dict):
+            settings = {"key": settings}
+        if not services:
+            services = {}
+        self.key = settings.get("key")
+        self.url = settings.get("url") or DEFAULT_URL
+        self.cache_region: Optional[dogpile.cache.CacheRegion] = services.get("cache")
 
     def _api_post(self, name: str, data: PostData = None) -> requests.Response:
         """Make a request to Akismet API and return the response."""
-        return requests.post(
-            "https://%s.rest.akismet.com/1.1/%s" % (self.key, name),
+        return get_http_session().post(
+            "%s%s" % (self.url.format(key=self.key), name),
             headers={"User-Agent": "fanboi2/%s" % __VERSION__},
             data=data,
             timeout=2,
         )
 
+    def _get_cache_key(self, payload: Payload) -> str:
+        digest = hashlib.sha256(
+            ("%s\0%s" % (payload["ip_address"], payload["body"])).encode("utf-8")
+        ).hexdigest()
+        return "filters.akismet:digest=%s" % (digest,)
+
+    def _check(self, payload: Payload) -> Optional[bool]:
+        """Request Akismet to check the given payload. Returns :type:`None`
+        if the request was timed out.
+        """
+        try:
+            return (
+                self._api_post(
+                    "comment-check",
+                    data={
+                        "comment_content": payload["body"],
+                        "blog": payload["application_url"],
+                        "user_ip": payload["ip_address"],
+                        "user_agent": payload["user_agent"],
+                        "referrer": payload["referrer"],
+                    },
+                ).content
+                == b"true"
+            )
+        except requests.Timeout:
+            return None
+
     def should_reject(self, payload: Payload) -> bool:
         """
         Returns :type:`True` if the message is spam. Returns :type:`False`
@@ -31,19 +79,16 @@ class Akismet(object):
         """
         if self.key:
             try:
-                return (
-                    self._api_post(
-                        "comment-check",
-                        data={
-                            "comment_content": payload["body"],
-                            "blog": payload["application_url"],
-                            "user_ip": payload["ip_address"],
-                            "user_agent": payload["user_agent"],
-                            "referrer": payload["referrer"],
-                        },
-                    ).content
-                    == b"true"
+                if self.cache_region is None:
+                    return bool(self._check(payload))
+                return bool(
+                    self.cache_region.get_or_create(
+                        self._get_cache_key(payload),
+                        lambda: self._check(payload),
+                        should_cache_fn=lambda v: v is not None,
+                        expiration_time=self.cache_ttl,
+                    )
                 )
-            except (KeyError, requests.Timeout):
+            except KeyError:
                 pass
         return False
@@ -1,20 +1,167 @@
+import random
 import socket
+import struct
+import time
+from contextlib import closing
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from ipaddress import ip_address, ip_interface, ip_network
-from typing import Iterable, Optional
+from typing import Callable, Iterable, Optional
+
+from dogpile.cache.api import NO_VALUE  # type: ignore
 
 from . import Payload, Services, register_filter
 
 Providers = Optional[Iterable[str]]
+Resolver = Callable[[str], str]
+
+# Lookup errors that mean the name definitely does not exist, i.e. the address
+# is not listed. Other errors (e.g. temporary failure) are not cached.
+NEGATIVE_ERRNOS = (
+    socket.EAI_NONAME,
+    getattr(socket, "EAI_NODATA", socket.EAI_NONAME),
+)
+
+
+def default_resolver(hostname: str) -> str:
+    """Resolve the given :param:`hostname` using the system resolver."""
+    return socket.gethostbyname(hostname)
+
+
+class UDPResolver(object):
+    """Minimal A record resolver that queries the given nameserver directly
+    over UDP instead of the system resolver, e.g. a local caching resolver
+    or a stub DNS server in tests. Raises :class:`socket.gaierror` in the
+    same way as :func:`socket.gethostbyname`.
+    """
+
+    def __init__(self, nameserver: str, port: int = 53, timeout: float = 2):
+        self.nameserver = nameserver
+        self.port = port
+        self.timeout = timeout
+
+    def _build_query(self, query_id: int, hostname: str) -> bytes:
+        qname = b"".join(
+            bytes((len(label),)) + label.encode("ascii")
+            for label in hostname.rstrip(".").split(".")
+        )
+        header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)
+        return header + qname + b"\x00" + struct.pack("!HH", 1, 1)
+
+    def _skip_name(self, data: bytes, offset: int) -> int:
+        while True:
+            length = data[offset]
+            if length & 0xC0 == 0xC0:
+                return offset + 2
+            if length == 0:
+                return offset + 1
+            offset += length + 1
+
+    def __call__(self, hostname: str) -> str:
+        query_id = random.randint(0, 0xFFFF)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.sendto(
+                self._build_query(query_id, hostname), (self.nameserver, self.port)
+            )
+            data, _ = sock.recvfrom(512)
+        except OSError as e:
+            raise socket.gaierror(socket.EAI_AGAIN, str(e))
+        finally:
+            sock.close()
+
+        rid, flags, qdcount, ancount, _ns, _ar = struct.unpack("!HHHHHH", data[:12])
+        if rid != query_id:
+            raise socket.gaierror(socket.EAI_AGAIN, "Mismatched DNS response")
+        rcode = flags & 0x000F
+        if rcode == 3:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        if rcode != 0:
+            raise socket.gaierror(socket.EAI_AGAIN, "DNS server failure")
+
+        offset = 12
+        for _ in range(qdcount):
+            offset = self._skip_name(data, offset) + 4
+        for _ in range(ancount):
+            offset = self._skip_name(data, offset)
+            rtype, _rclass, _ttl, rdlength = struct.unpack(
+                "!HHIH", data[offset : offset + 10]
+            )
+            offset += 10
+            if rtype == 1 and rdlength == 4:
+                return socket.inet_ntoa(data[offset : offset + 4])
+            offset += rdlength
+        raise socket.gaierror(socket.EAI_NONAME, "No address associated")
 
 
 @register_filter(name="dnsbl")
 class DNSBL(object):
-    """Utility class for checking IP address against DNSBL providers."""
+    """Utility class for checking IP address against DNSBL providers.
 
-    def __init__(self, providers: Providers, services: Services = None):
+    Both listed and not listed answers are cached in the cache region for
+    :attr:`positive_ttl` and :attr:`negative_ttl` seconds respectively if
+    the ``cache`` service is available.
+    """
+
+    __use_services__ = ("cache",)
+
+    positive_ttl = 3600
+    negative_ttl = 900
+
+    def __init__(
+        self,
+        providers: Providers,
+        services: Services = None,
+        resolver: Optional[Resolver] = None,
+    ):
         if not providers:
             providers = tuple()
+        if not services:
+            services = {}
+        if not resolver:
+            resolver = default_resolver
         self.providers = tuple(providers)
+        self.cache_region = services.get("cache")
+        self.resolver = resolver
+
+    def _get_cache_key(self, provider: str, ipaddr: str) -> str:
+        return "filters.dnsbl:provider=%s,ip_address=%s" % (provider, ipaddr)
+
+    def _lookup(self, provider: str, ipaddr: str) -> Optional[bool]:
+        """Query the given :param:`provider` and returns :type:`True` if the
+        IP address is listed, :type:`False` if not listed, or :type:`None`
+        if the provider could not be queried.
+        """
+        lookup = ".".join(ip_address(ipaddr).reverse_pointer.split(".")[:-2])
+        try:
+            res = self.resolver("%s.%s." % (lookup, provider))
+            result = ip_interface("%s/255.0.0.0" % (res,))
+        except socket.gaierror as e:
+            if e.errno in NEGATIVE_ERRNOS:
+                return False
+            return None
+        except ValueError:
+            return False
+        return result.network == ip_network("127.0.0.0/8")
+
+    def _lookup_all(self, providers: Iterable[str], ipaddr: str):
+        """Query all :param:`providers` concurrently and yield each of
+        ``(provider, result)`` as they finish.
+        """
+        providers = tuple(providers)
+        if len(providers) == 1:
+            yield providers[0], self._lookup(providers[0], ipaddr)
+            return
+
+        executor = ThreadPoolExecutor(max_workers=len(providers))
+        try:
+            pending = {executor.submit(self._lookup, p, ipaddr): p for p in providers}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
     def should_reject(self, payload: Payload) -> bool:
         """Returns :type:`True` if the given IP address is listed in the
@@ -23,14 +170,37 @@ class DNSBL(object):
 
         :param payload: A filter payload.
         """
-        for provider in self.providers:
-            ipaddr = ip_address(payload["ip_address"])
-            lookup = ".".join(ipaddr.reverse_pointer.split(".")[:-2])
-            try:
-                res = socket.gethostbyname("%s.%s." % (lookup, provider))
-                result = ip_interface("%s/255.0.0.0" % (res,))
-                if result.network == ip_network("127.0.0.0/8"):
+        if not self.providers:
+            return False
+
+        ipaddr = payload["ip_address"]
+        now = time.time()
+        uncached = self.providers
+        if self.cache_region is not None:
+            keys = [self._get_cache_key(p, ipaddr) for p in self.providers]
+            uncached = []
+            for provider, value in zip(
+                self.providers, self.cache_region.get_multi(keys)
+            ):
+                if value is NO_VALUE or value[1] <= now:
+                    uncached.append(provider)
+                elif value[0]:
                     return True
-            except (socket.gaierror, ValueError):
-                continue
-        return False
+            if not uncached:
+                return False
+
+        listed = False
+        answers = {}
+        with closing(self._lookup_all(uncached, ipaddr)) as results:
+            for provider, result in results:
+                if result is None:
+                    continue
+                ttl = self.positive_ttl if result else self.negative_ttl
+                answers[self._get_cache_key(provider, ipaddr)] = (result, now + ttl)
+                if result:
+                    listed = True
+                    break
+
+        if self.cache_region is not None and answers:
+            self.cache_region.set_multi(answers)
+        return listed
@@ -1,18 +1,94 @@
 import math
-from ipaddress import ip_address
-from typing import Any, Callable, Dict, Optional
+import threading
+import time
+from ipaddress import ip_address, ip_network
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import requests
 import dogpile.cache  # type: ignore
 
 from ..version import __VERSION__
-from . import Payload, Services, register_filter
+from . import Payload, Services, get_http_session, register_filter
+
+
+class CircuitBreaker(object):
+    """Simple circuit breaker that opens after :param:`threshold` consecutive
+    failures and stays open for :param:`cooldown` seconds, after which
+    a single attempt is allowed through to probe the upstream again.
+
+    :param threshold: A number of consecutive failures to open the circuit.
+    :param cooldown: A number of seconds to keep the circuit open for.
+    """
+
+    def __init__(self, threshold: int = 3, cooldown: float = 60):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_until = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Returns :type:`True` if a request should be attempted."""
+        with self._lock:
+            if self.failures < self.threshold:
+                return True
+            now = time.monotonic()
+            if now >= self.opened_until:
+                self.opened_until = now + self.cooldown
+                return True
+            return False
+
+    def record_success(self):
+        """Close the circuit after a successful request."""
+        with self._lock:
+            self.failures = 0
+            self.opened_until = 0.0
+
+    def record_failure(self):
+        """Record a failed request and open the circuit if needed."""
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_until = time.monotonic() + self.cooldown
+
+
+class BaseProxyDetector(object):
+    """Base class for proxy detection providers. Requests are made through
+    a shared HTTP session and guarded by a :class:`CircuitBreaker` so
+    a provider that keeps timing out is skipped for a cool-down period.
+    """
+
+    timeout = 2
+
+    def __init__(self, **kwargs):
+        self.breaker = CircuitBreaker(
+            threshold=kwargs.get("breaker_threshold") or 3,
+            cooldown=kwargs.get("breaker_cooldown") or 60,
+        )
+
+    def _request(self, params: Dict[str, Any]) -> Optional[requests.Response]:
+        """Request the provider with the given :param:`params` and return
+        the response, or :type:`None` if the request was timed out.
+        """
+        try:
+            result = get_http_session().get(
+                self.url,
+                headers={"User-Agent": "fanboi2/%s" % __VERSION__},
+                params=params,
+                timeout=self.timeout,
+            )
+        except (requests.Timeout, requests.ConnectionError):
+            self.breaker.record_failure()
+            return None
+        self.breaker.record_success()
+        return result
 
 
-class BlackBoxProxyDetector(object):
+class BlackBoxProxyDetector(BaseProxyDetector):
     """Provides integration with Black Block Proxy Block service."""
 
     def __init__(self, **kwargs):
+        super(BlackBoxProxyDetector, self).__init__(**kwargs)
         self.url = kwargs.get("url")
         if not self.url:
             self.url = "http://proxy.mind-media.com/block/proxycheck.php"
@@ -26,14 +102,8 @@ class BlackBoxProxyDetector(object):
         response as-is if return code is 200 and evaluation result is not
         an error code returned from Black Box Proxy Block.
         """
-        try:
-            result = requests.get(
-                self.url,
-                headers={"User-Agent": "fanboi2/%s" % __VERSION__},
-                params={"ip": ipaddr},
-                timeout=2,
-            )
-        except requests.Timeout:
+        result = self._request({"ip": ipaddr})
+        if result is None:
             return None
         if result.status_code == 200 and result.content != b"X":
             return result.content
@@ -50,10 +120,13 @@ class BlackBoxProxyDetector(object):
         return False
 
 
-class GetIPIntelProxyDetector(object):
+class GetIPIntelProxyDetector(BaseProxyDetector):
     """Provides integration with GetIPIntel proxy detection service."""
 
+    timeout = 5
+
     def __init__(self, **kwargs):
+        super(GetIPIntelProxyDetector, self).__init__(**kwargs)
         self.url = kwargs.get("url")
         self.flags = kwargs.get("flags")
         self.email = kwargs.get("email")
@@ -75,14 +148,8 @@ class GetIPIntelProxyDetector(object):
         params = {"contact": self.email, "ip": ipaddr}
         if self.flags:
             params["flags"] = self.flags
-        try:
-            result = requests.get(
-                self.url,
-                headers={"User-Agent": "fanboi2/%s" % __VERSION__},
-                params=params,
-                timeout=5,
-            )
-        except requests.Timeout:
+        result = self._request(params)
+        if result is None:
             return None
         if result.status_code == 200 and float(result.content) >= 0:
             return result.content
@@ -109,10 +176,31 @@ DETECTOR_PROVIDERS: Dict[str, Callable] = {
     "getipintel": GetIPIntelProxyDetector,
 }
 
+_detectors: Dict[str, Tuple[Dict[str, Any], BaseProxyDetector]] = {}
+_detectors_lock = threading.Lock()
+
+
+def get_detector(provider: str, settings: Dict[str, Any]) -> BaseProxyDetector:
+    """Returns a detector for the given :param:`provider` and :param:`settings`,
+    reusing the same instance within the process as long as the settings
+    remain the same, so the circuit breaker state is kept across posts. Only
+    the detector for the latest settings of each provider is kept.
+    """
+    with _detectors_lock:
+        detector_settings, detector = _detectors.get(provider, (None, None))
+        if detector is None or detector_settings != settings:
+            detector = DETECTOR_PROVIDERS[provider](**settings)
+            _detectors[provider] = (dict(settings), detector)
+        return detector
+
 
 @register_filter(name="proxy")
 class ProxyDetector(object):
-    """Base class for dispatching proxy detection into multiple providers."""
+    """Base class for dispatching proxy detection into multiple providers.
+
+    Results are cached per IP address, or per /24 (IPv4) and /64 (IPv6)
+    network if ``cache_subnet`` is enabled in the provider settings.
+    """
 
     __use_services__ = ("cache",)
 
@@ -124,7 +212,11 @@ class ProxyDetector(object):
         self.settings = settings
         self.cache_region: dogpile.cache.CacheRegion = services["cache"]
 
-    def _get_cache_key(self, provider: str, ipaddr: str) -> str:
+    def _get_cache_key(self, provider: str, ipaddr: str, subnet: bool = False) -> str:
+        if subnet:
+            prefix = 24 if ip_address(ipaddr).version == 4 else 64
+            network = ip_network("%s/%s" % (ipaddr, prefix), strict=False)
+            return "filters.proxy:provider=%s,network=%s" % (provider, network)
         return "filters.proxy:provider=%s,ip_address=%s" % (provider, ipaddr)
 
     def should_reject(self, payload: Payload) -> bool:
@@ -134,13 +226,18 @@ class ProxyDetector(object):
         """
         for provider, settings in self.settings.items():
             if settings["enabled"]:
-                detector = DETECTOR_PROVIDERS[provider](**settings)
+                detector = get_detector(provider, settings)
                 ipaddr = payload["ip_address"]
                 if not detector.can_check(ipaddr):
                     return False
+                cache_key = self._get_cache_key(
+                    provider, ipaddr, subnet=settings.get("cache_subnet", False)
+                )
                 result = self.cache_region.get_or_create(
-                    self._get_cache_key(provider, ipaddr),
-                    lambda: detector.check(ipaddr),
+                    cache_key,
+                    lambda: detector.check(ipaddr)
+                    if detector.breaker.allow()
+                    else None,
                     should_cache_fn=lambda v: v is not None,
                     expiration_time=21600,
                 )
@@ -13,6 +13,8 @@ from wtforms import (
 )
 from wtforms.validators import Length as _Length, Required, EqualTo, ValidationError
 
+from .services.rate_limiter import ENGINES as RATE_LIMITER_ENGINES
+
 
 class Length(_Length):
     """"Works just like :class:`wtforms.validators.Length` but treat DOS
@@ -148,11 +150,22 @@ class AdminBoardForm(Form):
     settings = TextAreaField("Settings", validators=[Required()])
 
     def validate_settings(self, field):
-        """Custom field validator that ensure value is a valid JSON."""
+        """Custom field validator that ensure value is a valid JSON and has
+        a known ``post_delay_engine``.
+        """
         try:
-            json.loads(field.data)
+            settings = json.loads(field.data)
         except json.decoder.JSONDecodeError:
             raise ValidationError("Must be a valid JSON.")
+        if (
+            isinstance(settings, dict)
+            and "post_delay_engine" in settings
+            and settings["post_delay_engine"] not in RATE_LIMITER_ENGINES
+        ):
+            raise ValidationError(
+                "post_delay_engine must be one of: %s."
+                % (", ".join(RATE_LIMITER_ENGINES),)
+            )
 
 
 class AdminBoardNewForm(AdminBoardForm):
@@ -1,6 +1,7 @@
 import html
 import json
 import re
+import threading
 import urllib
 import urllib.parse as urlparse
 from collections import OrderedDict
@@ -9,10 +10,18 @@ import isodate
 import misaka
 import pytz
 from markupsafe import Markup
+from sqlalchemy.orm.attributes import set_committed_value
 
 from ..interfaces import ISettingQueryService
+from ..models import Post
+
+FORMATTER_VERSION = 1
+
+POST_CACHE_SIZE = 10000
+
+_post_cache = OrderedDict()
+_post_cache_lock = threading.Lock()
 
-RE_PARAGRAPH = re.compile(r"(?:(?P<newline>\r\n|\n|\r)(?P=newline)+)")
 RE_THUMBNAILS = (
     (
         re.compile(r"https?://(?:(?:\w+\.)?imgur\.com)/((?!a/|gallery/)\w+)", re.ASCII),
@@ -33,18 +42,48 @@ RE_THUMBNAILS = (
     ),
 )
 
-RE_LINK = re.compile(
+RE_PARAGRAPH = re.compile(r"\n\n+")
+
+# Patterns for tokenizing escaped text. Each alternative starts with a
+# literal so the scanner could skip over plain text quickly. Links take
+# precedence over anchors, so a board name of a cross anchor stops where
+# a link starts.
+_TOKEN_LINK = r"""
+   ://                       # Separator
+   [a-zA-Z0-9\-]+            # Sub-domain
+   \.                        # Dot
+   [a-zA-Z0-9.\-]+           # Domain, or TLD
+   /?                        # Slash
+   [^\s*]+                   # Link, all characters except space and "*"
+"""
+
+_TOKEN_LINKS = r"""
+   https?%(link)s
+ | ftp%(link)s
+""" % {
+    "link": _TOKEN_LINK
+}
+
+RE_TOKEN_LINK = re.compile(_TOKEN_LINKS, re.VERBOSE)
+
+RE_TOKEN = re.compile(
     r"""
- (                     # Group start
-   (http|ftp|https)    # Protocols
- \:\/\/                # Separator
-   ([a-zA-Z0-9\-]+)    # Sub-domain
- \.                    # Dot
-   ([a-zA-Z0-9.\-]+)   # Domain, or TLD
- \/                    # Slash
-   ?([^\s<*]+)         # Link, all characters except space and end tag
- )
-""",
+   %(links)s
+ | %(cross)s/                 # Cross anchor syntax start
+   ((?:(?!(?:https?|ftp)%(link)s)\w)+)
+                             # Board name
+   (?:/(\d+))?               # Topic id
+   (?:/(\d+)(-)?(\d+)?)?     # Post id
+   (/?)                      # Trailing slash
+ | %(anchor)s                 # Anchor syntax start
+   (\d+)(-)?(\d+)?           # Post id
+"""
+    % {
+        "links": _TOKEN_LINKS,
+        "link": _TOKEN_LINK,
+        "cross": html.escape(">>>"),
+        "anchor": html.escape(">>"),
+    },
     re.VERBOSE,
 )
 
@@ -90,6 +129,20 @@ TP_PARAGRAPH = "<p>%s</p>"
 TP_THUMB_PARAGRAPH = '<p class="thumbnails">%s</p>'
 
 
+# URLs that :func:`url_fix` would return unchanged, i.e. with a lowercase
+# scheme and only characters that are never quoted in each part.
+RE_URL_FIXED = re.compile(
+    r"""
+  [a-z][a-z0-9+.\-]*://       # Scheme
+  [a-zA-Z0-9.\-]+             # Host
+  (?:/[a-zA-Z0-9_.\-~/%]*)?   # Path
+  (?:\?[a-zA-Z0-9_.\-~:&=]+)? # Query string
+  \Z
+""",
+    re.VERBOSE,
+)
+
+
 def url_fix(string):
     """Sanitize user URL that may contains unsafe characters like ' and so on
     in similar way browsers handle data entered by the user:
@@ -101,64 +154,122 @@ def url_fix(string):
 
     :param string: A :type:`str` containing URL to fix.
     """
+    if RE_URL_FIXED.match(string):
+        return string
     scheme, netloc, path, qs, anchor = urlparse.urlsplit(string)
     path = urlparse.quote(path, "/%")
     qs = urlparse.quote_plus(qs, ":&=")
     return urlparse.urlunsplit((scheme, netloc, path, qs, anchor))
 
 
-def format_text(text, shorten=None):
-    """Format lines of text into HTML. Split into paragraphs at two or more
-    consecutive newlines and adds `<br>` to any line with line break. If
-    `shorten` is given, then the post will be shortened to the first
-    paragraph that exceed the given value.
+TOKEN_ANCHOR = "anchor"
+TOKEN_ANCHOR_CROSS = "anchor_cross"
 
-    :param text: A :type:`str` containing post text.
-    :param shorten: An :type:`int` that specifies approximate length of text
-                    to be displayed. The full post will be shown if
-                    :type:`None` is given.
-    """
+
+def _render_link(link, render_anchor=None):
+    link = html.unescape(urlparse.unquote(link))
+    output = TP_LINK % (url_fix(link), html.escape(link))
+
+    # Anchors within the link markup are rendered as well, as they were
+    # when anchors were substituted over the whole markup.
+    if render_anchor is not None and "&gt;&gt;" in output:
+        output = RE_LINK_ANCHOR.sub(
+            lambda m: (
+                render_anchor(TOKEN_ANCHOR_CROSS, m.group(1, 2, 3, 4, 5, 6))
+                if m.group(1) is not None
+                else render_anchor(TOKEN_ANCHOR, m.group(7, 8, 9))
+            ),
+            output,
+        )
+    return output
+
+
+def _render_paragraphs(text, render_anchor=None):
+    token_re = RE_TOKEN_LINK if render_anchor is None else RE_TOKEN
+    text = html.escape(text)
+    output = []
+    pos = 0
+    for match in token_re.finditer(text):
+        start, end = match.span()
+        if start > pos:
+            output.append(text[pos:start])
+        pos = end
+
+        if text[start] != "&":
+            output.append(_render_link(match.group(), render_anchor))
+        elif match.group(1) is not None:
+            output.append(
+                render_anchor(TOKEN_ANCHOR_CROSS, match.group(1, 2, 3, 4, 5, 6))
+            )
+        else:
+            output.append(render_anchor(TOKEN_ANCHOR, match.group(7, 8, 9)))
+    output.append(text[pos:])
+
+    # Rendered tokens never contain a newline, so paragraphs and line
+    # breaks are left as-is until the text is rendered.
+    return "\n".join(
+        TP_PARAGRAPH % paragraph.replace("\n", "<br>")
+        for paragraph in RE_PARAGRAPH.split("".join(output))
+    )
+
+
+def _render_text(text, shorten=None, render_anchor=None):
     output = []
     thumbs = []
-    length = 0
     shortened = False
-
-    # Auto-link
-    def _replace_link(match):
-        link = html.unescape(urlparse.unquote(match.group(0)))
-        return Markup(TP_LINK % (url_fix(link), html.escape(link)))
-
-    # Turns text into paragraph.
-    text = "\n".join((t.strip() for t in text.splitlines()))  # Cleanup
-    for paragraph in RE_PARAGRAPH.split(text):
-        paragraph = paragraph.strip()
-        if paragraph:
-            lines = []
-            for line in paragraph.splitlines():
-                if shorten and length >= shorten:
+    lines = [t.strip() for t in text.splitlines()]  # Cleanup
+
+    # Only lines before the one that exceed the shorten length are shown.
+    # An empty paragraph is left if such line starts a paragraph.
+    visible = lines
+    if shorten:
+        length = 0
+        for i, line in enumerate(lines):
+            if line:
+                if length >= shorten:
                     shortened = True
+                    visible = lines[:i]
                     break
-                lines.append(html.escape(line))
                 length += len(line)
-            paragraph = TP_PARAGRAPH % "<br>".join(lines)
-            paragraph = RE_LINK.sub(_replace_link, paragraph)
-            output.append(paragraph)
-            if shortened:
-                break
+
+    # Turns text into paragraph with a single pass over the text.
+    body = "\n".join(visible).strip()
+    if body:
+        output.append(_render_paragraphs(body, render_anchor))
+    if shortened and (not visible or not visible[-1]):
+        output.append(TP_PARAGRAPH % "")
 
     # Display thumbnail at the end of post.
-    thumbnails = extract_thumbnail(text)
+    thumbnails = extract_thumbnail("\n".join(lines))
     if thumbnails:
-        for thumbnail, link in extract_thumbnail(text):
+        for thumbnail, link in thumbnails:
             thumbs.append(TP_THUMB % (link, thumbnail))
         output.append(TP_THUMB_PARAGRAPH % "".join(thumbs))
 
     markup = PostMarkup("\n".join(output))
-    markup.length = length
+    markup.length = len(body) - body.count("\n")
     markup.shortened = shortened
     return markup
 
 
+def format_text(text, shorten=None):
+    """Format lines of text into HTML. Split into paragraphs at two or more
+    consecutive newlines and adds `<br>` to any line with line break. If
+    `shorten` is given, then the post will be shortened to the first
+    paragraph that exceed the given value.
+
+    The escaped text is split into links and plain text with
+    :data:`RE_TOKEN_LINK` in a single pass and each token is rendered as
+    it is found.
+
+    :param text: A :type:`str` containing post text.
+    :param shorten: An :type:`int` that specifies approximate length of text
+                    to be displayed. The full post will be shown if
+                    :type:`None` is given.
+    """
+    return _render_text(text, shorten)
+
+
 def format_markdown(context, request, text):
     """Format text using Markdown parser.
 
@@ -202,6 +313,13 @@ TP_ANCHOR_CROSS = "".join(
 """.splitlines()
 )
 
+# Anchors and cross anchors within a link, matched in a single pass. Since
+# a rendered anchor never contains another anchor, this is the same as
+# substituting cross anchors before anchors.
+RE_LINK_ANCHOR = re.compile(
+    "%s|%s" % (RE_ANCHOR_CROSS.pattern, RE_ANCHOR.pattern), re.VERBOSE
+)
+
 TP_SHORTENED = "".join(
     """
 <p class="shortened">
@@ -211,18 +329,127 @@ Post shortened. <a href="%s" class="anchor">See full post</a>.
 )
 
 
-def format_post(context, request, post, shorten=None):
+def invalidate_post(post):
+    """Remove rendered fragments of the given post from the cache of the
+    current process.
+
+    :param post: A :class:`fanboi2.models.Post` object.
+    """
+    with _post_cache_lock:
+        _post_cache.pop((post.id, post.version), None)
+
+
+def format_post(context, request, post, shorten=None, topic=None):
     """Works similar to :func:`format_text` but also process link within
     the same topic, i.e. a `>>52` anchor syntax will create a link to
     post numbered 52 in the same topic, as well as display "click to see
     more" link for posts that has been shortened.
 
+    Rendered posts are cached in each process by post ID and version for
+    each :param:`shorten` value, so an updated post is rendered again. Only
+    the :data:`POST_CACHE_SIZE` most recently used posts are kept.
+
     :param context: A :class:`mako.runtime.Context` object.
     :param request: A :class:`pyramid.request.Request` object.
     :param post: A :class:`fanboi2.models.Post` object.
     :param shorten: An :type:`int` or :type:`None`.
+    :param topic: A :class:`fanboi2.models.Topic` of the post, if already
+        loaded by the caller.
     """
-    text = format_text(post.body, shorten)
+    if shorten is None and post.body_formatted_version == FORMATTER_VERSION:
+        return Markup(post.body_formatted)
+    if post.id is None:
+        return _format_post(request, post, shorten, topic)
+
+    # All fragments of a post are kept in a single entry so they could be
+    # invalidated together.
+    key = (post.id, post.version)
+    with _post_cache_lock:
+        fragment = _post_cache.get(key, {}).get(shorten)
+        if fragment is not None:
+            _post_cache.move_to_end(key)
+            return Markup(fragment)
+
+    fragment = str(_format_post(request, post, shorten, topic))
+    with _post_cache_lock:
+        _post_cache.setdefault(key, {})[shorten] = fragment
+        _post_cache.move_to_end(key)
+        while len(_post_cache) > POST_CACHE_SIZE:
+            _post_cache.popitem(last=False)
+    return Markup(fragment)
+
+
+_QUERY_PLACEHOLDER = "query"
+
+
+def _make_path_fns(request):
+    """Returns a 2-tuple of ``(board_path, topic_path)`` functions for
+    generating paths of the ``board`` and ``topic_scoped`` routes. Queries
+    of anchors are never quoted, so each route is generated only once for
+    each board or topic and the query is then substituted into it.
+
+    :param request: A :class:`pyramid.request.Request` object.
+    """
+    board_paths = {}
+    topic_paths = {}
+
+    def _board_path(board):
+        if board not in board_paths:
+            board_paths[board] = request.route_path("board", board=board)
+        return board_paths[board]
+
+    def _topic_path(board, topic_id, query):
+        key = (board, topic_id)
+        if key not in topic_paths:
+            path = request.route_path(
+                "topic_scoped", board=board, topic=topic_id, query=_QUERY_PLACEHOLDER
+            )
+            prefix, _, suffix = path.rpartition(_QUERY_PLACEHOLDER)
+            topic_paths[key] = (prefix, suffix)
+        prefix, suffix = topic_paths[key]
+        return prefix + query + suffix
+
+    return _board_path, _topic_path
+
+
+def _format_post(request, post, shorten=None, topic=None):
+    """Render the given post into HTML. See :func:`format_post`."""
+    if topic is None:
+        topic = post.topic
+
+    board_path, topic_path = _make_path_fns(request)
+
+    def _render_anchor(kind, groups):
+        # Convert cross anchor (>>>/demo/123/1-10) into link.
+        if kind == TOKEN_ANCHOR_CROSS:
+            board = groups[0]
+            topic_id = groups[1] if groups[1] else ""
+            anchor = "".join([m for m in groups[2:-1] if m is not None])
+            trail = groups[-1]
+
+            if board and topic_id:
+                path = topic_path(board, topic_id, anchor if anchor else "recent")
+            else:
+                path = board_path(board)
+
+            text = []
+            for part in (board, topic_id, anchor):
+                if part:
+                    text.append(part)
+            text = html.escape(">>>/%s" % "/".join(text))
+            text += str(trail) if trail else ""
+            return TP_ANCHOR_CROSS % (board, topic_id, anchor, path, text)
+
+        # Convert post anchor (>>123) into link.
+        anchor = "".join([m for m in groups if m is not None])
+        return TP_ANCHOR % (
+            topic.id,
+            anchor,
+            topic_path(topic.board.slug, topic.id, anchor),
+            html.escape(">>%s" % anchor),
+        )
+
+    text = _render_text(post.body, shorten, _render_anchor)
 
     # Append click to see more link if post is shortened.
     try:
@@ -230,63 +457,61 @@ def format_post(context, request, post, shorten=None):
             text += Markup(
                 "\n"
                 + TP_SHORTENED
-                % (
-                    request.route_path(
-                        "topic_scoped",
-                        board=post.topic.board.slug,
-                        topic=post.topic.id,
-                        query="%s-" % post.number,
-                    )
-                )
+                % (topic_path(topic.board.slug, topic.id, "%s-" % post.number))
             )
     except AttributeError:  # pragma: no cover
         pass
 
-    # Convert cross anchor (>>>/demo/123/1-10) into link.
-    def _anchor_cross(match):
-        board = match.groups()[0]
-        topic = match.groups()[1] if match.groups()[1] else ""
-        anchor = "".join([m for m in match.groups()[2:-1] if m is not None])
-        trail = match.groups()[-1]
-
-        if board and topic:
-            args = {"board": board, "topic": topic, "query": anchor}
-            args["query"] = anchor if anchor else "recent"
-            path = request.route_path("topic_scoped", **args)
-        else:
-            path = request.route_path("board", board=board)
-
-        text = []
-        for part in (board, topic, anchor):
-            if part:
-                text.append(part)
-        text = html.escape(">>>/%s" % "/".join(text))
-        text += str(trail) if trail else ""
-        return Markup(TP_ANCHOR_CROSS % (board, topic, anchor, path, text))
-
-    text = RE_ANCHOR_CROSS.sub(_anchor_cross, text)
-
-    # Convert post anchor (>>123) into link.
-    def _anchor(match):
-        anchor = "".join([m for m in match.groups() if m is not None])
-        return Markup(
-            TP_ANCHOR
-            % (
-                post.topic.id,
-                anchor,
-                request.route_path(
-                    "topic_scoped",
-                    board=post.topic.board.slug,
-                    topic=post.topic.id,
-                    query=anchor,
-                ),
-                html.escape(">>%s" % anchor),
-            )
-        )
+    return Markup(text)
 
-    text = RE_ANCHOR.sub(_anchor, text)
 
-    return Markup(text)
+def _prerender_values(request, post, topic=None):
+    """Returns a :type:`dict` of the pre-rendered body of the given post to
+    be stored in the post.
+
+    :param request: A :class:`pyramid.request.Request` object.
+    :param post: A :class:`fanboi2.models.Post` object.
+    :param topic: A :class:`fanboi2.models.Topic` of the post.
+    """
+    return {
+        "body_formatted": str(_format_post(request, post, topic=topic)),
+        "body_formatted_version": FORMATTER_VERSION,
+    }
+
+
+def prerender_post(request, post, topic=None):
+    """Render the body of the given new post and set it to the post, so the
+    post will not be rendered again when displayed in full. Rendering does not depend on the post number,
+    so this could be done before the post is numbered and inserted.
+
+    :param request: A :class:`pyramid.request.Request` object.
+    :param post: A :class:`fanboi2.models.Post` object.
+    :param topic: A :class:`fanboi2.models.Topic` of the post, if the post
+        is not yet associated with it.
+    """
+    for key, value in _prerender_values(request, post, topic).items():
+        setattr(post, key, value)
+
+
+def rerender_post(dbsession, request, post, topic=None):
+    """Similar to :func:`prerender_post` but for a post that was already
+    inserted. The rendered body is written directly to the table so it does
+    not create a new version of the post.
+
+    :param dbsession: A :class:`sqlalchemy.orm.Session` object.
+    :param request: A :class:`pyramid.request.Request` object.
+    :param post: A :class:`fanboi2.models.Post` object.
+    :param topic: A :class:`fanboi2.models.Topic` of the post, if already
+        loaded by the caller.
+    """
+    values = _prerender_values(request, post, topic)
+    dbsession.execute(
+        Post.__table__.update()
+        .values(updated_at=Post.updated_at, **values)
+        .where(Post.id == post.id)
+    )
+    for key, value in values.items():
+        set_committed_value(post, key, value)
 
 
 def format_page(context, request, page):
@@ -73,9 +73,15 @@ class IBoardUpdateService(Interface):
 
 
 class IFilterService(Interface):
+    def chain():
+        pass
+
     def evaluate(payload):
         pass
 
+    def evaluate_many(payloads):
+        pass
+
 
 class IIdentityService(Interface):
     def identity_for(**kwargs):
@@ -120,6 +126,11 @@ class IPageUpdateService(Interface):
         pass
 
 
+class IPostingGuardService(Interface):
+    def check(board, ip_address, body, scopes=None):
+        pass
+
+
 class IPostCreateService(Interface):
     def enqueue(topic_id, body, bumped, ip_address):
         pass
@@ -140,14 +151,34 @@ class IPostQueryService(Interface):
     def list_from_topic_id(topic_id, query=None):
         pass
 
+    def list_recent_from_topic_ids(topic_ids, count=30):
+        pass
+
+    def list_unformatted(formatter_version, after_id=0, limit=1000):
+        pass
+
+
+class IRecentPosterService(Interface):
+    def mark_seen(ip_address):
+        pass
+
+    def mark_seen_on_commit(ip_address):
+        pass
+
     def was_recently_seen(ip_address):
         pass
 
+    def backfill():
+        pass
+
 
 class IRateLimiterService(Interface):
     def limit_for(seconds, **kwargs):
         pass
 
+    def check_and_limit(expiration, threshold, period, engine, **kwargs):
+        pass
+
     def is_limited(**kwargs):
         pass
 
@@ -159,6 +190,9 @@ class IScopeService(Interface):
     def evaluate(scope, obj):
         pass
 
+    def evaluate_many(scopes, obj):
+        pass
+
 
 class ISettingQueryService(Interface):
     def list_all():
@@ -201,6 +235,9 @@ class ITopicQueryService(Interface):
     def list_from_board_slug(board_slug):
         pass
 
+    def page_from_board_slug(board_slug, cursor=None, limit=None):
+        pass
+
     def list_recent_from_board_slug(board_slug):
         pass
 
@@ -15,6 +15,7 @@ DEFAULT_BOARD_CONFIG = {
     "post_delay": 10,
     "post_delay_threshold": 0,
     "post_delay_period": 0,
+    "post_delay_engine": "list",
     "expire_duration": 0,
 }
 
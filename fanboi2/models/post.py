@@ -1,3 +1,4 @@
+from sqlalchemy import event, inspect
 from sqlalchemy.dialects.postgresql import INET
 from sqlalchemy.orm import backref, relationship
 from sqlalchemy.sql import func
@@ -12,6 +13,10 @@ class Post(Versioned, Base):
     """Model class for posts. Each content in a :class:`Topic` and metadata
     regarding its poster are stored here. It has :attr:`number` which is a
     sequential number specifying its position within :class:`Topic`.
+
+    :attr:`body_formatted` holds the body rendered at the time the post was
+    created. It is only used if :attr:`body_formatted_version` matches the
+    current formatter version.
     """
 
     __tablename__ = "post"
@@ -28,6 +33,8 @@ class Post(Versioned, Base):
     name = Column(String, nullable=False)
     body = Column(Text, nullable=False)
     bumped = Column(Boolean, nullable=False, index=True, default=True)
+    body_formatted = Column(Text, nullable=True)
+    body_formatted_version = Column(Integer, nullable=True)
 
     topic = relationship(
         "Topic",
@@ -35,3 +42,13 @@ class Post(Versioned, Base):
             "posts", lazy="dynamic", cascade="all,delete", order_by="Post.number"
         ),
     )
+
+
+@event.listens_for(Post, "before_update")
+def _update_post(mapper, connection, target):
+    """Discard the rendered body if the post body was changed."""
+    state = inspect(target)
+    if state.attrs.body.history.added:
+        if not state.attrs.body_formatted_version.history.added:
+            target.body_formatted = None
+            target.body_formatted_version = None
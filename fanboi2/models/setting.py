@@ -7,7 +7,11 @@ from ._base import Base, Versioned
 DEFAULT_SETTINGS = {
     "app.time_zone": "UTC",
     "app.ident_size": 10,
+    "app.ident_mode": "stored",
+    "app.post_batch_window": 0,
+    "app.post_direct": False,
     "ext.filters.akismet": None,
+    "ext.filters.deadline": 5,
     "ext.filters.dnsbl": ("proxies.dnsbl.sorbs.net", "xbl.spamhaus.org"),
     "ext.filters.proxy": {
         "blackbox": {
@@ -21,6 +25,7 @@ DEFAULT_SETTINGS = {
             "flags": None,
         },
     },
+    "ext.filters.timeouts": {"akismet": 2, "dnsbl": 3, "proxy": 5},
 }
 
 
@@ -1,5 +1,7 @@
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import relationship, backref
-from sqlalchemy.sql.schema import Column, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.sql.schema import Column, ForeignKey, Index
 from sqlalchemy.sql.sqltypes import Integer, DateTime
 from ._base import Base
 
@@ -8,9 +10,18 @@ class TopicMeta(Base):
     """Model class that provides topic metadata. This model holds data that
     are related to internal workings of the topic model that are not part of
     the versionable records.
+
+    :attr:`bump_key` is the time the topic is ordered by in topic listings,
+    which is the last bumped time or the time the topic was created, and is
+    kept together with a copy of the topic's :attr:`board_id` so listings
+    could be served from an index.
     """
 
     __tablename__ = "topic_meta"
+    __table_args__ = (
+        Index("ix_topic_meta_board_id_bump_key", "board_id", "bump_key", "topic_id"),
+        Index("ix_topic_meta_bump_key", "bump_key", "topic_id"),
+    )
 
     topic_id = Column(
         Integer,
@@ -20,10 +31,35 @@ class TopicMeta(Base):
         autoincrement=False,
     )
 
+    board_id = Column(Integer, ForeignKey("board.id"), nullable=False)
     post_count = Column(Integer, nullable=False)
     posted_at = Column(DateTime(timezone=True))
     bumped_at = Column(DateTime(timezone=True))
+    bump_key = Column(DateTime(timezone=True), nullable=False)
 
     topic = relationship(
         "Topic", backref=backref("meta", uselist=False, cascade="all,delete", lazy=True)
     )
+
+
+@event.listens_for(TopicMeta, "before_insert")
+def _populate_topic_meta(mapper, connection, target):
+    """Populate denormalized columns of a new topic metadata."""
+    if target.board_id is None:
+        target.board_id = target.topic.board_id
+    if target.bump_key is None:
+        if target.bumped_at is not None:
+            target.bump_key = target.bumped_at
+        elif target.topic.created_at is not None:
+            target.bump_key = target.topic.created_at
+        else:
+            target.bump_key = func.now()
+
+
+@event.listens_for(TopicMeta, "before_update")
+def _update_topic_meta(mapper, connection, target):
+    """Keep :attr:`bump_key` in sync when the topic is bumped."""
+    state = inspect(target)
+    if state.attrs.bumped_at.history.added and target.bumped_at is not None:
+        if not state.attrs.bump_key.history.added:
+            target.bump_key = target.bumped_at
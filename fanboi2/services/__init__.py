@@ -16,8 +16,10 @@ from ..interfaces import (
     IPageUpdateService,
     IPostCreateService,
     IPostDeleteService,
+    IPostingGuardService,
     IPostQueryService,
     IRateLimiterService,
+    IRecentPosterService,
     IScopeService,
     ISettingQueryService,
     ISettingUpdateService,
@@ -32,6 +34,7 @@ from ..interfaces import (
     IUserSessionQueryService,
 )
 
+from ..helpers.formatters import prerender_post
 from .ban import BanCreateService, BanQueryService, BanUpdateService
 from .banword import BanwordCreateService, BanwordQueryService, BanwordUpdateService
 from .board import BoardCreateService, BoardQueryService, BoardUpdateService
@@ -44,6 +47,8 @@ from .page import (
     PageUpdateService,
 )
 from .post import PostCreateService, PostDeleteService, PostQueryService
+from .poster import RecentPosterService
+from .posting_guard import PostingGuardService
 from .rate_limiter import RateLimiterService
 from .scope import ScopeService
 from .setting import SettingQueryService, SettingUpdateService
@@ -77,16 +82,16 @@ def _make_factory(cls, *services):  # pragma: no cover
 
 
 SERVICES = (
-    (IBanCreateService, BanCreateService, "db"),
-    (IBanQueryService, BanQueryService, "db", IScopeService),
-    (IBanUpdateService, BanUpdateService, "db"),
-    (IBanwordCreateService, BanwordCreateService, "db"),
-    (IBanwordQueryService, BanwordQueryService, "db", IScopeService),
-    (IBanwordUpdateService, BanwordUpdateService, "db"),
+    (IBanCreateService, BanCreateService, "db", "cache"),
+    (IBanQueryService, BanQueryService, "db", IScopeService, "cache"),
+    (IBanUpdateService, BanUpdateService, "db", "cache"),
+    (IBanwordCreateService, BanwordCreateService, "db", "cache"),
+    (IBanwordQueryService, BanwordQueryService, "db", IScopeService, "cache"),
+    (IBanwordUpdateService, BanwordUpdateService, "db", "cache"),
     (IBoardCreateService, BoardCreateService, "db"),
     (IBoardQueryService, BoardQueryService, "db"),
     (IBoardUpdateService, BoardUpdateService, "db"),
-    (IIdentityService, IdentityService, "redis", ISettingQueryService),
+    (IIdentityService, IdentityService, "redis", ISettingQueryService, "ident_secret"),
     (IPageCreateService, PageCreateService, "db", "cache"),
     (IPageDeleteService, PageDeleteService, "db", "cache"),
     (IPageQueryService, PageQueryService, "db", "cache"),
@@ -98,10 +103,21 @@ SERVICES = (
         IIdentityService,
         ISettingQueryService,
         IUserQueryService,
+        IRecentPosterService,
+        "redis",
+        "prerender",
     ),
     (IPostDeleteService, PostDeleteService, "db"),
+    (
+        IPostingGuardService,
+        PostingGuardService,
+        IBanQueryService,
+        IBanwordQueryService,
+        IRateLimiterService,
+    ),
     (IPostQueryService, PostQueryService, "db"),
     (IRateLimiterService, RateLimiterService, "redis"),
+    (IRecentPosterService, RecentPosterService, "redis", "db"),
     (IScopeService, ScopeService),
     (ISettingQueryService, SettingQueryService, "db", "cache"),
     (ISettingUpdateService, SettingUpdateService, "db", "cache"),
@@ -113,6 +129,8 @@ SERVICES = (
         IIdentityService,
         ISettingQueryService,
         IUserQueryService,
+        IRecentPosterService,
+        "prerender",
     ),
     (ITopicDeleteService, TopicDeleteService, "db"),
     (ITopicQueryService, TopicQueryService, "db", IBoardQueryService),
@@ -135,5 +153,20 @@ def includeme(config):  # pragma: no cover
 
     config.register_service_factory(filter_factory, IFilterService)
 
+    ident_secret = config.registry.settings.get("ident.secret")
+
+    def ident_secret_factory(context, request):
+        return ident_secret
+
+    config.register_service_factory(ident_secret_factory, name="ident_secret")
+
+    def prerender_factory(context, request):
+        def _prerender(post, topic):
+            return prerender_post(request, post, topic=topic)
+
+        return _prerender
+
+    config.register_service_factory(prerender_factory, name="prerender")
+
     for interface, class_, *services in SERVICES:
         config.register_service_factory(_make_factory(class_, *services), interface)
@@ -1,16 +1,79 @@
 import datetime
 import ipaddress
+import uuid
 
+from sqlalchemy import event
 from sqlalchemy.sql import desc, func, or_, and_
 
 from ..models import Ban
 
 
+BAN_VERSION_KEY = "services.ban:version"
+
+
+def _bump_version(dbsession, cache_region):
+    """Mark the ban index in every process as outdated once the current
+    transaction is committed. Bumping before the commit would allow other
+    processes to rebuild from the rows that are not yet visible to them.
+
+    :param dbsession: A :class:`sqlalchemy.orm.Session` object.
+    :param cache_region: A :class:`dogpile.cache.region.CacheRegion` object.
+    """
+
+    def _after_commit(_dbsession):
+        cache_region.set(BAN_VERSION_KEY, uuid.uuid4().hex)
+
+    event.listen(dbsession, "after_commit", _after_commit, once=True)
+
+
+class BanIndex(object):
+    """A per-address-family binary prefix tree of bans. Each node is a list of
+    ``[zero_child, one_child, entries]`` where entries are 3-tuple of
+    ``(ban_id, scope, active_until)`` for bans whose network ends at the node.
+
+    :param bans: A list of :class:`Ban` in the order of precedence.
+    """
+
+    def __init__(self, bans):
+        self.roots = {4: [None, None, []], 6: [None, None, []]}
+        for ban in bans:
+            network = ipaddress.ip_network(ban.ip_address, strict=False)
+            node = self.roots[network.version]
+            bits = int(network.network_address)
+            for depth in range(network.prefixlen):
+                bit = (bits >> (network.max_prefixlen - depth - 1)) & 1
+                if node[bit] is None:
+                    node[bit] = [None, None, []]
+                node = node[bit]
+            node[2].append((ban.id, ban.scope, ban.active_until))
+
+    def lookup(self, ip_address):
+        """Returns a list of entries whose network contains the given IP
+        address, ordered from the longest prefix to the shortest.
+
+        :param ip_address: An IP address :type:`str` to lookup for.
+        """
+        local_addr = ipaddress.ip_address(ip_address)
+        node = self.roots[local_addr.version]
+        bits = int(local_addr)
+        found = []
+        for depth in range(local_addr.max_prefixlen + 1):
+            if node[2]:
+                found.append(node[2])
+            if depth == local_addr.max_prefixlen:
+                break
+            node = node[(bits >> (local_addr.max_prefixlen - depth - 1)) & 1]
+            if node is None:
+                break
+        return [entry for entries in reversed(found) for entry in entries]
+
+
 class BanCreateService(object):
     """Ban create service provides a service for creating ban list."""
 
-    def __init__(self, dbsession):
+    def __init__(self, dbsession, cache_region):
         self.dbsession = dbsession
+        self.cache_region = cache_region
 
     def create(
         self, ip_address, description=None, duration=None, scope=None, active=True
@@ -43,15 +106,22 @@ class BanCreateService(object):
         )
 
         self.dbsession.add(ban)
+        _bump_version(self.dbsession, self.cache_region)
         return ban
 
 
 class BanQueryService(object):
-    """Ban query service provides a service for query the ban list."""
+    """Ban query service provides a service for query the ban list.
+    Active bans are indexed per process and the index is only rebuilt when
+    the version stored in the cache region is changed.
+    """
 
-    def __init__(self, dbsession, scope_svc):
+    _index = (None, None)
+
+    def __init__(self, dbsession, scope_svc, cache_region):
         self.dbsession = dbsession
         self.scope_svc = scope_svc
+        self.cache_region = cache_region
 
     def list_active(self):
         """Returns a list of bans that are currently active."""
@@ -81,19 +151,35 @@ class BanQueryService(object):
             .all()
         )
 
+    def index(self):
+        """Returns a :class:`BanIndex` of the currently active bans, rebuilding
+        it from the database only if the ban list has changed since it was
+        last built in this process.
+        """
+        version = self.cache_region.get_or_create(
+            BAN_VERSION_KEY, lambda: uuid.uuid4().hex
+        )
+        index_version, index = BanQueryService._index
+        if index is None or index_version != version:
+            index = BanIndex(self.list_active())
+            BanQueryService._index = (version, index)
+        return index
+
     def is_banned(self, ip_address, scopes=None):
-        """Verify whether the IP address is in the ban list.
+        """Verify whether the IP address is in the ban list. Returns the
+        most specific matching :class:`Ban` or :type:`None`.
 
         :param ip_address: An IP address :type:`str` to lookup for.
         :param scopes: A scope :type:`dict` for evaluating ban scope.
         """
         if not scopes:
             scopes = {}
-        local_addr = ipaddress.ip_address(ip_address)
-        for ban in self.list_active():
-            if not ban.scope or self.scope_svc.evaluate(ban.scope, scopes):
-                if local_addr in ipaddress.ip_network(ban.ip_address):
-                    return ban
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for ban_id, scope, active_until in self.index().lookup(ip_address):
+            if active_until is not None and active_until < now:
+                continue
+            if not scope or self.scope_svc.evaluate(scope, scopes):
+                return self.dbsession.query(Ban).get(ban_id)
 
     def ban_from_id(self, id_):
         """Retrieve a :class:`Ban` matching the given :param:`id`
@@ -107,8 +193,9 @@ class BanQueryService(object):
 class BanUpdateService(object):
     """Ban update service provides a service for updating ban list."""
 
-    def __init__(self, dbsession):
+    def __init__(self, dbsession, cache_region):
         self.dbsession = dbsession
+        self.cache_region = cache_region
 
     def update(self, id_, **kwargs):
         """Update the given ban ID with the given :param:`kwargs`.
@@ -138,4 +225,5 @@ class BanUpdateService(object):
                 setattr(ban, key, value)
 
         self.dbsession.add(ban)
+        _bump_version(self.dbsession, self.cache_region)
         return ban
@@ -1,15 +1,130 @@
 import re
+import uuid
 
+from sqlalchemy import event
 from sqlalchemy.sql import desc, and_
 
 from ..models import Banword
 
 
+BANWORD_VERSION_KEY = "services.banword:version"
+REGEXP_METACHARS = frozenset(".^$*+?{}[]|()")
+RE_UNCOMBINABLE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(|^\(\?[aiLmsux]+\)")
+
+
+def _bump_version(dbsession, cache_region):
+    """Mark the compiled banword matcher in every process as outdated once the current
+    transaction is committed. Bumping before the commit would allow other
+    processes to rebuild from the rows that are not yet visible to them.
+
+    :param dbsession: A :class:`sqlalchemy.orm.Session` object.
+    :param cache_region: A :class:`dogpile.cache.region.CacheRegion` object.
+    """
+
+    def _after_commit(_dbsession):
+        cache_region.set(BANWORD_VERSION_KEY, uuid.uuid4().hex)
+
+    event.listen(dbsession, "after_commit", _after_commit, once=True)
+
+
+def _literal_from_expr(expr):
+    """Returns the literal string matched by :param:`expr` if the expression
+    contains no regular expression constructs other than escaped punctuation,
+    otherwise returns :type:`None`.
+
+    :param expr: A regular expression :type:`str`.
+    """
+    chars = []
+    escaped = False
+    for char in expr:
+        if escaped:
+            if char.isalnum():
+                return None
+            chars.append(char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char in REGEXP_METACHARS:
+            return None
+        else:
+            chars.append(char)
+    if escaped or not chars:
+        return None
+    return "".join(chars)
+
+
+def _compile_group(exprs):
+    """Compile a list of regular expressions into a list of patterns that
+    together match the same inputs. Literal expressions are merged into a
+    single alternation, and the remaining expressions are merged into another
+    alternation if they can be combined without changing their meaning.
+
+    :param exprs: A list of regular expression :type:`str`.
+    """
+    literals = []
+    regexps = []
+    patterns = []
+    for expr in exprs:
+        literal = _literal_from_expr(expr)
+        if literal is not None:
+            literals.append(re.escape(literal))
+        elif RE_UNCOMBINABLE.search(expr):
+            # Global flags and backreferences would change their meaning
+            # once combined with other expressions.
+            patterns.append(re.compile(expr))
+        else:
+            regexps.append(expr)
+
+    if literals:
+        patterns.append(re.compile("|".join(sorted(set(literals)))))
+    if regexps:
+        try:
+            patterns.append(re.compile("|".join("(?:%s)" % e for e in regexps)))
+        except re.error:
+            patterns.extend(re.compile(e) for e in regexps)
+    return patterns
+
+
+class BanwordMatcher(object):
+    """A precompiled matcher for a set of banwords. Expressions are grouped
+    by their scope so that each scope is evaluated only once per check.
+
+    :param banwords: A list of 2-tuple of ``(expr, scope)``.
+    """
+
+    def __init__(self, banwords):
+        groups = {}
+        for expr, scope in banwords:
+            if expr:
+                groups.setdefault(scope or None, []).append(expr)
+        self.groups = tuple(
+            (scope, tuple(_compile_group(exprs))) for scope, exprs in groups.items()
+        )
+        self.scopes = tuple(scope for scope in groups if scope is not None)
+
+    def search(self, text, scopes, scope_svc):
+        """Returns :type:`True` if the given text matches any banword that
+        applies to the given scopes.
+
+        :param text: A text to check.
+        :param scopes: A scope :type:`dict` for evaluating banword scope.
+        :param scope_svc: A :class:`ScopeService` for evaluating the scope.
+        """
+        applies = iter(scope_svc.evaluate_many(self.scopes, scopes))
+        for scope, patterns in self.groups:
+            if scope is None or next(applies):
+                for pattern in patterns:
+                    if pattern.search(text):
+                        return True
+        return False
+
+
 class BanwordCreateService(object):
     """Banword create service provides a service for creating banword."""
 
-    def __init__(self, dbsession):
+    def __init__(self, dbsession, cache_region):
         self.dbsession = dbsession
+        self.cache_region = cache_region
 
     def create(self, expr, description=None, scope=None, active=True):
         """Create a new banword.
@@ -32,15 +147,22 @@ class BanwordCreateService(object):
             expr=expr, description=description, scope=scope, active=bool(active)
         )
         self.dbsession.add(banword)
+        _bump_version(self.dbsession, self.cache_region)
         return banword
 
 
 class BanwordQueryService(object):
-    """Banword query service provides a service for querying banwords."""
+    """Banword query service provides a service for querying banwords.
+    Compiled banwords are kept per process and are only rebuilt when the
+    version stored in the cache region is changed.
+    """
+
+    _matcher = (None, None)
 
-    def __init__(self, dbsession, scope_svc):
+    def __init__(self, dbsession, scope_svc, cache_region):
         self.dbsession = dbsession
         self.scope_svc = scope_svc
+        self.cache_region = cache_region
 
     def list_active(self):
         """Returns a list of banwords that are currently active."""
@@ -58,19 +180,29 @@ class BanwordQueryService(object):
             .order_by(desc(Banword.id))
         )
 
+    def matcher(self):
+        """Returns a :class:`BanwordMatcher` for the currently active banwords,
+        rebuilding it from the database only if the banword set has changed
+        since it was last compiled in this process.
+        """
+        version = self.cache_region.get_or_create(
+            BANWORD_VERSION_KEY, lambda: uuid.uuid4().hex
+        )
+        matcher_version, matcher = BanwordQueryService._matcher
+        if matcher is None or matcher_version != version:
+            matcher = BanwordMatcher((b.expr, b.scope) for b in self.list_active())
+            BanwordQueryService._matcher = (version, matcher)
+        return matcher
+
     def is_banned(self, text, scopes=None):
         """Verify whether the given text includes any of the banwords.
 
         :param text: A text to check.
+        :param scopes: A scope :type:`dict` for evaluating banword scope.
         """
         if not scopes:
             scopes = {}
-        for banword in self.list_active():
-            if not banword.scope or self.scope_svc.evaluate(banword.scope, scopes):
-                banword_re = re.compile(banword.expr)
-                if banword_re.search(text):
-                    return True
-        return False
+        return self.matcher().search(text, scopes, self.scope_svc)
 
     def banword_from_id(self, id_):
         """Retrieve a :class:`Banword` matching the given :param:`id`
@@ -84,8 +216,9 @@ class BanwordQueryService(object):
 class BanwordUpdateService(object):
     """Banword update service provides a service for updating banwords."""
 
-    def __init__(self, dbsession):
+    def __init__(self, dbsession, cache_region):
         self.dbsession = dbsession
+        self.cache_region = cache_region
 
     def update(self, banword_id, **kwargs):
         banword = self.dbsession.query(Banword).filter_by(id=banword_id).one()
@@ -101,4 +234,5 @@ class BanwordUpdateService(object):
                 setattr(banword, key, value)
 
         self.dbsession.add(banword)
+        _bump_version(self.dbsession, self.cache_region)
         return banword
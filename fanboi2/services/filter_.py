@@ -1,45 +1,246 @@
+import os
+import time
+import uuid
 from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-from ..interfaces import ISettingQueryService, IPostQueryService
+from sqlalchemy import event
+
+from ..interfaces import ISettingQueryService, IRecentPosterService
 
 
 FilterResult = namedtuple("FilterResult", ("rejected_by", "filters"))
+FilterChain = namedtuple("FilterChain", ("filters", "timeouts", "deadline"))
+
+FILTER_VERSION_KEY = "services.filter:version"
+
+FILTER_MAX_WORKERS = 8
+FILTER_BATCH_MAX_WORKERS = 64
+FILTER_DEFAULT_DEADLINE = 5
+FILTER_DEFAULT_TIMEOUT = 5
+
+_executor = None
+_executor_pid = None
+
+
+def _get_executor():
+    """Returns a per-process :class:`ThreadPoolExecutor` for running filters.
+    The executor is recreated after fork since worker threads are not carried
+    over to the child process.
+    """
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(
+            max_workers=FILTER_MAX_WORKERS, thread_name_prefix="filter"
+        )
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _bump_version(dbsession, cache_region):
+    """Mark the filter instances in every process as outdated once the
+    current transaction is committed, so they are not rebuilt from settings
+    that are not yet visible to other processes.
+
+    :param dbsession: A :class:`sqlalchemy.orm.Session` object.
+    :param cache_region: A :class:`dogpile.cache.region.CacheRegion` object.
+    """
+
+    def _after_commit(_dbsession):
+        cache_region.set(FILTER_VERSION_KEY, uuid.uuid4().hex)
+
+    event.listen(dbsession, "after_commit", _after_commit, once=True)
 
 
 class FilterService(object):
     """Filter service provides a service for evaluating content using
-    predefined sets of pre-posting filters.
+    predefined sets of pre-posting filters. Filter instances are built
+    once per process and are only rebuilt when ``ext.filters.*`` settings
+    are updated.
     """
 
+    _chains = {}
+
     def __init__(self, filters, service_query_fn):
         self.filters = filters
         self.service_query_fn = service_query_fn
 
-    def evaluate(self, payload):
-        """Evaluate the given payload with filters.
+    def _build_chain(self, use_cache=True):
+        """Build filter instances from the current settings.
 
-        :param payload: A filter payload to verify.
+        :param use_cache: A :type:`bool` flag whether settings may be loaded
+            from cache. Should be unset when rebuilding after the settings
+            were updated, as the cached values may predate the update.
         """
-        filters_chain = []
         setting_query_svc = self.service_query_fn(ISettingQueryService)
-
-        if "ip_address" in payload:
-            post_query_svc = self.service_query_fn(IPostQueryService)
-            if post_query_svc.was_recently_seen(payload["ip_address"]):
-                return FilterResult(rejected_by=None, filters=[])
+        filters = []
 
         for name, cls in self.filters:
             services = {}
-            filters_chain.append(name)
             if hasattr(cls, "__use_services__"):
                 for s in cls.__use_services__:
                     services[s] = self.service_query_fn(name=s)
 
             settings_name = "ext.filters.%s" % (name,)
-            settings = setting_query_svc.value_from_key(settings_name)
+            settings = setting_query_svc.value_from_key(
+                settings_name, use_cache=use_cache
+            )
+            filters.append((name, cls(settings, services)))
 
-            f = cls(settings, services)
-            if f.should_reject(payload):
-                return FilterResult(rejected_by=name, filters=filters_chain)
+        timeouts = setting_query_svc.value_from_key(
+            "ext.filters.timeouts", use_cache=use_cache
+        )
+        if not timeouts:
+            timeouts = {}
+        deadline = setting_query_svc.value_from_key(
+            "ext.filters.deadline", use_cache=use_cache
+        )
+        if deadline is None:
+            deadline = FILTER_DEFAULT_DEADLINE
+        return FilterChain(filters=filters, timeouts=timeouts, deadline=deadline)
+
+    def chain(self):
+        """Returns a :class:`FilterChain` of filter instances, rebuilding it
+        if settings were updated since it was last built in this process.
+        """
+        cache_region = self.service_query_fn(name="cache")
+        if cache_region is None:
+            return self._build_chain()
+
+        key = tuple(self.filters)
+        version = cache_region.get_or_create(
+            FILTER_VERSION_KEY, lambda: uuid.uuid4().hex
+        )
+        chain_version, chain = FilterService._chains.get(key, (None, None))
+        if chain is None or chain_version != version:
+            chain = self._build_chain(use_cache=False)
+            FilterService._chains[key] = (version, chain)
+        return chain
+
+    def evaluate(self, payload):
+        """Evaluate the given payload with filters.
+
+        All filters are run concurrently and evaluation stops as soon as
+        any filter rejects the payload. Filters that do not finish within
+        its timeout in ``ext.filters.timeouts`` or within the overall
+        ``ext.filters.deadline`` are treated as not rejecting.
+
+        :param payload: A filter payload to verify.
+        """
+        return self._evaluate([payload], lambda _size: _get_executor())[0]
+
+    def evaluate_many(self, payloads):
+        """Evaluate each of the given payloads with filters similar to
+        :meth:`evaluate` and returns a list of :class:`FilterResult` in the
+        same order. Filters for all payloads are run concurrently and share
+        the same deadline, so evaluating many payloads takes no longer than
+        evaluating one.
+
+        :param payloads: A list of filter payloads to verify.
+        """
+        executor = None
+
+        def _get_batch_executor(size):
+            nonlocal executor
+            executor = ThreadPoolExecutor(
+                max_workers=min(size, FILTER_BATCH_MAX_WORKERS),
+                thread_name_prefix="filter-batch",
+            )
+            return executor
+
+        try:
+            return self._evaluate(payloads, _get_batch_executor)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def _recently_seen(self, payloads):
+        """Returns a list of :type:`bool` whether the poster of each of the
+        given payloads was recently seen, in which case filters are skipped.
+
+        :param payloads: A list of filter payloads to verify.
+        """
+        recent_poster_svc = None
+        seen = []
+        for payload in payloads:
+            if "ip_address" not in payload:
+                seen.append(False)
+                continue
+            if recent_poster_svc is None:
+                recent_poster_svc = self.service_query_fn(IRecentPosterService)
+            seen.append(recent_poster_svc.was_recently_seen(payload["ip_address"]))
+        return seen
+
+    def _evaluate(self, payloads, executor_fn):
+        """Evaluate the given payloads with filters running in the executor
+        returned by :param:`executor_fn`, which is called with the number of
+        filter evaluations to run.
+
+        :param payloads: A list of filter payloads to verify.
+        :param executor_fn: A function returning an :class:`Executor`.
+        """
+        results = [None] * len(payloads)
+        evaluating = []
+        for i, seen in enumerate(self._recently_seen(payloads)):
+            if seen:
+                results[i] = FilterResult(rejected_by=None, filters=[])
+            else:
+                evaluating.append(i)
+        if not evaluating:
+            return results
+
+        chain = self.chain()
+        filters_chain = [name for name, _f in chain.filters]
+        executor = executor_fn(len(evaluating) * len(chain.filters))
+        started_at = time.monotonic()
+        pending = {}
+
+        for i in evaluating:
+            for order, (name, f) in enumerate(chain.filters):
+                timeout = chain.timeouts.get(name, FILTER_DEFAULT_TIMEOUT)
+                expires_at = started_at + min(timeout, chain.deadline)
+                future = executor.submit(f.should_reject, payloads[i])
+                pending[future] = (i, order, name, expires_at)
+
+        try:
+            for i, name in _wait_rejected(pending):
+                results[i] = FilterResult(rejected_by=name, filters=filters_chain)
+        finally:
+            for future in pending:
+                future.cancel()
+
+        for i in evaluating:
+            if results[i] is None:
+                results[i] = FilterResult(rejected_by=None, filters=filters_chain)
+        return results
+
+
+def _wait_rejected(pending):
+    """Wait for the pending filter evaluations and yields a 2-tuple of
+    ``(index, name)`` for each payload as soon as any filter rejects it.
+    Remaining evaluations of a rejected payload, as well as evaluations that
+    did not finish in time, are removed from :param:`pending`.
+
+    :param pending: A :type:`dict` of :class:`Future` to a 4-tuple of
+        ``(index, order, name, expires_at)``.
+    """
+    while pending:
+        now = time.monotonic()
+        for future, (_i, _o, _n, expires_at) in list(pending.items()):
+            if expires_at <= now:
+                del pending[future]
+        if not pending:
+            break
 
-        return FilterResult(rejected_by=None, filters=filters_chain)
+        wait_for = min(e for _i, _o, _n, e in pending.values()) - now
+        done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in sorted(done, key=lambda f: pending[f][:2]):
+            if future not in pending:
+                continue
+            i, _order, name, _expires_at = pending.pop(future)
+            if future.result():
+                for other, (other_i, _o, _n, _e) in list(pending.items()):
+                    if other_i == i:
+                        other.cancel()
+                        del pending[other]
+                yield i, name
@@ -1,4 +1,7 @@
 import datetime
+import hashlib
+import hmac
+import logging
 import random
 import string
 
@@ -7,16 +10,49 @@ import pytz
 
 STRINGS = string.ascii_letters + string.digits + "+/."
 
+IDENT_MODE_STORED = "stored"
+IDENT_MODE_HMAC = "hmac"
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_digest(digest, size):
+    """Encodes the given :param:`digest` into a :type:`str` of :param:`size`
+    characters from :data:`STRINGS`.
+
+    :param digest: A :type:`bytes` digest to encode.
+    :param size: A number of characters to encode to.
+    """
+    n = int.from_bytes(digest, "big")
+    chars = []
+    for _ in range(size):
+        n, r = divmod(n, len(STRINGS))
+        chars.append(STRINGS[r])
+    return "".join(chars)
+
 
 class IdentityService(object):
     """Identity service provides a service for querying an identity
     for a user given by a payload from the database or generate a new
     one if not already exists.
+
+    In ``hmac`` ident mode, identities for :meth:`identity_with_tz_for` are
+    instead derived from the payload using :param:`ident_secret`, which does
+    not require Redis at all. If the secret is not set, the service falls
+    back to ``stored`` ident mode.
     """
 
-    def __init__(self, redis_conn, setting_query_svc):
+    def __init__(self, redis_conn, setting_query_svc, ident_secret=None):
         self.redis_conn = redis_conn
         self.ident_size = setting_query_svc.value_from_key("app.ident_size")
+        self.ident_mode = setting_query_svc.value_from_key("app.ident_mode")
+        self.ident_secret = ident_secret
+        if self.ident_mode == IDENT_MODE_HMAC and not ident_secret:
+            logger.warning(
+                "IDENT_SECRET is not set, falling back to %s ident mode.",
+                IDENT_MODE_STORED,
+            )
+            self.ident_mode = IDENT_MODE_STORED
 
     def _get_key(self, **kwargs):
         return "services.identity:%s" % (
@@ -49,7 +85,25 @@ class IdentityService(object):
         """
         if isinstance(tz, str):
             tz = pytz.timezone(tz)
+        if self.ident_mode == IDENT_MODE_HMAC:
+            current_time = datetime.datetime.now(tz)
+            kwargs["timestamp"] = current_time.strftime("%Y%m%d")
+            return self.hmac_identity_for(**kwargs)
         redis_time = self.redis_conn.time()  # Avoid relying on local clock.
         current_time = datetime.datetime.fromtimestamp(redis_time[0], tz)
         kwargs["timestamp"] = current_time.strftime("%Y%m%d")
         return self.identity_for(**kwargs)
+
+    def hmac_identity_for(self, **kwargs):
+        """Derive the identity for user matching :param:`kwargs` payload
+        using HMAC keyed with the ident secret. The same payload will always
+        result in the same identity without storing anything.
+
+        :param payload: Payload to identify this identity.
+        """
+        secret = self.ident_secret
+        if isinstance(secret, str):
+            secret = secret.encode("utf-8")
+        key = self._get_key(**kwargs)
+        digest = hmac.new(secret, key.encode("utf-8"), hashlib.sha512).digest()
+        return _encode_digest(digest, self.ident_size)
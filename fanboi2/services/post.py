@@ -1,51 +1,98 @@
-import datetime
 import ipaddress
 
-from sqlalchemy.sql import func
+from sqlalchemy.orm import aliased, joinedload
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.sql import and_, func, or_
 
 from ..errors import StatusRejectedError
-from ..models import Post, Topic
-from ..tasks import add_post
-
-
-POSTER_SEEN_DELTA = datetime.timedelta(days=3)
+from ..helpers.formatters import invalidate_post
+from ..models import Board, Post, Topic, TopicMeta
+from ..tasks import add_post, queue_post
 
 
 class PostCreateService(object):
     """Post create service provides a service for creating a post."""
 
-    def __init__(self, dbsession, identity_svc, setting_query_svc, user_query_svc):
+    def __init__(
+        self,
+        dbsession,
+        identity_svc,
+        setting_query_svc,
+        user_query_svc,
+        recent_poster_svc=None,
+        redis_conn=None,
+        prerender_fn=None,
+    ):
         self.dbsession = dbsession
         self.identity_svc = identity_svc
         self.setting_query_svc = setting_query_svc
         self.user_query_svc = user_query_svc
+        self.recent_poster_svc = recent_poster_svc
+        self.redis_conn = redis_conn
+        self.prerender_fn = prerender_fn
 
     def enqueue(self, topic_id, body, bumped, ip_address, payload):
         """Enqueues the post creation to the posting queue. Posts that are
         queued will be processed with pre-posting filters using the given
         :param:`payload`.
 
+        If ``app.post_batch_window`` is set, posts to the same topic that
+        are queued within the window are inserted together in one transaction
+        by :func:`fanboi2.tasks.add_posts`, but each post still has its own
+        task result.
+
         :param topic_id: A topic ID :type:`int` to lookup the post.
         :param body: A :type:`str` topic body.
         :param bumped: A :type:`bool` whether to bump the topic.
         :param ip_address: An IP address of the topic creator.
         :param payload: A request payload containing request metadata.
         """
+        window = self.setting_query_svc.value_from_key("app.post_batch_window")
+        if window and self.redis_conn is not None:
+            return queue_post(
+                self.redis_conn,
+                window,
+                topic_id,
+                body,
+                bumped,
+                ip_address,
+                payload=payload,
+            )
         return add_post.delay(topic_id, body, bumped, ip_address, payload=payload)
 
-    def _prepare_c(self, topic_id, bumped, allowed_board_status, allowed_topic_status):
+    def create_direct(self, topic_id, body, bumped, ip_address):
+        """Creates a new post immediately without going through the posting
+        queue if ``app.post_direct`` is enabled and the poster was recently
+        seen, in which case pre-posting filters would have been skipped by
+        the filter service anyway. Returns the created :class:`Post`, or
+        :type:`None` if the post should be enqueued instead.
+
+        :param topic_id: A topic ID :type:`int` to lookup the post.
+        :param body: A :type:`str` topic body.
+        :param bumped: A :type:`bool` whether to bump the topic.
+        :param ip_address: An IP address of the topic creator.
+        """
+        if not self.setting_query_svc.value_from_key("app.post_direct"):
+            return None
+        if self.recent_poster_svc is None:
+            return None
+        if not self.recent_poster_svc.was_recently_seen(ip_address):
+            return None
+
+        post = self.create(topic_id, body, bumped, ip_address)
+        self.dbsession.flush()
+        return post
+
+    def _prepare_c(self, topic_id, allowed_board_status, allowed_topic_status):
         """Internal method performing preparatory work to create a new post.
-        Returns a 3-tuple of ``(board, topic, topic_meta)``.
+        Returns a 2-tuple of ``(board, topic)``. No locks are taken here,
+        the status is checked again when the post number is allocated.
 
         :param topic_id: A topic ID :type:`int` to prepare.
-        :param bumped: A :type:`bool` whether the topic will be bumped.
         :param allowed_board_status: Tuple of board status to allow posting.
         :param allowed_topic_status: Tuple of topic status to allow posting.
         """
-        topic = (
-            self.dbsession.query(Topic).with_for_update().filter_by(id=topic_id).one()
-        )
-
+        topic = self.dbsession.query(Topic).filter_by(id=topic_id).one()
         if topic.status not in allowed_topic_status:
             raise StatusRejectedError(topic.status)
 
@@ -53,40 +100,103 @@ class PostCreateService(object):
         if board.status not in allowed_board_status:
             raise StatusRejectedError(board.status)
 
-        # Update topic meta
-
-        topic_meta = topic.meta
-        topic_meta.post_count = topic_meta.post_count + 1
-        topic_meta.posted_at = func.now()
+        return board, topic
+
+    def _allocate_number(
+        self,
+        board,
+        topic,
+        bumped,
+        allowed_board_status,
+        allowed_topic_status,
+        count=1,
+    ):
+        """Internal method allocating post numbers for :param:`count` new
+        posts with a single conditional ``UPDATE`` on the topic metadata,
+        which also updates post and bump time. Returns the last allocated
+        number. Since the row lock on the topic metadata is held until the
+        transaction ends, this should be called as late as possible. Raises
+        :class:`StatusRejectedError` if the topic or board no longer allows
+        posting, or the posts would exceed ``max_posts``.
+
+        :param board: A :class:`Board` the topic belongs to.
+        :param topic: A :class:`Topic` to allocate the post number.
+        :param bumped: A :type:`bool` whether the topic will be bumped.
+        :param allowed_board_status: Tuple of board status to allow posting.
+        :param allowed_topic_status: Tuple of topic status to allow posting.
+        :param count: Number of post numbers to allocate.
+        """
+        max_posts = board.settings["max_posts"]
+        bumped_at = TopicMeta.bumped_at
+        bump_key = TopicMeta.bump_key
         if bumped is None or bumped:
-            topic_meta.bumped_at = func.now()
-        self.dbsession.add(topic_meta)
-
-        # Update topic
+            bumped_at = bump_key = func.now()
+
+        number = self.dbsession.execute(
+            TopicMeta.__table__.update()
+            .values(
+                post_count=TopicMeta.post_count + count,
+                posted_at=func.now(),
+                bumped_at=bumped_at,
+                bump_key=bump_key,
+            )
+            .where(
+                and_(
+                    TopicMeta.topic_id == topic.id,
+                    Topic.id == TopicMeta.topic_id,
+                    Board.id == Topic.board_id,
+                    Topic.status.in_(allowed_topic_status),
+                    Board.status.in_(allowed_board_status),
+                    or_(
+                        Topic.status != "open",
+                        TopicMeta.post_count + count <= max_posts,
+                    ),
+                )
+            )
+            .returning(TopicMeta.post_count)
+        ).scalar()
+
+        # Topic metadata may have been loaded into the session already.
+        topic_meta = self.dbsession.identity_map.get(identity_key(TopicMeta, topic.id))
+        if topic_meta is not None:
+            self.dbsession.expire(topic_meta)
+
+        if number is None:
+            # Flush first so pending changes, e.g. archiving the topic after
+            # an earlier allocation, are not discarded by the refresh.
+            self.dbsession.flush()
+            self.dbsession.refresh(topic)
+            self.dbsession.refresh(board)
+            if topic.status not in allowed_topic_status:
+                raise StatusRejectedError(topic.status)
+            if board.status not in allowed_board_status:
+                raise StatusRejectedError(board.status)
+
+            # The topic may already be over the limit, e.g. if max_posts has
+            # been lowered, in which case it will never accept another post.
+            post_count = (
+                self.dbsession.query(TopicMeta.post_count)
+                .filter_by(topic_id=topic.id)
+                .scalar()
+            )
+            if topic.status == "open" and post_count >= max_posts:
+                topic.status = "archived"
+                self.dbsession.add(topic)
+            raise StatusRejectedError("archived")
 
-        max_posts = board.settings["max_posts"]
-        if topic.status == "open" and topic_meta.post_count >= max_posts:
+        if topic.status == "open" and number >= max_posts:
             topic.status = "archived"
             self.dbsession.add(topic)
 
-        return board, topic, topic_meta
+        return number
 
-    def create(self, topic_id, body, bumped, ip_address):
-        """Creates a new post and associate related metadata. Unlike
-        ``enqueue``, this method performs the actual creation of the topic.
+    def _make_ident(self, board, ip_address):
+        """Internal method returning a 2-tuple of ``(ident, ident_type)``
+        for a post made by the given IP address to the given board.
 
-        :param topic_id: A topic ID :type:`int` to lookup the post.
-        :param body: A :type:`str` topic body.
-        :param bumped: A :type:`bool` whether to bump the topic.
-        :param ip_address: An IP address of the topic creator.
+        :param board: A :class:`Board` the post is made to.
+        :param ip_address: An IP address of the poster.
         """
-        board, topic, topic_meta = self._prepare_c(
-            topic_id,
-            bumped,
-            allowed_board_status=("open", "restricted"),
-            allowed_topic_status=("open",),
-        )
-
         ident = None
         ident_type = "none"
         if board.settings["use_ident"]:
@@ -104,13 +214,43 @@ class PostCreateService(object):
 
             ident = self.identity_svc.identity_with_tz_for(
                 self.setting_query_svc.value_from_key("app.time_zone"),
-                board=topic.board.slug,
+                board=board.slug,
                 ip_address=ident_addr,
             )
+        return ident, ident_type
+
+    def _prerender(self, post, topic):
+        """Internal method rendering the body of a new post with
+        :attr:`prerender_fn`, if set. This should be called before post
+        numbers are allocated, so rendering does not happen while the row
+        lock on the topic metadata is held.
+
+        :param post: A :class:`Post` that is not yet inserted.
+        :param topic: A :class:`Topic` the post will belong to.
+        """
+        if self.prerender_fn is not None:
+            self.prerender_fn(post, topic)
+
+    def create(self, topic_id, body, bumped, ip_address):
+        """Creates a new post and associate related metadata. Unlike
+        ``enqueue``, this method performs the actual creation of the topic.
+
+        :param topic_id: A topic ID :type:`int` to lookup the post.
+        :param body: A :type:`str` topic body.
+        :param bumped: A :type:`bool` whether to bump the topic.
+        :param ip_address: An IP address of the topic creator.
+        """
+        allowed_board_status = ("open", "restricted")
+        allowed_topic_status = ("open",)
+        board, topic = self._prepare_c(
+            topic_id,
+            allowed_board_status=allowed_board_status,
+            allowed_topic_status=allowed_topic_status,
+        )
+
+        ident, ident_type = self._make_ident(board, ip_address)
 
         post = Post(
-            topic=topic,
-            number=topic_meta.post_count,
             body=body,
             bumped=bumped,
             name=board.settings["name"],
@@ -118,10 +258,96 @@ class PostCreateService(object):
             ident_type=ident_type,
             ip_address=ip_address,
         )
+        self._prerender(post, topic)
+
+        post.number = self._allocate_number(
+            board, topic, bumped, allowed_board_status, allowed_topic_status
+        )
+        post.topic = topic
 
         self.dbsession.add(post)
+        if self.recent_poster_svc is not None:
+            self.recent_poster_svc.mark_seen_on_commit(ip_address)
         return post
 
+    def create_many(self, topic_id, posts):
+        """Creates multiple posts to the same topic similar to :meth:`create`
+        but allocates all post numbers with a single metadata update. Returns
+        a list of either :class:`Post` or :class:`StatusRejectedError` in the
+        same order as :param:`posts`.
+
+        :param topic_id: A topic ID :type:`int` to lookup the post.
+        :param posts: A list of ``(body, bumped, ip_address)`` tuples.
+        """
+        allowed_board_status = ("open", "restricted")
+        allowed_topic_status = ("open",)
+        try:
+            board, topic = self._prepare_c(
+                topic_id,
+                allowed_board_status=allowed_board_status,
+                allowed_topic_status=allowed_topic_status,
+            )
+        except StatusRejectedError as e:
+            return [e for _ in posts]
+
+        new_posts = []
+        for body, bumped, ip_address in posts:
+            ident, ident_type = self._make_ident(board, ip_address)
+            post = Post(
+                body=body,
+                bumped=bumped,
+                name=board.settings["name"],
+                ident=ident,
+                ident_type=ident_type,
+                ip_address=ip_address,
+            )
+            self._prerender(post, topic)
+            new_posts.append(post)
+
+        numbers = []
+
+        try:
+            last = self._allocate_number(
+                board,
+                topic,
+                any(bumped is None or bumped for _b, bumped, _ip in posts),
+                allowed_board_status,
+                allowed_topic_status,
+                count=len(posts),
+            )
+            numbers = list(range(last - len(posts) + 1, last + 1))
+        except StatusRejectedError:
+            # Not all posts fit into the topic; allocate one by one so posts
+            # up to max_posts are still accepted.
+            for _body, bumped, _ip_address in posts:
+                try:
+                    numbers.append(
+                        self._allocate_number(
+                            board,
+                            topic,
+                            bumped,
+                            allowed_board_status,
+                            allowed_topic_status,
+                        )
+                    )
+                except StatusRejectedError as e:
+                    numbers.append(e)
+
+        results = []
+        for post, number in zip(new_posts, numbers):
+            if isinstance(number, StatusRejectedError):
+                results.append(number)
+                continue
+
+            post.number = number
+            post.topic = topic
+
+            self.dbsession.add(post)
+            if self.recent_poster_svc is not None:
+                self.recent_poster_svc.mark_seen_on_commit(post.ip_address)
+            results.append(post)
+        return results
+
     def create_with_user(self, topic_id, user_id, body, bumped, ip_address):
         """Creates a new post similar to :meth:`create` but with user ID
         associated to it.
@@ -136,11 +362,12 @@ class PostCreateService(object):
         :param ip_address: An IP address of the topic creator.
         """
         user = self.user_query_svc.user_from_id(user_id)
-        board, topic, topic_meta = self._prepare_c(
+        allowed_board_status = ("open", "restricted", "locked")
+        allowed_topic_status = ("open", "locked")
+        board, topic = self._prepare_c(
             topic_id,
-            bumped,
-            allowed_board_status=("open", "restricted", "locked"),
-            allowed_topic_status=("open", "locked"),
+            allowed_board_status=allowed_board_status,
+            allowed_topic_status=allowed_topic_status,
         )
 
         ident = user.ident
@@ -148,8 +375,6 @@ class PostCreateService(object):
         name = user.name
 
         post = Post(
-            topic=topic,
-            number=topic_meta.post_count,
             body=body,
             bumped=bumped,
             name=name,
@@ -157,8 +382,16 @@ class PostCreateService(object):
             ident_type=ident_type,
             ip_address=ip_address,
         )
+        self._prerender(post, topic)
+
+        post.number = self._allocate_number(
+            board, topic, bumped, allowed_board_status, allowed_topic_status
+        )
+        post.topic = topic
 
         self.dbsession.add(post)
+        if self.recent_poster_svc is not None:
+            self.recent_poster_svc.mark_seen_on_commit(ip_address)
         return post
 
 
@@ -181,6 +414,15 @@ class PostDeleteService(object):
         )
 
         self.dbsession.delete(post)
+        invalidate_post(post)
+
+        # Touch the topic so its cache validators change. This is written
+        # directly to the table so it does not create a new topic version.
+        self.dbsession.execute(
+            Topic.__table__.update()
+            .values(updated_at=func.now())
+            .where(Topic.id == topic_id)
+        )
         return post
 
 
@@ -201,17 +443,57 @@ class PostQueryService(object):
         topic = self.dbsession.query(Topic).filter_by(id=topic_id).one()
         return list(topic.scoped_posts(query))
 
-    def was_recently_seen(self, ip_address):
-        """Returns whether the given IP address was recently seen.
+    def list_recent_from_topic_ids(self, topic_ids, count=30):
+        """Query recent `count` number of posts for each of the given topics
+        in a single query. Returns a :type:`dict` mapping each topic ID to
+        a list of its posts ordered by post number.
 
-        :param ip_address: An :type:`str` IP address to lookup.
+        :param topic_ids: A list of topic IDs :type:`int` to lookup posts.
+        :param count: Number of posts :type:`int` to return for each topic.
         """
+        results = {topic_id: [] for topic_id in topic_ids}
+        if not results:
+            return results
+
+        subq = (
+            self.dbsession.query(
+                Post,
+                func.row_number()
+                .over(partition_by=Post.topic_id, order_by=Post.number.desc())
+                .label("rank"),
+            )
+            .filter(Post.topic_id.in_(results.keys()))
+            .subquery()
+        )
+        post = aliased(Post, subq)
         q = (
+            self.dbsession.query(post)
+            .filter(subq.c.rank <= count)
+            .order_by(post.topic_id, post.number)
+        )
+        for p in q:
+            results[p.topic_id].append(p)
+        return results
+
+    def list_unformatted(self, formatter_version, after_id=0, limit=1000):
+        """Query posts that were not rendered with the given formatter
+        version, ordered by ID and starting after :param:`after_id`. The
+        topic and board of each post are loaded together with the post.
+
+        :param formatter_version: The current formatter version :type:`int`.
+        :param after_id: A post ID :type:`int` to start after.
+        :param limit: Maximum number of posts :type:`int` to return.
+        """
+        return list(
             self.dbsession.query(Post)
+            .options(joinedload(Post.topic).joinedload(Topic.board))
             .filter(
-                Post.created_at >= func.now() - POSTER_SEEN_DELTA,
-                Post.ip_address == ip_address,
+                Post.id > after_id,
+                or_(
+                    Post.body_formatted_version.is_(None),
+                    Post.body_formatted_version != formatter_version,
+                ),
             )
-            .exists()
+            .order_by(Post.id)
+            .limit(limit)
         )
-        return self.dbsession.query(q).scalar()
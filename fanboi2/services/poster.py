@@ -0,0 +1,105 @@
+import datetime
+import time
+
+from sqlalchemy import event
+from sqlalchemy.sql import func
+
+from ..models import Post
+
+
+POSTER_SEEN_DELTA = datetime.timedelta(days=3)
+RECENT_POSTERS_KEY = "services.poster:recent"
+RECENT_POSTERS_BATCH_SIZE = 1000
+
+
+class RecentPosterService(object):
+    """Recent poster service provides a service for tracking IP addresses
+    that recently posted, so checking whether a poster was recently seen
+    does not require scanning posts in the database.
+
+    Posters are kept in a Redis sorted set scored by the time they last
+    posted, and entries older than :data:`POSTER_SEEN_DELTA` are pruned
+    whenever a poster is marked.
+    """
+
+    def __init__(self, redis_conn, dbsession):
+        self.redis_conn = redis_conn
+        self.dbsession = dbsession
+
+    def _cutoff(self, now):
+        return now - POSTER_SEEN_DELTA.total_seconds()
+
+    def mark_seen(self, ip_address):
+        """Mark the given IP address as recently seen.
+
+        :param ip_address: An :type:`str` IP address of the poster.
+        """
+        now = time.time()
+        pipe = self.redis_conn.pipeline(transaction=False)
+        pipe.zadd(RECENT_POSTERS_KEY, {ip_address: now})
+        pipe.zremrangebyscore(RECENT_POSTERS_KEY, "-inf", self._cutoff(now))
+        pipe.execute()
+
+    def mark_seen_on_commit(self, ip_address):
+        """Mark the given IP address as recently seen once the current
+        transaction is committed, so a post that is rolled back does not
+        make the poster recently seen.
+
+        :param ip_address: An :type:`str` IP address of the poster.
+        """
+
+        def _after_commit(_dbsession):
+            event.remove(self.dbsession, "after_rollback", _after_rollback)
+            self.mark_seen(ip_address)
+
+        def _after_rollback(_dbsession):
+            event.remove(self.dbsession, "after_commit", _after_commit)
+
+        event.listen(self.dbsession, "after_commit", _after_commit, once=True)
+        event.listen(self.dbsession, "after_rollback", _after_rollback, once=True)
+
+    def was_recently_seen(self, ip_address):
+        """Returns whether the given IP address was recently seen.
+
+        :param ip_address: An :type:`str` IP address to lookup.
+        """
+        score = self.redis_conn.zscore(RECENT_POSTERS_KEY, ip_address)
+        return score is not None and score >= self._cutoff(time.time())
+
+    def backfill(self):
+        """Populate recently seen posters from posts in the database, e.g.
+        after deployment or after Redis data was lost. Returns the number
+        of posters added.
+        """
+        q = (
+            self.dbsession.query(Post.ip_address, func.max(Post.created_at))
+            .filter(Post.created_at >= func.now() - POSTER_SEEN_DELTA)
+            .group_by(Post.ip_address)
+        )
+
+        count = 0
+        mapping = {}
+        for ip_address, created_at in q:
+            mapping[ip_address] = created_at.timestamp()
+            if len(mapping) >= RECENT_POSTERS_BATCH_SIZE:
+                count += self._backfill_batch(mapping)
+                mapping = {}
+        if mapping:
+            count += self._backfill_batch(mapping)
+        return count
+
+    def _backfill_batch(self, mapping):
+        # Only move scores forward so posters marked while backfilling are
+        # not overwritten with an older time (ZADD GT requires Redis 6.2).
+        pipe = self.redis_conn.pipeline(transaction=False)
+        for ip_address in mapping:
+            pipe.zscore(RECENT_POSTERS_KEY, ip_address)
+        scores = pipe.execute()
+        newer = {
+            ip_address: ts
+            for (ip_address, ts), score in zip(mapping.items(), scores)
+            if score is None or score < ts
+        }
+        if newer:
+            self.redis_conn.zadd(RECENT_POSTERS_KEY, newer)
+        return len(mapping)
@@ -0,0 +1,95 @@
+from collections import namedtuple
+from enum import Enum
+
+from ..errors import BanRejectedError, BanwordRejectedError, RateLimitedError
+
+
+class VerdictType(Enum):
+    OK = 1
+    BANNED = 2
+    BANWORD = 3
+    RATE_LIMITED = 4
+
+
+_VERDICT_INFO = {
+    VerdictType.OK: (None, None),
+    VerdictType.BANNED: ("ban_rejected", "403 Forbidden"),
+    VerdictType.BANWORD: ("banword_rejected", "403 Forbidden"),
+    VerdictType.RATE_LIMITED: ("rate_limited", "429 Too Many Requests"),
+}
+
+
+class PostingVerdict(namedtuple("PostingVerdict", ("type", "time_left"))):
+    """A result of :meth:`PostingGuardService.check`. :attr:`time_left` is
+    only present for :attr:`VerdictType.RATE_LIMITED` verdict.
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        """Returns :type:`True` if the post should be accepted."""
+        return self.type == VerdictType.OK
+
+    @property
+    def name(self):
+        """The error name of this verdict, as used in error templates."""
+        return _VERDICT_INFO[self.type][0]
+
+    @property
+    def http_status(self):
+        """The HTTP status code to response as in the HTML views."""
+        return _VERDICT_INFO[self.type][1]
+
+    def error(self):
+        """Returns a :class:`fanboi2.errors.BaseError` for this verdict."""
+        if self.type == VerdictType.BANNED:
+            return BanRejectedError()
+        elif self.type == VerdictType.BANWORD:
+            return BanwordRejectedError()
+        elif self.type == VerdictType.RATE_LIMITED:
+            return RateLimitedError(self.time_left)
+
+
+VERDICT_OK = PostingVerdict(VerdictType.OK, None)
+
+
+class PostingGuardService(object):
+    """Posting guard service provides a service for evaluating whether a post
+    or a topic should be accepted before it is enqueued for creation.
+    """
+
+    def __init__(self, ban_query_svc, banword_query_svc, rate_limiter_svc):
+        self.ban_query_svc = ban_query_svc
+        self.banword_query_svc = banword_query_svc
+        self.rate_limiter_svc = rate_limiter_svc
+
+    def check(self, board, ip_address, body, scopes=None):
+        """Check the given post against the ban list, the banwords and
+        the board rate limit, in that order. The rate limit is set as part
+        of the check if the post is accepted. Returns a :class:`PostingVerdict`.
+
+        :param board: A :class:`fanboi2.models.Board` to post to.
+        :param ip_address: An IP address of the poster.
+        :param body: A :type:`str` post body.
+        :param scopes: A scope :type:`dict` for evaluating ban scope.
+        """
+        if self.ban_query_svc.is_banned(ip_address, scopes=scopes):
+            return PostingVerdict(VerdictType.BANNED, None)
+
+        if self.banword_query_svc.is_banned(body, scopes=scopes):
+            return PostingVerdict(VerdictType.BANWORD, None)
+
+        if self.rate_limiter_svc:
+            time_left = self.rate_limiter_svc.check_and_limit(
+                board.settings["post_delay"],
+                board.settings["post_delay_threshold"],
+                board.settings["post_delay_period"],
+                engine=board.settings["post_delay_engine"],
+                ip_address=ip_address,
+                board=board.slug,
+            )
+            if time_left:
+                return PostingVerdict(VerdictType.RATE_LIMITED, time_left)
+
+        return VERDICT_OK
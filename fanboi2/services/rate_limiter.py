@@ -1,6 +1,93 @@
+import logging
 import math
 
 
+# Atomically checks whether the payload is rate limited and, if not, sets the
+# rate limit in the same way as ``RateLimiterService.limit_for``. Returns the
+# number of seconds left if limited, or 0 if the rate limit was just set.
+#
+# KEYS[1] = limit key, KEYS[2] = timestamps key
+# ARGV = expiration, threshold, period, prune period
+CHECK_AND_LIMIT_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return math.max(redis.call("TTL", KEYS[1]), 1)
+end
+
+local expiration = tonumber(ARGV[1])
+local threshold = tonumber(ARGV[2])
+local period = tonumber(ARGV[3])
+local prune_period = tonumber(ARGV[4])
+local t = expiration
+
+if threshold > 0 and period > 0 then
+    local ts = tonumber(redis.call("TIME")[1])
+    local count = 0
+    for _, v in ipairs(redis.call("LRANGE", KEYS[2], 0, -1)) do
+        v = tonumber(v)
+        if v > ts - period then
+            count = count + 1
+        end
+        if v <= ts - prune_period then
+            redis.call("LREM", KEYS[2], 0, v)
+        end
+    end
+    redis.call("RPUSH", KEYS[2], ts)
+    redis.call("EXPIRE", KEYS[2], prune_period)
+    count = math.min(count, threshold - 1)
+
+    local r = math.exp(math.log(period / 10) / (threshold - 1))
+    t = math.floor(expiration * (r ^ count) + 0.5)
+end
+
+if t > 0 then
+    redis.call("SET", KEYS[1], 1, "EX", t)
+end
+return 0
+"""
+
+
+# Same as ``CHECK_AND_LIMIT_SCRIPT`` but tracks attempts in a sorted set scored
+# by timestamp, so the sliding window is counted and pruned by score in O(log n)
+# instead of walking the whole list.
+#
+# KEYS[1] = limit key, KEYS[2] = timestamps sorted set key
+# ARGV = expiration, threshold, period
+SLIDING_WINDOW_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return math.max(redis.call("TTL", KEYS[1]), 1)
+end
+
+local expiration = tonumber(ARGV[1])
+local threshold = tonumber(ARGV[2])
+local period = tonumber(ARGV[3])
+local t = expiration
+
+if threshold > 0 and period > 0 then
+    local now = redis.call("TIME")
+    local ts = tonumber(now[1])
+    redis.call("ZREMRANGEBYSCORE", KEYS[2], "-inf", ts - period)
+    local count = redis.call("ZCARD", KEYS[2])
+    redis.call("ZADD", KEYS[2], ts, now[1] .. "." .. now[2])
+    redis.call("EXPIRE", KEYS[2], period)
+    count = math.min(count, threshold - 1)
+
+    local r = math.exp(math.log(period / 10) / (threshold - 1))
+    t = math.floor(expiration * (r ^ count) + 0.5)
+end
+
+if t > 0 then
+    redis.call("SET", KEYS[1], 1, "EX", t)
+end
+return 0
+"""
+
+ENGINE_LIST = "list"
+ENGINE_ZSET = "zset"
+ENGINES = (ENGINE_LIST, ENGINE_ZSET)
+
+logger = logging.getLogger(__name__)
+
+
 class RateLimiterService(object):
     """Rate limiter service provides a service for querying whether
     the user given by a payload should be rate-limited.
@@ -71,6 +158,55 @@ class RateLimiterService(object):
         self.redis_conn.set(key, 1)
         self.redis_conn.expire(key, t)
 
+    def check_and_limit(
+        self, expiration=10, threshold=0, period=0, engine=ENGINE_LIST, **kwargs
+    ):
+        """Atomically checks whether the given :param:`kwargs` is rate limited
+        and sets the rate limit as per :meth:`limit_for` if it was not. Returns
+        the number of seconds left if rate limited, or ``0`` otherwise.
+
+        Unlike calling :meth:`is_limited`, :meth:`time_left` and :meth:`limit_for`
+        in sequence, this method performs a single round trip to Redis.
+
+        The :param:`engine` selects how attempts are tracked for the scaled
+        limit. ``"list"`` uses the same list as :meth:`limit_for` while
+        ``"zset"`` uses a sorted set sliding window that does not grow beyond
+        the attempts within :param:`period`. Both engines share the same
+        back-off series but track attempts separately.
+
+        :param expiration: A number of seconds to rate limited for.
+        :param threshold: A maximum attempt per :param:`period`.
+        :param period: A number of seconds to allow :param:`threshold: for.
+        :param engine: Either ``"list"`` or ``"zset"``. Unknown engines fall
+            back to ``"list"``.
+        :param kwargs: Payload to identify this rate limit.
+        """
+        if engine not in ENGINES:
+            logger.warning(
+                "Unknown rate limiter engine %r, falling back to %r.",
+                engine,
+                ENGINE_LIST,
+            )
+            engine = ENGINE_LIST
+
+        key = self._get_key(**kwargs)
+        if engine == ENGINE_ZSET:
+            script = self.redis_conn.register_script(SLIDING_WINDOW_SCRIPT)
+            return script(
+                keys=[key, self._get_key(**{**kwargs, "type": "zts"})],
+                args=[int(expiration), int(threshold or 0), int(period or 0)],
+            )
+        script = self.redis_conn.register_script(CHECK_AND_LIMIT_SCRIPT)
+        return script(
+            keys=[key, self._get_key(**{**kwargs, "type": "ts"})],
+            args=[
+                int(expiration),
+                int(threshold or 0),
+                int(period or 0),
+                self.SCALED_LIMIT_PRUNE_PERIOD,
+            ],
+        )
+
     def is_limited(self, **kwargs):
         """Returns :type:`True` if the given :param:`kwargs` is rate limited.
 
@@ -86,4 +222,4 @@ class RateLimiterService(object):
         :param kwargs: Payload to identify this rate limit
         """
         key = self._get_key(**kwargs)
-        return self.redis_conn.ttl(key)
+        return max(self.redis_conn.ttl(key), 0)
@@ -1,9 +1,14 @@
+import functools
 import re
 
+from collections import namedtuple
 from enum import Enum
 from lark import Lark, Transformer
 
 
+SCOPE_CACHE_SIZE = 1024
+
+
 class ScopeType(Enum):
     STRING = 1
     REGEXP = 2
@@ -52,6 +57,49 @@ SCOPE_PARSER = Lark(
 )
 
 
+class Scope(namedtuple("Scope", ("key", "kind", "value"))):
+    """An immutable predicate compiled from a scope string. :attr:`kind` is
+    :type:`None` for key-only scope, and :attr:`value` is a compiled pattern
+    for :attr:`ScopeType.REGEXP` scope.
+    """
+
+    __slots__ = ()
+
+    def matches(self, obj):
+        """Returns :type:`True` if the given :param:`obj` matches this scope.
+
+        :param obj: A :type:`dict` to evaluate for.
+        """
+        if self.key not in obj:
+            return False
+        if self.kind == ScopeType.REGEXP:
+            return bool(self.value.search(obj[self.key]))
+        elif self.kind == ScopeType.STRING:
+            return self.value == obj[self.key]
+        return True
+
+
+@functools.lru_cache(maxsize=SCOPE_CACHE_SIZE)
+def compile_scope(scope):
+    """Parse the given scope string into a :class:`Scope`, or :type:`None`
+    if the scope is empty. Results are memoized by the scope string.
+
+    :param scope: Scope to compile.
+    """
+    p_scope = SCOPE_PARSER.parse(scope)
+    if not p_scope:
+        return None
+
+    key, predicate = p_scope
+    if not predicate:
+        return Scope(key, None, None)
+
+    p_kind, p_value = predicate
+    if p_kind == ScopeType.REGEXP:
+        p_value = re.compile(p_value)
+    return Scope(key, p_kind, p_value)
+
+
 class ScopeService(object):
     """Scope service provides a service for evaluating a scope by the given serialized
     object data and a scope rules.
@@ -70,29 +118,15 @@ class ScopeService(object):
         :param scope: Scope to evaluate.
         :param obj: A :type:`dict` to evaluate for.
         """
+        c_scope = compile_scope(scope)
+        return c_scope is None or c_scope.matches(obj)
+
+    def evaluate_many(self, scopes, obj):
+        """Similar to :meth:`evaluate` but evaluates multiple scopes against
+        the same :param:`obj` and returns a :type:`list` of results in the
+        same order.
 
-        # Always return True if scope is not present i.e. unscoped.
-        p_scope = SCOPE_PARSER.parse(scope)
-        if not p_scope:
-            return True
-
-        key, predicate = p_scope
-        if key in obj:
-            # Returns True if scope key is present but not the value, e.g. "foo:"
-            # This is used for key-checking.
-            if not predicate:
-                return True
-
-            # Returns true if regexp matches, e.g. "foo:/bar/"
-            p_kind, p_value = predicate
-            if p_kind == ScopeType.REGEXP:
-                p_re = re.compile(p_value)
-                if p_re.search(obj[key]):
-                    return True
-
-            # Returns true if value matches, e.g. "foo:bar"
-            elif p_kind == ScopeType.STRING:
-                if p_value == obj[key]:
-                    return True
-
-        return False
+        :param scopes: An iterable of scopes to evaluate.
+        :param obj: A :type:`dict` to evaluate for.
+        """
+        return [self.evaluate(scope, obj) for scope in scopes]
@@ -1,4 +1,5 @@
 from ..models.setting import DEFAULT_SETTINGS, Setting
+from .filter_ import _bump_version as _bump_filter_version
 
 
 def _get_cache_key(key):
@@ -82,7 +83,8 @@ class SettingUpdateService(object):
     def update(self, key, value):
         """Update the given setting key with the given value. The value
         may be any data structure that are JSON-serializable. This method
-        will automatically invalidate cache for the given key.
+        will automatically invalidate cache for the given key, as well as
+        filter instances if the key is one of ``ext.filters.*`` keys.
 
         :param key: The setting key.
         :param value: The value to set.
@@ -93,4 +95,6 @@ class SettingUpdateService(object):
         setting.value = value
         self.dbsession.add(setting)
         self.cache_region.delete(_get_cache_key(key))
+        if key.startswith("ext.filters."):
+            _bump_filter_version(self.dbsession, self.cache_region)
         return setting
@@ -1,8 +1,9 @@
+import base64
 import datetime
 import ipaddress
 
 from sqlalchemy.orm import contains_eager, joinedload
-from sqlalchemy.sql import or_, and_, func, desc
+from sqlalchemy.sql import or_, and_, func, desc, tuple_
 
 from ..errors import StatusRejectedError
 from ..models import Board, Topic, TopicMeta, Post
@@ -10,16 +11,50 @@ from ..tasks import add_topic
 
 
 TOPIC_RECENT_DELTA = datetime.timedelta(days=7)
+TOPIC_PAGE_SIZE = 100
+
+
+def _encode_cursor(topic):
+    """Returns an opaque cursor :type:`str` pointing after the given topic
+    in topic listings.
+
+    :param topic: A :class:`fanboi2.models.Topic` object.
+    """
+    value = "%s,%s" % (topic.meta.bump_key.isoformat(), topic.id)
+    return base64.urlsafe_b64encode(value.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor):
+    """Returns a 2-tuple of bump time and topic ID from a cursor created by
+    :func:`_encode_cursor`. Raises :class:`ValueError` if the cursor is
+    malformed.
+
+    :param cursor: A cursor :type:`str`.
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    value = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+    bump_key, topic_id = value.split(",")
+    return datetime.datetime.fromisoformat(bump_key), int(topic_id)
 
 
 class TopicCreateService(object):
     """Topic create service provides a service for creating a topic."""
 
-    def __init__(self, dbsession, identity_svc, setting_query_svc, user_query_svc):
+    def __init__(
+        self,
+        dbsession,
+        identity_svc,
+        setting_query_svc,
+        user_query_svc,
+        recent_poster_svc=None,
+        prerender_fn=None,
+    ):
         self.dbsession = dbsession
         self.identity_svc = identity_svc
         self.setting_query_svc = setting_query_svc
         self.user_query_svc = user_query_svc
+        self.recent_poster_svc = recent_poster_svc
+        self.prerender_fn = prerender_fn
 
     def enqueue(self, board_slug, title, body, ip_address, payload):
         """Enqueues the topic creation to the posting queue. Topics that are
@@ -47,6 +82,18 @@ class TopicCreateService(object):
 
         return board
 
+    def _prerender(self, post, topic):
+        """Internal method rendering the body of the first post with
+        :attr:`prerender_fn`, if set. The topic is flushed first since the
+        rendered body refers to the topic ID.
+
+        :param post: A :class:`Post` that is not yet inserted.
+        :param topic: A :class:`Topic` the post will belong to.
+        """
+        if self.prerender_fn is not None:
+            self.dbsession.flush()
+            self.prerender_fn(post, topic)
+
     def create(self, board_slug, title, body, ip_address):
         """Creates a new topic and associate related metadata. Unlike
         ``enqueue``, this method performs the actual creation of the topic.
@@ -102,8 +149,6 @@ class TopicCreateService(object):
             )
 
         post = Post(
-            topic=topic,
-            number=topic_meta.post_count,
             body=body,
             bumped=True,
             name=board.settings["name"],
@@ -111,8 +156,14 @@ class TopicCreateService(object):
             ident_type=ident_type,
             ip_address=ip_address,
         )
+        self._prerender(post, topic)
+
+        post.topic = topic
+        post.number = topic_meta.post_count
 
         self.dbsession.add(post)
+        if self.recent_poster_svc is not None:
+            self.recent_poster_svc.mark_seen_on_commit(ip_address)
         return topic
 
     def create_with_user(self, board_slug, user_id, title, body, ip_address):
@@ -160,8 +211,6 @@ class TopicCreateService(object):
         name = user.name
 
         post = Post(
-            topic=topic,
-            number=topic_meta.post_count,
             body=body,
             bumped=True,
             name=name,
@@ -169,8 +218,14 @@ class TopicCreateService(object):
             ident_type=ident_type,
             ip_address=ip_address,
         )
+        self._prerender(post, topic)
+
+        post.topic = topic
+        post.number = topic_meta.post_count
 
         self.dbsession.add(post)
+        if self.recent_poster_svc is not None:
+            self.recent_poster_svc.mark_seen_on_commit(ip_address)
         return topic
 
 
@@ -209,7 +264,8 @@ class TopicQueryService(object):
         """
         return (
             self.dbsession.query(Topic)
-            .join(Topic.board, Topic.meta)
+            .join(Topic.meta)
+            .join(Board, TopicMeta.board_id == Board.id)
             .options(contains_eager(Topic.meta))
             .filter(
                 and_(
@@ -223,7 +279,7 @@ class TopicQueryService(object):
                     ),
                 )
             )
-            .order_by(desc(func.coalesce(TopicMeta.bumped_at, Topic.created_at)))
+            .order_by(desc(TopicMeta.bump_key), desc(TopicMeta.topic_id))
         )
 
     def list_from_board_slug(self, board_slug):
@@ -233,6 +289,32 @@ class TopicQueryService(object):
         """
         return list(self._list_q(board_slug))
 
+    def page_from_board_slug(self, board_slug, cursor=None, limit=None):
+        """Query a page of topics for the given board slug, starting after
+        the topic pointed by :param:`cursor`. Returns a 2-tuple of a list of
+        topics and a cursor for the next page, or :type:`None` if this is
+        the last page. Raises :class:`ValueError` if the cursor is invalid.
+
+        :param board_slug: The slug :type:`str` identifying a board.
+        :param cursor: A cursor :type:`str` returned from the previous page.
+        :param limit: Maximum number of topics :type:`int` in a page.
+        """
+        if limit is None:
+            limit = TOPIC_PAGE_SIZE
+
+        q = self._list_q(board_slug)
+        if cursor:
+            bump_key, topic_id = _decode_cursor(cursor)
+            q = q.filter(
+                tuple_(TopicMeta.bump_key, TopicMeta.topic_id) < (bump_key, topic_id)
+            )
+
+        topics = list(q.limit(limit + 1))
+        if len(topics) > limit:
+            topics = topics[:limit]
+            return topics, _encode_cursor(topics[-1])
+        return topics, None
+
     def list_recent_from_board_slug(self, board_slug, _limit=10):
         """Query recent topics for the given board slug.
 
@@ -280,7 +362,7 @@ class TopicQueryService(object):
                     )
                 )
             )
-            .order_by(desc(func.coalesce(TopicMeta.bumped_at, Topic.created_at)))
+            .order_by(desc(TopicMeta.bump_key), desc(TopicMeta.topic_id))
             .limit(_limit)
         )
 
@@ -23,6 +23,7 @@ ENV_SETTINGS_MAP = (
     ("CELERY_BROKER_URL", "celery.broker", NO_VALUE, None),
     ("DATABASE_URL", "sqlalchemy.url", NO_VALUE, None),
     ("GEOIP_PATH", "geoip.path", None, None),
+    ("IDENT_SECRET", "ident.secret", None, None),
     ("REDIS_URL", "redis.url", NO_VALUE, None),
     ("SERVER_DEV", "server.development", False, asbool),
     ("SERVER_SECURE", "server.secure", False, asbool),
@@ -1,6 +1,6 @@
 from ._base import celery
 from ._result_proxy import ResultProxy
-from .post import add_post
+from .post import add_post, add_posts, queue_post
 from .topic import add_topic, expire_topics
 from .board import dispatch_board_tasks
 
@@ -8,10 +8,12 @@ from .board import dispatch_board_tasks
 __all__ = [
     "ResultProxy",
     "add_post",
+    "add_posts",
     "add_topic",
     "expire_topics",
     "dispatch_board_tasks",
     "celery",
+    "queue_post",
 ]
 
 
@@ -21,6 +23,7 @@ def configure_celery(settings):  # pragma: no cover
         {
             "broker_url": settings["celery.broker"],
             "result_backend": settings["celery.broker"],
+            "result_expires": 3600,
         }
     )
 
@@ -1,16 +1,74 @@
+import contextlib
+import logging
+import time
+
 import transaction
-from celery import Celery, Task as BaseTask
+from celery import Celery, Task as BaseTask, states
 
 
 celery = Celery()
 
+logger = logging.getLogger(__name__)
+
+
+class TaskTimings(object):
+    """Records time spent in each phase of a task, e.g. preparing the
+    environment, running filters or committing the transaction.
+    """
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextlib.contextmanager
+    def measure(self, name):
+        """Measure the time spent within the block as the given phase.
+
+        :param name: A :type:`str` name of the phase.
+        """
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started_at
+            self.phases[name] = self.phases.get(name, 0) + elapsed
+
+    def total(self):
+        """Returns the total number of seconds of all phases."""
+        return sum(self.phases.values())
+
+    def __str__(self):
+        return " ".join(
+            "%s=%.1fms" % (name, elapsed * 1000)
+            for name, elapsed in self.phases.items()
+        )
+
 
 class ModelTask(BaseTask):  # pragma: no cover
     """Provides a base class that automatically commit a transaction when
     the task is success, or abort when the task is a failure or will be
-    retried.
+    retried. Time spent in each phase of the task is logged once the task
+    is finished.
     """
 
+    @property
+    def timings(self):
+        """Returns :class:`TaskTimings` of the task currently running."""
+        timings = getattr(self.request, "timings", None)
+        if timings is None:
+            timings = self.request.timings = TaskTimings()
+        return timings
+
+    def after_return(self, status, retval, task_id, args, kwargs, einfo):
+        """Task cleanup handler."""
+        logger.info(
+            "%s[%s] %s in %.1fms: %s",
+            self.name,
+            task_id,
+            status.lower(),
+            self.timings.total() * 1000,
+            self.timings,
+        )
+
     def on_failure(self, exc, task_id, args, kwargs, einfo):
         """Task failure handler."""
         transaction.abort()
@@ -21,4 +79,26 @@ class ModelTask(BaseTask):  # pragma: no cover
 
     def on_success(self, retval, task_id, args, kwargs):
         """Task success handler."""
-        transaction.commit()
+        with self.timings.measure("commit"):
+            transaction.commit()
+
+
+class BatchModelTask(ModelTask):
+    """Provides a base class for tasks that process items which were queued
+    with their own task ID. The task should return a list of ``(task_id,
+    result)`` which will be stored as the result of each item once the
+    transaction is committed. If the commit fails, every item is marked as
+    failed instead.
+    """
+
+    def on_success(self, retval, task_id, args, kwargs):
+        """Task success handler."""
+        try:
+            super(BatchModelTask, self).on_success(retval, task_id, args, kwargs)
+        except Exception as e:
+            transaction.abort()
+            for item_id, _result in retval:
+                self.backend.mark_as_failure(item_id, e)
+            raise
+        for item_id, result in retval:
+            self.backend.store_result(item_id, result, states.SUCCESS)
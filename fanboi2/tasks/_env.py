@@ -0,0 +1,160 @@
+import contextlib
+import os
+import threading
+import time
+
+import pyramid.scripting
+from pyramid.config import global_registries
+
+from ..interfaces import IFilterService, IScopeService, ISettingQueryService
+
+
+SETTING_MEMO_TTL = 5
+
+_worker_env = None
+_worker_env_pid = None
+
+
+class WorkerSettingQueryService(object):
+    """Setting query service that memoizes values in the worker process for
+    :data:`SETTING_MEMO_TTL` seconds in addition to the shared cache region,
+    so tasks do not need a cache round trip for every setting lookup. The
+    database session is resolved from the task currently running.
+    """
+
+    def __init__(self, worker_env, cache_region, ttl=SETTING_MEMO_TTL):
+        self.worker_env = worker_env
+        self.cache_region = cache_region
+        self.ttl = ttl
+        self._memo = {}
+
+    def _query_svc(self):
+        from ..services import SettingQueryService
+
+        dbsession = self.worker_env.request.find_service(name="db")
+        return SettingQueryService(dbsession, self.cache_region)
+
+    def list_all(self, **kwargs):
+        """Returns a 2-tuple of all settings.
+
+        See :meth:`SettingQueryService.list_all`.
+        """
+        return self._query_svc().list_all(**kwargs)
+
+    def value_from_key(self, key, use_cache=True, **kwargs):
+        """Returns a setting value similar to
+        :meth:`SettingQueryService.value_from_key` but memoized in the
+        worker process if ``use_cache`` is set.
+
+        :param key: The :type:`str` setting key.
+        :param use_cache: A :type:`bool` flag whether to load from cache.
+        """
+        if not use_cache:
+            return self._query_svc().value_from_key(key, use_cache=False, **kwargs)
+
+        now = time.monotonic()
+        expires_at, value = self._memo.get(key, (0, None))
+        if expires_at <= now:
+            value = self._query_svc().value_from_key(key, **kwargs)
+            self._memo[key] = (now + self.ttl, value)
+        return value
+
+    def reload_cache(self, key):
+        """Reload the cache of the given key.
+
+        :param key: The :type:`str` setting key.
+        """
+        self._memo.pop(key, None)
+        return self._query_svc().reload_cache(key)
+
+
+class WorkerEnv(object):
+    """Worker-scoped Pyramid environment for running tasks. Stateless
+    services are created once per worker process and registered into each
+    task request, so only the request, database session and transaction are
+    created per task.
+
+    :param registry: A :class:`pyramid.registry.Registry` object.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._local = threading.local()
+        self._services = None
+
+    @property
+    def request(self):
+        """The request of the task currently running in this thread."""
+        return getattr(self._local, "request", None)
+
+    def _service_query_fn(self, *args, **kwargs):
+        return self.request.find_service(*args, **kwargs)
+
+    def _make_services(self, request):
+        from ..services import FilterService, ScopeService
+
+        return {
+            IFilterService: FilterService(
+                self.registry["filters"], self._service_query_fn
+            ),
+            IScopeService: ScopeService(),
+            ISettingQueryService: WorkerSettingQueryService(
+                self, request.find_service(name="cache")
+            ),
+        }
+
+    @contextlib.contextmanager
+    def prepare(self):
+        """Prepare a new request for a task with worker-scoped services."""
+        with pyramid.scripting.prepare(registry=self.registry) as env:
+            request = env["request"]
+            if self._services is None:
+                self._services = self._make_services(request)
+            for iface, service in self._services.items():
+                request.services.register_singleton(service, iface)
+
+            self._local.request = request
+            try:
+                yield env
+            finally:
+                self._local.request = None
+
+
+def get_worker_env(registry):
+    """Returns a per-process :class:`WorkerEnv` for the given registry.
+
+    :param registry: A :class:`pyramid.registry.Registry` object.
+    """
+    global _worker_env, _worker_env_pid
+    if (
+        _worker_env is None
+        or _worker_env_pid != os.getpid()
+        or _worker_env.registry is not registry
+    ):
+        _worker_env = WorkerEnv(registry)
+        _worker_env_pid = os.getpid()
+    return _worker_env
+
+
+@contextlib.contextmanager
+def prepare_task(task, request=None, registry=None):
+    """Prepare a Pyramid environment for running the given task. If
+    :param:`request` is given, the environment is prepared from the request
+    as-is without worker-scoped services.
+
+    :param task: A :class:`ModelTask` object.
+    :param request: A :class:`pyramid.request.Request` object.
+    :param registry: A :class:`pyramid.registry.Registry` object.
+    """
+    with contextlib.ExitStack() as stack:
+        with task.timings.measure("prepare"):
+            if request is not None:
+                env = stack.enter_context(
+                    pyramid.scripting.prepare(request=request, registry=registry)
+                )
+            else:
+                if registry is None:
+                    registry = global_registries.last
+                worker_env = get_worker_env(registry)
+                env = stack.enter_context(worker_env.prepare())
+        yield env
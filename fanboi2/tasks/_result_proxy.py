@@ -2,12 +2,15 @@ from celery import states
 
 from ..errors import deserialize_error
 from ..models import deserialize_model
+from ._snapshot import SNAPSHOT_FIELDS, restore_model
 
 
 class ResultProxy(object):
     """A proxy class for :class:`celery.result.AsyncResult` that provide
     results serialization using :func:`fanboi2.errors.deserialize_error` and
-    :func:`fanboi2.models.deserialize_model`.
+    :func:`fanboi2.models.deserialize_model`. If the result contains
+    a snapshot of the object, the object is rebuilt from the snapshot
+    instead of being queried from the database.
 
     :param result: A result of :class:`celery.AsyncResult`.
     """
@@ -27,7 +30,9 @@ class ResultProxy(object):
             else:
                 dbsession = request.find_service(name="db")
                 class_ = deserialize_model(obj)
-                if class_ is not None:
+                if class_ is not None and args and class_ in SNAPSHOT_FIELDS:
+                    self._object = restore_model(dbsession, class_, args[0])
+                elif class_ is not None:
                     self._object = dbsession.query(class_).get(id_)
         return self._object
 
@@ -0,0 +1,86 @@
+import datetime
+
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.sql.sqltypes import DateTime
+
+from ..models import Post, Topic, TopicMeta
+
+
+SNAPSHOT_FIELDS = {
+    Post: (
+        "id",
+        "topic_id",
+        "body",
+        "bumped",
+        "created_at",
+        "ident",
+        "ident_type",
+        "name",
+        "number",
+        "version",
+        "body_formatted",
+        "body_formatted_version",
+    ),
+    Topic: ("id", "board_id", "title", "status", "created_at", "updated_at"),
+    TopicMeta: ("topic_id", "post_count", "posted_at", "bumped_at"),
+}
+
+SNAPSHOT_RELATIONS = {Topic: (("meta", TopicMeta),)}
+
+
+def _is_datetime(class_, field):
+    return isinstance(class_.__table__.columns[field].type, DateTime)
+
+
+def snapshot_model(obj):
+    """Returns a JSON serializable :type:`dict` of the given model object
+    containing fields that are required to serialize the object, so the
+    object could be rebuilt from task results with :func:`restore_model`
+    without querying the database.
+
+    :param obj: A :class:`Post` or :class:`Topic` object.
+    """
+    class_ = type(obj)
+    data = {}
+    for field in SNAPSHOT_FIELDS[class_]:
+        value = getattr(obj, field)
+        if value is not None and _is_datetime(class_, field):
+            value = value.isoformat()
+        data[field] = value
+    for name, _rel_class in SNAPSHOT_RELATIONS.get(class_, ()):
+        data[name] = snapshot_model(getattr(obj, name))
+    return data
+
+
+def _build_model(class_, data):
+    values = {}
+    for field in SNAPSHOT_FIELDS[class_]:
+        value = data.get(field)
+        if value is not None and _is_datetime(class_, field):
+            value = datetime.datetime.fromisoformat(value)
+        values[field] = value
+
+    obj = class_(**values)
+    for name, rel_class in SNAPSHOT_RELATIONS.get(class_, ()):
+        setattr(obj, name, _build_model(rel_class, data[name]))
+    return obj
+
+
+def _detach_model(obj):
+    # Rebuilt objects are treated as if they were loaded from the database,
+    # any field not in the snapshot will be loaded when accessed.
+    for name, _rel_class in SNAPSHOT_RELATIONS.get(type(obj), ()):
+        _detach_model(getattr(obj, name))
+    make_transient_to_detached(obj)
+    return obj
+
+
+def restore_model(dbsession, class_, data):
+    """Rebuild a model object from a snapshot made by :func:`snapshot_model`
+    and attach it to the given session without querying the database.
+
+    :param dbsession: A :class:`sqlalchemy.orm.Session` object.
+    :param class_: A model class of the snapshot.
+    :param data: A :type:`dict` snapshot.
+    """
+    return dbsession.merge(_detach_model(_build_model(class_, data)), load=False)
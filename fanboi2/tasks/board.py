@@ -1,8 +1,8 @@
-import pyramid.scripting
 from celery.schedules import crontab
 
 from ..interfaces import IBoardQueryService
 from ._base import celery, ModelTask
+from ._env import prepare_task
 from .topic import expire_topics
 
 
@@ -19,7 +19,7 @@ def _setup_board_periodic(sender, **kwargs):  # pragma: no cover
 @celery.task(base=ModelTask, bind=True)
 def dispatch_board_tasks(self, _request=None, _registry=None):
     """Dispatch periodic board tasks."""
-    with pyramid.scripting.prepare(request=_request, registry=_registry) as env:
+    with prepare_task(self, _request, _registry) as env:
         request = env["request"]
         board_query_svc = request.find_service(IBoardQueryService)
 
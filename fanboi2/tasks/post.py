@@ -1,8 +1,20 @@
-import pyramid.scripting
+import json
+
+import transaction
+from celery.utils import uuid
 
 from ..errors import StatusRejectedError
 from ..interfaces import IFilterService, IPostCreateService
-from ._base import celery, ModelTask
+from ._base import celery, BatchModelTask, ModelTask
+from ._env import prepare_task
+from ._snapshot import snapshot_model
+
+
+POST_BATCH_KEY = "tasks.post:batch:topic_id=%s"
+POST_BATCH_EXPIRY = 3600
+POST_BATCH_PROCESSING_KEY = "tasks.post:batch_processing:topic_id=%s:batch_id=%s"
+POST_BATCH_SCHEDULE_KEY = "tasks.post:batch_scheduled:topic_id=%s"
+POST_BATCH_SCHEDULE_EXPIRY = 30
 
 
 @celery.task(base=ModelTask, bind=True)
@@ -18,22 +30,175 @@ def add_post(
     :param ip_address: An IP address of the poster.
     :param payload: A request payload containing request metadata.
     """
-    with pyramid.scripting.prepare(request=_request, registry=_registry) as env:
+    with prepare_task(self, _request, _registry) as env:
         request = env["request"]
         dbsession = request.find_service(name="db")
 
-        filter_svc = request.find_service(IFilterService)
-        filter_result = filter_svc.evaluate(
-            payload={"body": body, "ip_address": ip_address, **payload}
-        )
+        with self.timings.measure("filter"):
+            filter_svc = request.find_service(IFilterService)
+            filter_result = filter_svc.evaluate(
+                payload={"body": body, "ip_address": ip_address, **payload}
+            )
         if filter_result.rejected_by:
             return "failure", "%s_rejected" % (filter_result.rejected_by,)
 
-        post_create_svc = request.find_service(IPostCreateService)
+        with self.timings.measure("create"):
+            post_create_svc = request.find_service(IPostCreateService)
+            try:
+                post = post_create_svc.create(topic_id, body, bumped, ip_address)
+            except StatusRejectedError as e:
+                return "failure", e.name, e.status
+            dbsession.flush()
+        return "post", post.id, snapshot_model(post)
+
+
+def queue_post(redis_conn, window, topic_id, body, bumped, ip_address, payload):
+    """Queue a post to be inserted by :func:`add_posts` together with other
+    posts to the same topic queued within :param:`window` seconds. Returns
+    an :class:`celery.result.AsyncResult` for the post, which will have the
+    same result as if the post was inserted by :func:`add_post`.
+
+    :param redis_conn: A :class:`redis.StrictRedis` object.
+    :param window: Number of seconds to wait for more posts.
+    :param topic_id: The ID of a topic to add a post to.
+    :param body: Content of the post as submitted by the user.
+    :param bumped: A :type:`bool` whether to bump the topic.
+    :param ip_address: An IP address of the poster.
+    :param payload: A request payload containing request metadata.
+    """
+    task_id = uuid()
+    key = POST_BATCH_KEY % (topic_id,)
+    schedule_key = POST_BATCH_SCHEDULE_KEY % (topic_id,)
+    item = {
+        "task_id": task_id,
+        "body": body,
+        "bumped": bumped,
+        "ip_address": ip_address,
+        "payload": payload,
+    }
+
+    pipe = redis_conn.pipeline()
+    pipe.rpush(key, json.dumps(item))
+    pipe.expire(key, POST_BATCH_EXPIRY)
+    pipe.set(
+        schedule_key,
+        task_id,
+        nx=True,
+        px=int((window + POST_BATCH_SCHEDULE_EXPIRY) * 1000),
+    )
+    _, _, scheduled = pipe.execute()
+
+    # Only the post that sets the schedule marker schedules the batch. The
+    # marker is cleared when the batch is drained or after it expires, so a
+    # batch that failed to be scheduled or was lost does not prevent the
+    # next post from scheduling another one.
+    if scheduled:
         try:
-            post = post_create_svc.create(topic_id, body, bumped, ip_address)
-        except StatusRejectedError as e:
-            return "failure", e.name, e.status
+            add_posts.apply_async((topic_id,), countdown=window)
+        except Exception:
+            redis_conn.delete(schedule_key)
+            raise
+    return add_post.AsyncResult(task_id)
+
+
+def _drain_posts(redis_conn, topic_id, batch_id):
+    """Atomically move all queued posts for the given topic into the
+    processing list of the given batch and clear its schedule marker, so
+    posts queued afterward schedule a new batch. If the processing list
+    already exists, e.g. the batch is redelivered after its worker was lost
+    before committing, its posts are returned instead.
+
+    The processing list is kept until the batch transaction is committed or
+    failed, see :func:`add_posts`.
+    """
+    processing_key = POST_BATCH_PROCESSING_KEY % (topic_id, batch_id)
+    items = redis_conn.lrange(processing_key, 0, -1)
+    if not items:
+        key = POST_BATCH_KEY % (topic_id,)
+        pipe = redis_conn.pipeline()
+        pipe.lrange(key, 0, -1)
+        pipe.rename(key, processing_key)
+        pipe.delete(POST_BATCH_SCHEDULE_KEY % (topic_id,))
+
+        # Renaming fails if there is no queued post, which is fine.
+        items, _, _ = pipe.execute(raise_on_error=False)
+    return [json.loads(item) for item in items]
+
+
+@celery.task(base=BatchModelTask, bind=True, acks_late=True, reject_on_worker_lost=True)
+def add_posts(self, topic_id, _request=None, _registry=None):
+    """Insert all posts queued by :func:`queue_post` to a topic in a single
+    transaction. Returns a list of ``(task_id, result)`` for each post, with
+    the same result as :func:`add_post`.
+
+    Queued posts are kept in a processing list until the transaction is
+    committed or failed. The task is acknowledged late, so if the worker is
+    lost before that the task is redelivered and processes the same posts.
+
+    :param self: A :class:`celery.Task` object.
+    :param topic_id: The ID of a topic to add posts to.
+    """
+    with prepare_task(self, _request, _registry) as env:
+        request = env["request"]
+        dbsession = request.find_service(name="db")
+        redis_conn = request.find_service(name="redis")
+
+        batch_id = self.request.id or uuid()
+        processing_key = POST_BATCH_PROCESSING_KEY % (topic_id, batch_id)
+        items = _drain_posts(redis_conn, topic_id, batch_id)
+
+        # Results are stored or marked as failed by BatchModelTask whether
+        # the commit succeeds or not, so the posts are no longer needed.
+        def _release_posts(_status):
+            redis_conn.delete(processing_key)
+
+        transaction.get().addAfterCommitHook(_release_posts)
+        try:
+            results = {}
+            accepted = []
+
+            with self.timings.measure("filter"):
+                filter_svc = request.find_service(IFilterService)
+                filter_results = filter_svc.evaluate_many(
+                    [
+                        {
+                            "body": item["body"],
+                            "ip_address": item["ip_address"],
+                            **item["payload"],
+                        }
+                        for item in items
+                    ]
+                )
+                for item, filter_result in zip(items, filter_results):
+                    if filter_result.rejected_by:
+                        results[item["task_id"]] = (
+                            "failure",
+                            "%s_rejected" % (filter_result.rejected_by,),
+                        )
+                    else:
+                        accepted.append(item)
+
+            if accepted:
+                with self.timings.measure("create"):
+                    post_create_svc = request.find_service(IPostCreateService)
+                    posts = post_create_svc.create_many(
+                        topic_id,
+                        [(i["body"], i["bumped"], i["ip_address"]) for i in accepted],
+                    )
+                    dbsession.flush()
+                for item, post in zip(accepted, posts):
+                    if isinstance(post, StatusRejectedError):
+                        results[item["task_id"]] = ("failure", post.name, post.status)
+                    else:
+                        results[item["task_id"]] = (
+                            "post",
+                            post.id,
+                            snapshot_model(post),
+                        )
+        except Exception as e:  # pragma: no cover
+            for item in items:
+                self.backend.mark_as_failure(item["task_id"], e)
+            redis_conn.delete(processing_key)
+            raise
 
-        dbsession.flush()
-        return "post", post.id
+        return [(item["task_id"], results[item["task_id"]]) for item in items]
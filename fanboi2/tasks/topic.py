@@ -1,8 +1,8 @@
-import pyramid.scripting
-
 from ..errors import StatusRejectedError
 from ..interfaces import IFilterService, ITopicCreateService, ITopicQueryService
 from ._base import celery, ModelTask
+from ._env import prepare_task
+from ._snapshot import snapshot_model
 
 
 @celery.task(base=ModelTask, bind=True)
@@ -17,25 +17,26 @@ def add_topic(
     :param ip_address: An IP address of the topic creator.
     :param payload: A request payload containing request metadata.
     """
-    with pyramid.scripting.prepare(request=_request, registry=_registry) as env:
+    with prepare_task(self, _request, _registry) as env:
         request = env["request"]
         dbsession = request.find_service(name="db")
 
-        filter_svc = request.find_service(IFilterService)
-        filter_result = filter_svc.evaluate(
-            payload={"body": body, "ip_address": ip_address, **payload}
-        )
+        with self.timings.measure("filter"):
+            filter_svc = request.find_service(IFilterService)
+            filter_result = filter_svc.evaluate(
+                payload={"body": body, "ip_address": ip_address, **payload}
+            )
         if filter_result.rejected_by:
             return "failure", "%s_rejected" % (filter_result.rejected_by,)
 
-        topic_create_svc = request.find_service(ITopicCreateService)
-        try:
-            topic = topic_create_svc.create(board_slug, title, body, ip_address)
-        except StatusRejectedError as e:
-            return "failure", e.name, e.status
-
-        dbsession.flush()
-        return "topic", topic.id
+        with self.timings.measure("create"):
+            topic_create_svc = request.find_service(ITopicCreateService)
+            try:
+                topic = topic_create_svc.create(board_slug, title, body, ip_address)
+            except StatusRejectedError as e:
+                return "failure", e.name, e.status
+            dbsession.flush()
+        return "topic", topic.id, snapshot_model(topic)
 
 
 @celery.task(base=ModelTask, bind=True)
@@ -44,7 +45,7 @@ def expire_topics(self, board_slug, _request=None, _registry=None):
 
     :param board_slug: The slug :type:`str` identifying a board.
     """
-    with pyramid.scripting.prepare(request=_request, registry=_registry) as env:
+    with prepare_task(self, _request, _registry) as env:
         request = env["request"]
         dbsession = request.find_service(name="db")
         topic_query_svc = request.find_service(ITopicQueryService)
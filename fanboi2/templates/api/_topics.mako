@@ -46,7 +46,7 @@
             <h2 class="api-request-title">Retrieving topics associated to a board <span class="api-request-name">#api-board-topics</span></h2>
             <div class="api-request-endpoint"><span class="api-request-verb verb-get">GET</span> ${formatters.unquoted_path(request, 'api_board_topics', board='{api-board.slug}')}</div>
             <div class="api-request-body">
-                <p>Use this endpoint to retrieve a list of topics associated to the specific board. By default this API will return the same data as board's "All topics" page which includes open topic and topic that are closed (locked and archived) within 1 week of last posted date. It is also possible to include recent posts with <em>query string</em> but doing so with this API is not recommended.</p>
+                <p>Use this endpoint to retrieve a list of topics associated to the specific board. By default this API will return the same data as board's "All topics" page which includes open topic and topic that are closed (locked and archived) within 1 week of last posted date. Topics are returned in pages of 100 topics. If there are more topics, the response will include a <code>Link</code> header with <code>rel="next"</code> pointing to the next page. It is also possible to include recent posts with <em>query string</em> but doing so with this API is not recommended.</p>
                 <table class="api-table">
                     <thead class="api-table-header">
                         <tr class="api-table-row">
@@ -63,6 +63,10 @@
                             <th class="api-table-item title">?posts=1</th>
                             <td class="api-table-item">Include the recent 30 posts in a <code>posts</code> object.</td>
                         </tr>
+                        <tr class="api-table-row">
+                            <th class="api-table-item title">?cursor={cursor}</th>
+                            <td class="api-table-item">Retrieve the page of topics after the given cursor, as given in the <code>Link</code> header of the previous page.</td>
+                        </tr>
                     </tbody>
                 </table>
             </div>
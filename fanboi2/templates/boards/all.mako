@@ -15,3 +15,10 @@
         </div>
     </div>
 % endfor
+% if next_cursor:
+    <div class="cascade">
+        <div class="container">
+            <a class="button action" href="${request.route_path('board_all', board=board.slug, _query={'cursor': next_cursor})}">Older topics</a>
+        </div>
+    </div>
+% endif
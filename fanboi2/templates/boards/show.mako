@@ -13,7 +13,7 @@
             </div>
         </div>
         <div class="topic-body">
-            % for p in topic.recent_posts(5):
+            % for p in recent_posts[topic.id]:
                 ${post.render_post(topic, p, shorten=500)}
             % endfor
         </div>
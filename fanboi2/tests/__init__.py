@@ -175,6 +175,36 @@ class ModelSessionMixin(ModelTransactionEngineMixin, object):
         return model_obj
 
 
+class ModelCommittedSessionMixin(object):
+    """Provides sessions on separate connections that commit for real, for
+    testing behaviors that depend on what other sessions could see. Only
+    tables listed in ``tables`` are created and they are dropped afterward.
+    """
+
+    tables = ()
+
+    def setUp(self):
+        super(ModelCommittedSessionMixin, self).setUp()
+        from ..models import Base
+
+        self._tables = [Base.metadata.tables[name] for name in self.tables]
+        Base.metadata.create_all(engine, tables=self._tables)
+        self._dbsessions = []
+
+    def tearDown(self):
+        super(ModelCommittedSessionMixin, self).tearDown()
+        from ..models import Base
+
+        for dbsession in self._dbsessions:
+            dbsession.close()
+        Base.metadata.drop_all(engine, tables=self._tables)
+
+    def _make_session(self):
+        dbsession = dbmaker(bind=engine)
+        self._dbsessions.append(dbsession)
+        return dbsession
+
+
 class IntegrationMixin(ModelSessionMixin, object):
     def setUp(self):
         super(IntegrationMixin, self).setUp()
@@ -0,0 +1,167 @@
+"""Reference implementation of the post formatter as it was before the
+tokenizing formatter, used for compatibility tests and benchmarks. Output
+of :func:`fanboi2.helpers.formatters.format_text` and ``format_post`` must
+stay identical to these functions.
+"""
+
+import html
+import re
+import urllib.parse as urlparse
+
+from markupsafe import Markup
+
+from ..helpers.formatters import (
+    RE_ANCHOR,
+    RE_ANCHOR_CROSS,
+    TP_ANCHOR,
+    TP_ANCHOR_CROSS,
+    TP_LINK,
+    TP_PARAGRAPH,
+    TP_SHORTENED,
+    TP_THUMB,
+    TP_THUMB_PARAGRAPH,
+    PostMarkup,
+    extract_thumbnail,
+    url_fix,
+)
+
+RE_PARAGRAPH = re.compile(r"(?:(?P<newline>\r\n|\n|\r)(?P=newline)+)")
+RE_LINK = re.compile(
+    r"""
+ (                     # Group start
+   (http|ftp|https)    # Protocols
+ \:\/\/                # Separator
+   ([a-zA-Z0-9\-]+)    # Sub-domain
+ \.                    # Dot
+   ([a-zA-Z0-9.\-]+)   # Domain, or TLD
+ \/                    # Slash
+   ?([^\s<*]+)         # Link, all characters except space and end tag
+ )
+""",
+    re.VERBOSE,
+)
+
+
+def format_text(text, shorten=None):
+    """Format lines of text into HTML. Split into paragraphs at two or more
+    consecutive newlines and adds `<br>` to any line with line break. If
+    `shorten` is given, then the post will be shortened to the first
+    paragraph that exceed the given value.
+
+    :param text: A :type:`str` containing post text.
+    :param shorten: An :type:`int` that specifies approximate length of text
+                    to be displayed. The full post will be shown if
+                    :type:`None` is given.
+    """
+    output = []
+    thumbs = []
+    length = 0
+    shortened = False
+
+    # Auto-link
+    def _replace_link(match):
+        link = html.unescape(urlparse.unquote(match.group(0)))
+        return Markup(TP_LINK % (url_fix(link), html.escape(link)))
+
+    # Turns text into paragraph.
+    text = "\n".join((t.strip() for t in text.splitlines()))  # Cleanup
+    for paragraph in RE_PARAGRAPH.split(text):
+        paragraph = paragraph.strip()
+        if paragraph:
+            lines = []
+            for line in paragraph.splitlines():
+                if shorten and length >= shorten:
+                    shortened = True
+                    break
+                lines.append(html.escape(line))
+                length += len(line)
+            paragraph = TP_PARAGRAPH % "<br>".join(lines)
+            paragraph = RE_LINK.sub(_replace_link, paragraph)
+            output.append(paragraph)
+            if shortened:
+                break
+
+    # Display thumbnail at the end of post.
+    thumbnails = extract_thumbnail(text)
+    if thumbnails:
+        for thumbnail, link in extract_thumbnail(text):
+            thumbs.append(TP_THUMB % (link, thumbnail))
+        output.append(TP_THUMB_PARAGRAPH % "".join(thumbs))
+
+    markup = PostMarkup("\n".join(output))
+    markup.length = length
+    markup.shortened = shortened
+    return markup
+
+
+def format_post(request, post, shorten=None, topic=None):
+    """Render the given post into HTML without caching. See
+    :func:`fanboi2.helpers.formatters.format_post`.
+    """
+    if topic is None:
+        topic = post.topic
+    text = format_text(post.body, shorten)
+
+    # Append click to see more link if post is shortened.
+    try:
+        if text.shortened:
+            text += Markup(
+                "\n"
+                + TP_SHORTENED
+                % (
+                    request.route_path(
+                        "topic_scoped",
+                        board=topic.board.slug,
+                        topic=topic.id,
+                        query="%s-" % post.number,
+                    )
+                )
+            )
+    except AttributeError:  # pragma: no cover
+        pass
+
+    # Convert cross anchor (>>>/demo/123/1-10) into link.
+    def _anchor_cross(match):
+        board = match.groups()[0]
+        topic = match.groups()[1] if match.groups()[1] else ""
+        anchor = "".join([m for m in match.groups()[2:-1] if m is not None])
+        trail = match.groups()[-1]
+
+        if board and topic:
+            args = {"board": board, "topic": topic, "query": anchor}
+            args["query"] = anchor if anchor else "recent"
+            path = request.route_path("topic_scoped", **args)
+        else:
+            path = request.route_path("board", board=board)
+
+        text = []
+        for part in (board, topic, anchor):
+            if part:
+                text.append(part)
+        text = html.escape(">>>/%s" % "/".join(text))
+        text += str(trail) if trail else ""
+        return Markup(TP_ANCHOR_CROSS % (board, topic, anchor, path, text))
+
+    text = RE_ANCHOR_CROSS.sub(_anchor_cross, text)
+
+    # Convert post anchor (>>123) into link.
+    def _anchor(match):
+        anchor = "".join([m for m in match.groups() if m is not None])
+        return Markup(
+            TP_ANCHOR
+            % (
+                topic.id,
+                anchor,
+                request.route_path(
+                    "topic_scoped",
+                    board=topic.board.slug,
+                    topic=topic.id,
+                    query=anchor,
+                ),
+                html.escape(">>%s" % anchor),
+            )
+        )
+
+    text = RE_ANCHOR.sub(_anchor, text)
+
+    return Markup(text)
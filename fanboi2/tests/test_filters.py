@@ -21,7 +21,7 @@ class TestAkismet(unittest.TestCase):
         akismet = self._make_one(key=None)
         self.assertEqual(akismet.key, None)
 
-    @unittest.mock.patch("requests.post")
+    @unittest.mock.patch("requests.Session.post")
     def test_should_reject(self, api_call):
         api_call.return_value = self._make_response(b"true")
         akismet = self._make_one()
@@ -49,7 +49,7 @@ class TestAkismet(unittest.TestCase):
             },
         )
 
-    @unittest.mock.patch("requests.post")
+    @unittest.mock.patch("requests.Session.post")
     def test_should_reject_false(self, api_call):
         api_call.return_value = self._make_response(b"false")
         akismet = self._make_one()
@@ -71,7 +71,7 @@ class TestAkismet(unittest.TestCase):
             timeout=unittest.mock.ANY,
         )
 
-    @unittest.mock.patch("requests.post")
+    @unittest.mock.patch("requests.Session.post")
     def test_should_reject_timeout(self, api_call):
         import requests
 
@@ -89,7 +89,7 @@ class TestAkismet(unittest.TestCase):
             )
         )
 
-    @unittest.mock.patch("requests.post")
+    @unittest.mock.patch("requests.Session.post")
     def test_should_reject_no_key(self, api_call):
         akismet = self._make_one(key=None)
         self.assertFalse(
@@ -109,6 +109,129 @@ class TestAkismet(unittest.TestCase):
         akismet = self._make_one()
         self.assertFalse(akismet.should_reject({}))
 
+    def test_init_settings(self):
+        from ..filters.akismet import Akismet
+
+        akismet = Akismet({"key": "hogehoge", "url": "http://127.0.0.1/1.1/"}, {})
+        self.assertEqual(akismet.key, "hogehoge")
+        self.assertEqual(akismet.url, "http://127.0.0.1/1.1/")
+
+    @unittest.mock.patch("requests.Session.post")
+    def test_should_reject_url(self, api_call):
+        from ..filters.akismet import Akismet
+
+        api_call.return_value = self._make_response(b"false")
+        akismet = Akismet({"key": "hogehoge", "url": "http://127.0.0.1/{key}/"}, {})
+        self.assertFalse(
+            akismet.should_reject(
+                {
+                    "body": "Hamhamham",
+                    "application_url": "https://www.example.com/",
+                    "ip_address": "127.0.0.1",
+                    "user_agent": "cURL",
+                    "referrer": "https://www.example.com/",
+                }
+            )
+        )
+        api_call.assert_called_with(
+            "http://127.0.0.1/hogehoge/comment-check",
+            headers=unittest.mock.ANY,
+            data=unittest.mock.ANY,
+            timeout=unittest.mock.ANY,
+        )
+
+    @unittest.mock.patch("requests.Session.post")
+    def test_should_reject_cached(self, api_call):
+        from . import make_cache_region
+        from ..filters.akismet import Akismet
+
+        api_call.return_value = self._make_response(b"true")
+        akismet = Akismet("hogehoge", {"cache": make_cache_region({})})
+        payload = {
+            "body": "buy viagra",
+            "application_url": "https://www.example.com/",
+            "ip_address": "127.0.0.1",
+            "user_agent": "cURL",
+            "referrer": "https://www.example.com/",
+        }
+        self.assertTrue(akismet.should_reject(payload))
+        self.assertTrue(akismet.should_reject(payload))
+        self.assertEqual(api_call.call_count, 1)
+        self.assertTrue(akismet.should_reject({**payload, "ip_address": "127.0.0.2"}))
+        self.assertTrue(akismet.should_reject({**payload, "body": "buy cialis"}))
+        self.assertEqual(api_call.call_count, 3)
+
+    @unittest.mock.patch("requests.Session.post")
+    def test_should_reject_timeout_not_cached(self, api_call):
+        import requests
+        from . import make_cache_region
+        from ..filters.akismet import Akismet
+
+        api_call.side_effect = requests.Timeout("connection timed out")
+        akismet = Akismet("hogehoge", {"cache": make_cache_region({})})
+        payload = {
+            "body": "Hamhamham",
+            "application_url": "https://www.example.com/",
+            "ip_address": "127.0.0.1",
+            "user_agent": "cURL",
+            "referrer": "https://www.example.com/",
+        }
+        self.assertFalse(akismet.should_reject(payload))
+        self.assertFalse(akismet.should_reject(payload))
+        self.assertEqual(api_call.call_count, 2)
+
+    def test_should_reject_stub_server(self):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import parse_qs
+        from ..filters.akismet import Akismet
+
+        requests_ = []
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers["Content-Length"])
+                data = parse_qs(self.rfile.read(length).decode("utf-8"))
+                requests_.append((self.path, self.client_address, data))
+                body = b"true" if "viagra" in data["comment_content"][0] else b"false"
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            akismet = Akismet(
+                {
+                    "key": "hogehoge",
+                    "url": "http://127.0.0.1:%s/{key}/" % (server.server_port,),
+                },
+                {},
+            )
+            payload = {
+                "body": "buy viagra",
+                "application_url": "https://www.example.com/",
+                "ip_address": "127.0.0.1",
+                "user_agent": "cURL",
+                "referrer": "https://www.example.com/",
+            }
+            self.assertTrue(akismet.should_reject(payload))
+            self.assertFalse(akismet.should_reject({**payload, "body": "Hamhamham"}))
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(requests_[0][0], "/hogehoge/comment-check")
+        self.assertEqual(requests_[0][2]["user_ip"], ["127.0.0.1"])
+        self.assertEqual(requests_[0][1], requests_[1][1])
+
 
 class TestDNSBL(unittest.TestCase):
     def _make_one(self, providers=("xbl.spamhaus.org",)):
@@ -166,6 +289,193 @@ class TestDNSBL(unittest.TestCase):
         dnsbl = self._make_one([])
         self.assertFalse(dnsbl.should_reject({"ip_address": "127.0.0.1"}))
 
+    def test_should_reject_resolver(self):
+        from ..filters.dnsbl import DNSBL
+
+        queries = []
+
+        def _resolver(hostname):
+            queries.append(hostname)
+            if hostname.endswith("xbl.spamhaus.org."):
+                return "127.0.0.2"
+            return "192.168.1.1"
+
+        dnsbl = DNSBL(
+            ("xbl.spamhaus.org", "proxies.dnsbl.sorbs.net"), {}, resolver=_resolver
+        )
+        self.assertTrue(dnsbl.should_reject({"ip_address": "10.0.100.254"}))
+        self.assertIn("254.100.0.10.xbl.spamhaus.org.", queries)
+
+    def test_should_reject_parallel(self):
+        import threading
+        from ..filters.dnsbl import DNSBL
+
+        barrier = threading.Barrier(2, timeout=2)
+
+        def _resolver(hostname):
+            barrier.wait()
+            return "192.168.1.1"
+
+        dnsbl = DNSBL(
+            ("xbl.spamhaus.org", "proxies.dnsbl.sorbs.net"), {}, resolver=_resolver
+        )
+        self.assertFalse(dnsbl.should_reject({"ip_address": "10.0.100.254"}))
+        self.assertFalse(barrier.broken)
+
+    def test_should_reject_cached(self):
+        import socket
+        from . import make_cache_region
+        from ..filters.dnsbl import DNSBL
+
+        queries = []
+
+        def _resolver(hostname):
+            queries.append(hostname)
+            if hostname == "254.100.0.10.xbl.spamhaus.org.":
+                return "127.0.0.2"
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+        cache_region = make_cache_region({})
+        dnsbl = DNSBL(
+            ("proxies.dnsbl.sorbs.net", "xbl.spamhaus.org"),
+            {"cache": cache_region},
+            resolver=_resolver,
+        )
+        self.assertTrue(dnsbl.should_reject({"ip_address": "10.0.100.254"}))
+        self.assertFalse(dnsbl.should_reject({"ip_address": "10.0.100.1"}))
+        self.assertIn("1.100.0.10.xbl.spamhaus.org.", queries)
+        self.assertIn("1.100.0.10.proxies.dnsbl.sorbs.net.", queries)
+        queries_count = len(queries)
+        self.assertTrue(dnsbl.should_reject({"ip_address": "10.0.100.254"}))
+        self.assertFalse(dnsbl.should_reject({"ip_address": "10.0.100.1"}))
+        self.assertEqual(len(queries), queries_count)
+
+    @unittest.mock.patch("fanboi2.filters.dnsbl.time.time")
+    def test_should_reject_cached_expired(self, time_call):
+        import socket
+        from . import make_cache_region
+        from ..filters.dnsbl import DNSBL
+
+        queries = []
+
+        def _resolver(hostname):
+            queries.append(hostname)
+            if hostname.startswith("1."):
+                raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+            return "127.0.0.2"
+
+        time_call.return_value = 1000
+        cache_region = make_cache_region({})
+        dnsbl = DNSBL(("xbl.spamhaus.org",), {"cache": cache_region}, _resolver)
+        self.assertFalse(dnsbl.should_reject({"ip_address": "10.0.100.1"}))
+        self.assertTrue(dnsbl.should_reject({"ip_address": "10.0.100.2"}))
+        self.assertEqual(len(queries), 2)
+        time_call.return_value = 1000 + dnsbl.negative_ttl
+        self.assertFalse(dnsbl.should_reject({"ip_address": "10.0.100.1"}))
+        self.assertTrue(dnsbl.should_reject({"ip_address": "10.0.100.2"}))
+        self.assertEqual(len(queries), 3)
+        time_call.return_value = 1000 + dnsbl.positive_ttl
+        self.assertTrue(dnsbl.should_reject({"ip_address": "10.0.100.2"}))
+        self.assertEqual(len(queries), 4)
+
+    def test_should_reject_not_cached_error(self):
+        import socket
+        from . import make_cache_region
+        from ..filters.dnsbl import DNSBL
+
+        queries = []
+
+        def _resolver(hostname):
+            queries.append(hostname)
+            raise socket.gaierror(socket.EAI_AGAIN, "Temporary failure")
+
+        cache_region = make_cache_region({})
+        dnsbl = DNSBL(("xbl.spamhaus.org",), {"cache": cache_region}, _resolver)
+        self.assertFalse(dnsbl.should_reject({"ip_address": "10.0.100.1"}))
+        self.assertFalse(dnsbl.should_reject({"ip_address": "10.0.100.1"}))
+        self.assertEqual(len(queries), 2)
+
+
+class TestUDPResolver(unittest.TestCase):
+    def setUp(self):
+        import socket
+        import struct
+        import threading
+
+        self.records = {}
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+
+        def _serve():
+            while True:
+                try:
+                    data, addr = self.sock.recvfrom(512)
+                except OSError:
+                    return
+                offset, labels = 12, []
+                while data[offset]:
+                    labels.append(data[offset + 1 : offset + 1 + data[offset]])
+                    offset += data[offset] + 1
+                question = data[12 : offset + 5]
+                answer = self.records.get(b".".join(labels).decode("ascii"))
+                if answer is None:
+                    header = data[:2] + struct.pack("!HHHHH", 0x8183, 1, 0, 0, 0)
+                    self.sock.sendto(header + question, addr)
+                    continue
+                header = data[:2] + struct.pack("!HHHHH", 0x8180, 1, 1, 0, 0)
+                record = b"\xc0\x0c" + struct.pack("!HHIH", 1, 1, 60, 4)
+                record += socket.inet_aton(answer)
+                self.sock.sendto(header + question + record, addr)
+
+        self.thread = threading.Thread(target=_serve, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.sock.close()
+
+    def _make_one(self):
+        from ..filters.dnsbl import UDPResolver
+
+        return UDPResolver("127.0.0.1", self.sock.getsockname()[1], timeout=2)
+
+    def test_resolve(self):
+        self.records["2.0.0.127.xbl.spamhaus.org"] = "127.0.0.4"
+        resolver = self._make_one()
+        self.assertEqual(resolver("2.0.0.127.xbl.spamhaus.org."), "127.0.0.4")
+
+    def test_resolve_nxdomain(self):
+        import socket
+
+        resolver = self._make_one()
+        with self.assertRaises(socket.gaierror) as cm:
+            resolver("1.0.0.127.xbl.spamhaus.org.")
+        self.assertEqual(cm.exception.errno, socket.EAI_NONAME)
+
+    def test_resolve_timeout(self):
+        import socket
+        from ..filters.dnsbl import UDPResolver
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        resolver = UDPResolver("127.0.0.1", sock.getsockname()[1], timeout=0.1)
+        try:
+            with self.assertRaises(socket.gaierror) as cm:
+                resolver("1.0.0.127.xbl.spamhaus.org.")
+            self.assertEqual(cm.exception.errno, socket.EAI_AGAIN)
+        finally:
+            sock.close()
+
+    def test_dnsbl(self):
+        from . import make_cache_region
+        from ..filters.dnsbl import DNSBL
+
+        self.records["2.0.0.127.xbl.spamhaus.org"] = "127.0.0.2"
+        dnsbl = DNSBL(
+            ("xbl.spamhaus.org",), {"cache": make_cache_region({})}, self._make_one()
+        )
+        self.assertTrue(dnsbl.should_reject({"ip_address": "127.0.0.2"}))
+        self.assertFalse(dnsbl.should_reject({"ip_address": "127.0.0.1"}))
+
 
 class TestGetIPIntelProxyDetector(unittest.TestCase):
     def _make_one(self, settings):
@@ -195,7 +505,7 @@ class TestGetIPIntelProxyDetector(unittest.TestCase):
         self.assertEqual(getipintel.email, "foo@example.com")
         self.assertEqual(getipintel.flags, None)
 
-    @unittest.mock.patch("requests.get")
+    @unittest.mock.patch("requests.Session.get")
     def test_check(self, api_call):
         api_call.return_value = self._make_response(200, b"1")
         getipintel = self._make_one(
@@ -209,7 +519,7 @@ class TestGetIPIntelProxyDetector(unittest.TestCase):
             params={"ip": "8.8.8.8", "contact": "foo@example.com", "flags": "m"},
         )
 
-    @unittest.mock.patch("requests.get")
+    @unittest.mock.patch("requests.Session.get")
     def test_check_no_flags(self, api_call):
         api_call.return_value = self._make_response(200, b"1")
         getipintel = self._make_one(
@@ -223,7 +533,7 @@ class TestGetIPIntelProxyDetector(unittest.TestCase):
             params={"ip": "8.8.8.8", "contact": "foo@example.com"},
         )
 
-    @unittest.mock.patch("requests.get")
+    @unittest.mock.patch("requests.Session.get")
     def test_check_timeout(self, api_call):
         import requests
 
@@ -231,13 +541,13 @@ class TestGetIPIntelProxyDetector(unittest.TestCase):
         getipintel = self._make_one({"email": "foo@example.com"})
         self.assertIsNone(getipintel.check("8.8.8.8"))
 
-    @unittest.mock.patch("requests.get")
+    @unittest.mock.patch("requests.Session.get")
     def test_check_status_error(self, api_call):
         api_call.return_value = self._make_response(500, b"1")
         getipintel = self._make_one({"email": "foo@example.com"})
         self.assertIsNone(getipintel.check("8.8.8.8"))
 
-    @unittest.mock.patch("requests.get")
+    @unittest.mock.patch("requests.Session.get")
     def test_check_response_error(self, api_call):
         api_call.return_value = self._make_response(200, b"-1")
         getipintel = self._make_one({"email": "foo@example.com"})
@@ -292,7 +602,7 @@ class TestBlackBoxProxyDetector(unittest.TestCase):
             blackbox.url, "http://proxy.mind-media.com/block/proxycheck.php"
         )
 
-    @unittest.mock.patch("requests.get")
+    @unittest.mock.patch("requests.Session.get")
     def test_check(self, api_call):
         api_call.return_value = self._make_response(200, b"Y")
         blackbox = self._make_one({"url": "http://www.example.com/"})
@@ -304,7 +614,7 @@ class TestBlackBoxProxyDetector(unittest.TestCase):
             params={"ip": "8.8.8.8"},
         )
 
-    @unittest.mock.patch("requests.get")
+    @unittest.mock.patch("requests.Session.get")
     def test_check_timeout(self, api_call):
         import requests
 
@@ -312,13 +622,13 @@ class TestBlackBoxProxyDetector(unittest.TestCase):
         blackbox = self._make_one({})
         self.assertIsNone(blackbox.check("8.8.8.8"))
 
-    @unittest.mock.patch("requests.get")
+    @unittest.mock.patch("requests.Session.get")
     def test_check_status_error(self, api_call):
         api_call.return_value = self._make_response(500, b"Error")
         blackbox = self._make_one({})
         self.assertIsNone(blackbox.check("8.8.8.8"))
 
-    @unittest.mock.patch("requests.get")
+    @unittest.mock.patch("requests.Session.get")
     def test_check_response_error(self, api_call):
         api_call.return_value = self._make_response(200, b"X")
         blackbox = self._make_one({})
@@ -337,7 +647,42 @@ class TestBlackBoxProxyDetector(unittest.TestCase):
         self.assertEqual(blackbox.evaluate(b"Z"), False)
 
 
+class TestCircuitBreaker(unittest.TestCase):
+    def _make_one(self, threshold=3, cooldown=60):
+        from ..filters.proxy import CircuitBreaker
+
+        return CircuitBreaker(threshold, cooldown)
+
+    @unittest.mock.patch("fanboi2.filters.proxy.time.monotonic")
+    def test_breaker(self, monotonic_call):
+        monotonic_call.return_value = 1000
+        breaker = self._make_one(threshold=2, cooldown=60)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        monotonic_call.return_value = 1059
+        self.assertFalse(breaker.allow())
+        monotonic_call.return_value = 1060
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        monotonic_call.return_value = 1119
+        self.assertFalse(breaker.allow())
+        monotonic_call.return_value = 1120
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertTrue(breaker.allow())
+        self.assertTrue(breaker.allow())
+
+
 class TestProxyDetector(unittest.TestCase):
+    def setUp(self):
+        from ..filters import proxy
+
+        proxy._detectors.clear()
+
     def _get_target_class(self):
         from ..filters.proxy import ProxyDetector
 
@@ -463,3 +808,76 @@ class TestProxyDetector(unittest.TestCase):
         self.assertEqual(getipintel_check.call_count, 2)
         blackbox_check.assert_called_with("8.8.8.8")
         getipintel_check.assert_called_with("8.8.8.8")
+
+    def test_detector_reused(self):
+        from ..filters.proxy import get_detector
+
+        settings = self._make_config()
+        detector1 = get_detector("getipintel", settings["getipintel"])
+        detector2 = get_detector("getipintel", dict(settings["getipintel"]))
+        detector3_settings = {**settings["getipintel"], "flags": "f"}
+        detector3 = get_detector("getipintel", detector3_settings)
+        self.assertIs(detector1, detector2)
+        self.assertIsNot(detector1, detector3)
+        self.assertIs(get_detector("getipintel", detector3_settings), detector3)
+
+    def test_detector_replaced(self):
+        from ..filters import proxy
+        from ..filters.proxy import get_detector
+
+        settings = self._make_config()
+        detector1 = get_detector("getipintel", settings["getipintel"])
+        get_detector("getipintel", {**settings["getipintel"], "flags": "f"})
+        detector3 = get_detector("getipintel", settings["getipintel"])
+        get_detector("blackbox", settings["blackbox"])
+        self.assertIsNot(detector1, detector3)
+        self.assertEqual(sorted(proxy._detectors), ["blackbox", "getipintel"])
+
+    @unittest.mock.patch("fanboi2.filters.proxy.BlackBoxProxyDetector.check")
+    @unittest.mock.patch("fanboi2.filters.proxy.GetIPIntelProxyDetector.check")
+    def test_check_cached_subnet(self, getipintel_check, blackbox_check):
+        from . import make_cache_region
+
+        settings = self._make_config()
+        settings["blackbox"]["cache_subnet"] = True
+        cache_svc = make_cache_region({})
+        blackbox_check.return_value = b"N"
+        getipintel_check.return_value = b"0"
+        proxy_detector = self._make_one(settings, cache_svc)
+        self.assertFalse(proxy_detector.should_reject({"ip_address": "8.8.8.8"}))
+        self.assertFalse(proxy_detector.should_reject({"ip_address": "8.8.8.4"}))
+        self.assertFalse(proxy_detector.should_reject({"ip_address": "8.8.4.4"}))
+        self.assertEqual(blackbox_check.call_count, 2)
+        self.assertEqual(getipintel_check.call_count, 3)
+
+    def test_cache_key_subnet(self):
+        from . import make_cache_region
+
+        proxy_detector = self._make_one({}, make_cache_region({}))
+        self.assertEqual(
+            proxy_detector._get_cache_key("foo", "8.8.8.8", subnet=True),
+            "filters.proxy:provider=foo,network=8.8.8.0/24",
+        )
+        self.assertEqual(
+            proxy_detector._get_cache_key("foo", "fe80:c9cd::1", subnet=True),
+            "filters.proxy:provider=foo,network=fe80:c9cd::/64",
+        )
+        self.assertEqual(
+            proxy_detector._get_cache_key("foo", "8.8.8.8"),
+            "filters.proxy:provider=foo,ip_address=8.8.8.8",
+        )
+
+    @unittest.mock.patch("requests.Session.get")
+    def test_check_circuit_breaker(self, api_call):
+        import requests
+        from . import make_cache_region
+
+        settings = self._make_config()
+        settings["getipintel"]["enabled"] = False
+        settings["blackbox"]["breaker_threshold"] = 2
+        cache_svc = make_cache_region({})
+        api_call.side_effect = requests.Timeout("connection timed out")
+        proxy_detector = self._make_one(settings, cache_svc)
+        for _ in range(5):
+            self.assertFalse(proxy_detector.should_reject({"ip_address": "8.8.8.8"}))
+        self.assertEqual(api_call.call_count, 2)
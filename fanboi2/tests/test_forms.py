@@ -510,6 +510,33 @@ class TestAdminBoardForm(_FormMixin, unittest.TestCase):
         self.assertFalse(form.validate())
         self.assertListEqual(form.settings.errors, ["Must be a valid JSON."])
 
+    def test_settings_post_delay_engine(self):
+        form = self._make_one(
+            {
+                "title": "Foobar",
+                "description": "New board",
+                "status": "open",
+                "agreements": "None!",
+                "settings": '{"post_delay_engine": "zset"}',
+            }
+        )
+        self.assertTrue(form.validate())
+
+    def test_settings_post_delay_engine_invalid(self):
+        form = self._make_one(
+            {
+                "title": "Foobar",
+                "description": "New board",
+                "status": "open",
+                "agreements": "None!",
+                "settings": '{"post_delay_engine": "foobar"}',
+            }
+        )
+        self.assertFalse(form.validate())
+        self.assertListEqual(
+            form.settings.errors, ["post_delay_engine must be one of: list, zset."]
+        )
+
 
 class TestAdminBoardNewForm(_FormMixin, unittest.TestCase):
     def _get_target_class(self):
@@ -529,6 +529,107 @@ class TestFormatters(unittest.TestCase):
             ),
         )
 
+    def test_format_post_cached(self):
+        from markupsafe import Markup
+
+        from ..helpers import formatters
+        from ..helpers.formatters import format_post, invalidate_post
+        from ..models import Board, Post, Topic
+
+        self.config.add_route("topic_scoped", "/{board}/{topic}/{query}")
+        board = Board(title="Foobar", slug="foobar")
+        topic = Topic(id=1, board=board, title="Hogehogehogehogehoge")
+        post = Post(id=-1, version=1, number=1, topic=topic, body="Hello\nworld")
+        self.assertEqual(
+            format_post(None, self.request, post), Markup("<p>Hello<br>world</p>")
+        )
+        self.assertEqual(
+            format_post(None, self.request, post, shorten=5),
+            Markup(
+                '<p>Hello</p>\n<p class="shortened">'
+                'Post shortened. <a href="/foobar/1/1-" '
+                'class="anchor">See full post</a>.</p>'
+            ),
+        )
+        self.assertEqual(sorted(formatters._post_cache[(-1, 1)], key=str), [5, None])
+
+        post.body = "Changed"
+        self.assertEqual(
+            format_post(None, self.request, post), Markup("<p>Hello<br>world</p>")
+        )
+        post.version = 2
+        self.assertEqual(
+            format_post(None, self.request, post), Markup("<p>Changed</p>")
+        )
+
+        invalidate_post(post)
+        post.body = "Invalidated"
+        self.assertEqual(
+            format_post(None, self.request, post), Markup("<p>Invalidated</p>")
+        )
+        invalidate_post(post)
+        self.assertNotIn((-1, 2), formatters._post_cache)
+
+    def test_format_post_cache_size(self):
+        from collections import OrderedDict
+        from unittest import mock
+
+        from markupsafe import Markup
+
+        from ..helpers import formatters
+        from ..helpers.formatters import format_post
+        from ..models import Board, Post, Topic
+
+        self.config.add_route("topic_scoped", "/{board}/{topic}/{query}")
+        board = Board(title="Foobar", slug="foobar")
+        topic = Topic(id=1, board=board, title="Hogehogehogehogehoge")
+        posts = [
+            Post(id=-i, version=1, number=i, topic=topic, body="Post %s" % (i,))
+            for i in range(1, 4)
+        ]
+        with mock.patch.object(formatters, "POST_CACHE_SIZE", 2):
+            with mock.patch.object(formatters, "_post_cache", OrderedDict()):
+                for post in posts[:2]:
+                    format_post(None, self.request, post)
+                format_post(None, self.request, posts[0])
+                self.assertEqual(
+                    format_post(None, self.request, posts[2]),
+                    Markup("<p>Post 3</p>"),
+                )
+                self.assertEqual(list(formatters._post_cache), [(-1, 1), (-3, 1)])
+
+    def test_format_post_prerendered(self):
+        from markupsafe import Markup
+
+        from ..helpers.formatters import FORMATTER_VERSION, format_post
+        from ..models import Board, Post, Topic
+
+        self.config.add_route("topic_scoped", "/{board}/{topic}/{query}")
+        board = Board(title="Foobar", slug="foobar")
+        topic = Topic(id=1, board=board, title="Hogehogehogehogehoge")
+        post = Post(
+            number=1,
+            topic=topic,
+            body="Hello\nworld",
+            body_formatted="<p>Prerendered</p>",
+            body_formatted_version=FORMATTER_VERSION,
+        )
+        self.assertEqual(
+            format_post(None, self.request, post), Markup("<p>Prerendered</p>")
+        )
+        self.assertEqual(
+            format_post(None, self.request, post, shorten=5),
+            Markup(
+                '<p>Hello</p>\n<p class="shortened">'
+                'Post shortened. <a href="/foobar/1/1-" '
+                'class="anchor">See full post</a>.</p>'
+            ),
+        )
+        post.body_formatted_version = FORMATTER_VERSION - 1
+        self.assertEqual(
+            format_post(None, self.request, post), Markup("<p>Hello<br>world</p>")
+        )
+
     def test_format_page(self):
         from markupsafe import Markup
 
@@ -547,6 +648,124 @@ class TestFormatters(unittest.TestCase):
             self.assertEqual(format_page(None, None, source), Markup(target))
 
 
+class TestFormattersCompatibility(unittest.TestCase):
+    """Ensure the tokenizing formatter renders exactly the same output as
+    the regular expression substitution formatter it replaced.
+    """
+
+    FRAGMENTS = (
+        "Hello",
+        "ほげ",
+        " ",
+        "  ",
+        "\n",
+        "\n\n",
+        "\r\n",
+        "\n \n",
+        "*",
+        "<",
+        ">",
+        "&",
+        "&gt;",
+        '"',
+        "'",
+        "%3E",
+        "%26gt;",
+        "-",
+        "/",
+        "12",
+        ">>",
+        ">>>",
+        ">>1",
+        ">>1-",
+        ">>1-2",
+        ">>>/",
+        ">>>/demo",
+        ">>>/demo/",
+        ">>>/demo/123",
+        ">>>/demo/123/4-5",
+        "http://",
+        "https://example.com",
+        "https://example.com/",
+        "http://a.b",
+        "ftp://example.com/foo?bar=baz",
+        "https://example.com/#frag",
+        "https://imgur.com/foobar",
+        "http://i.imgur.com/foobar.png",
+        "https://www.youtube.com/watch?v=foobar",
+        "http://youtu.be/foobar",
+    )
+
+    def setUp(self):
+        self.config = testing.setUp()
+        self.config.add_route("board", "/{board}")
+        self.config.add_route("topic_scoped", "/{board}/{topic}/{query}")
+        self.request = testing.DummyRequest()
+        self.request.registry = self.config.registry
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def _make_post(self, body):
+        from ..models import Board, Post, Topic
+
+        board = Board(title="Foobar", slug="foobar")
+        topic = Topic(id=1, board=board, title="Foobar")
+        return Post(number=1, topic=topic, body=body)
+
+    def _assert_compatible(self, body):
+        from ..helpers.formatters import _format_post, format_text
+        from . import _legacy_formatters as legacy
+
+        for shorten in (None, 1, 10, 50):
+            result = format_text(body, shorten)
+            expected = legacy.format_text(body, shorten)
+            self.assertEqual(result, expected, body)
+            self.assertEqual(result.length, expected.length, body)
+            self.assertEqual(result.shortened, expected.shortened, body)
+
+            post = self._make_post(body)
+            self.assertEqual(
+                _format_post(self.request, post, shorten),
+                legacy.format_post(self.request, post, shorten),
+                body,
+            )
+
+    def test_golden(self):
+        tests = (
+            "",
+            "Hello, world!",
+            "H\n\n\nello\nworld",
+            "Foo\r\n\r\n\r\n\nBar",
+            ">>1 >>2-5\n>>>/demo/123/4- https://youtu.be/abc\n>>>/foo",
+            ">>>>1 >>>5 >>>/demo//100-/ >>>//123-/100-/",
+            ">>>/http://example.com/foo",
+            ">>1http://example.com/foo*>>2",
+            "foohttp://example.com/bar",
+            "http://example.com/>>1 http://example.com/#>>>/demo/1",
+            "http://example.com/#&gt;&gt;1",
+            "http://example.com/%3E%3E1-2",
+            "http://example.com<>>1",
+            "http://example.com/>>>/demo/1/2>>3>>>4>>>/foo/>>5-",
+            "http://example.com/foo?bar=1&baz=%20+x#y https://ex.com/a_b~c/?d:e=f",
+            'http://example.com/"<script>alert("Hi")</script><a',
+            "Line one\nLine two is longer\n\nNext paragraph\nLast line",
+            "http://imgur.com/a/demo http://imgur.com/<b>.jpg",
+        )
+        for body in tests:
+            self._assert_compatible(body)
+
+    def test_random(self):
+        import random
+
+        rand = random.Random(1337)
+        for _ in range(500):
+            body = "".join(
+                rand.choice(self.FRAGMENTS) for _ in range(rand.randint(1, 30))
+            )
+            self._assert_compatible(body)
+
+
 class TestInfo(unittest.TestCase):
     def setUp(self):
         self.config = testing.setUp()
@@ -14,7 +14,7 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         from ..models import Ban
         from ..services import BanQueryService, ScopeService
         from ..views.admin import bans_get
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         ban1 = self._make(
             Ban(ip_address="10.0.1.0/24", active_until=func.now() + timedelta(hours=1))
@@ -33,7 +33,11 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         self.dbsession.commit()
         request = mock_service(
             self.request,
-            {IBanQueryService: BanQueryService(self.dbsession, ScopeService())},
+            {
+                IBanQueryService: BanQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                )
+            },
         )
         request.method = "GET"
         response = bans_get(request)
@@ -46,7 +50,7 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         from ..models import Ban
         from ..services import BanQueryService, ScopeService
         from ..views.admin import bans_inactive_get
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         self._make(
             Ban(ip_address="10.0.1.0/24", active_until=func.now() + timedelta(hours=1))
@@ -69,7 +73,11 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         self.dbsession.commit()
         request = mock_service(
             self.request,
-            {IBanQueryService: BanQueryService(self.dbsession, ScopeService())},
+            {
+                IBanQueryService: BanQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                )
+            },
         )
         request.method = "GET"
         response = bans_inactive_get(request)
@@ -90,11 +98,16 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         from ..models import Ban
         from ..services import BanCreateService
         from ..views.admin import ban_new_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         request = mock_service(
             self.request,
-            {"db": self.dbsession, IBanCreateService: BanCreateService(self.dbsession)},
+            {
+                "db": self.dbsession,
+                IBanCreateService: BanCreateService(
+                    self.dbsession, make_cache_region()
+                ),
+            },
         )
         request.method = "POST"
         request.content_type = "application/x-www-form-urlencoded"
@@ -138,10 +151,11 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         from ..models import Ban
         from ..services import BanCreateService
         from ..views.admin import ban_new_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         request = mock_service(
-            self.request, {IBanCreateService: BanCreateService(self.dbsession)}
+            self.request,
+            {IBanCreateService: BanCreateService(self.dbsession, make_cache_region())},
         )
         request.method = "POST"
         request.content_type = "application/x-www-form-urlencoded"
@@ -164,13 +178,17 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanQueryService
         from ..services import BanQueryService, ScopeService
         from ..views.admin import ban_get
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         ban = self._make(Ban(ip_address="10.0.0.0/24"))
         self.dbsession.commit()
         request = mock_service(
             self.request,
-            {IBanQueryService: BanQueryService(self.dbsession, ScopeService())},
+            {
+                IBanQueryService: BanQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                )
+            },
         )
         request.method = "GET"
         request.matchdict["ban"] = str(ban.id)
@@ -182,11 +200,15 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanQueryService
         from ..services import BanQueryService, ScopeService
         from ..views.admin import ban_get
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         request = mock_service(
             self.request,
-            {IBanQueryService: BanQueryService(self.dbsession, ScopeService())},
+            {
+                IBanQueryService: BanQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                )
+            },
         )
         request.method = "GET"
         request.matchdict["ban"] = "-1"
@@ -200,7 +222,7 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanQueryService
         from ..services import BanQueryService, ScopeService
         from ..views.admin import ban_edit_get
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         now = func.now()
         ban = self._make(
@@ -216,7 +238,11 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         self.dbsession.commit()
         request = mock_service(
             self.request,
-            {IBanQueryService: BanQueryService(self.dbsession, ScopeService())},
+            {
+                IBanQueryService: BanQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                )
+            },
         )
         request.method = "GET"
         request.matchdict["ban"] = str(ban.id)
@@ -233,13 +259,17 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanQueryService
         from ..services import BanQueryService, ScopeService
         from ..views.admin import ban_edit_get
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         ban = self._make(Ban(ip_address="10.0.0.0/24"))
         self.dbsession.commit()
         request = mock_service(
             self.request,
-            {IBanQueryService: BanQueryService(self.dbsession, ScopeService())},
+            {
+                IBanQueryService: BanQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                )
+            },
         )
         request.method = "GET"
         request.matchdict["ban"] = str(ban.id)
@@ -251,11 +281,15 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanQueryService
         from ..services import BanQueryService, ScopeService
         from ..views.admin import ban_edit_get
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         request = mock_service(
             self.request,
-            {IBanQueryService: BanQueryService(self.dbsession, ScopeService())},
+            {
+                IBanQueryService: BanQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                )
+            },
         )
         request.method = "GET"
         request.matchdict["ban"] = "-1"
@@ -269,15 +303,19 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanQueryService, IBanUpdateService
         from ..services import BanQueryService, BanUpdateService, ScopeService
         from ..views.admin import ban_edit_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         ban = self._make(Ban(ip_address="10.0.0.0/24"))
         self.dbsession.commit()
         request = mock_service(
             self.request,
             {
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanUpdateService: BanUpdateService(self.dbsession),
+                IBanQueryService: BanQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                ),
+                IBanUpdateService: BanUpdateService(
+                    self.dbsession, make_cache_region()
+                ),
             },
         )
         request.method = "POST"
@@ -306,11 +344,15 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanQueryService
         from ..services import BanQueryService, ScopeService
         from ..views.admin import ban_edit_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         request = mock_service(
             self.request,
-            {IBanQueryService: BanQueryService(self.dbsession, ScopeService())},
+            {
+                IBanQueryService: BanQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                )
+            },
         )
         request.method = "POST"
         request.matchdict["ban"] = "-1"
@@ -346,7 +388,7 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanQueryService, IBanUpdateService
         from ..services import BanQueryService, BanUpdateService, ScopeService
         from ..views.admin import ban_edit_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         past_now = func.now() - timedelta(days=30)
         ban = self._make(
@@ -360,8 +402,12 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanUpdateService: BanUpdateService(self.dbsession),
+                IBanQueryService: BanQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                ),
+                IBanUpdateService: BanUpdateService(
+                    self.dbsession, make_cache_region()
+                ),
             },
         )
         request.method = "POST"
@@ -389,7 +435,7 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanQueryService, IBanUpdateService
         from ..services import BanQueryService, BanUpdateService, ScopeService
         from ..views.admin import ban_edit_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         past_now = func.now() - timedelta(days=30)
         ban = self._make(
@@ -403,8 +449,12 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanUpdateService: BanUpdateService(self.dbsession),
+                IBanQueryService: BanQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                ),
+                IBanUpdateService: BanUpdateService(
+                    self.dbsession, make_cache_region()
+                ),
             },
         )
         request.method = "POST"
@@ -428,15 +478,19 @@ class TestIntegrationAdminBans(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanQueryService, IBanUpdateService
         from ..services import BanQueryService, BanUpdateService, ScopeService
         from ..views.admin import ban_edit_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         ban = self._make(Ban(ip_address="10.0.0.0/24"))
         self.dbsession.commit()
         request = mock_service(
             self.request,
             {
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanUpdateService: BanUpdateService(self.dbsession),
+                IBanQueryService: BanQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                ),
+                IBanUpdateService: BanUpdateService(
+                    self.dbsession, make_cache_region()
+                ),
             },
         )
         request.method = "POST"
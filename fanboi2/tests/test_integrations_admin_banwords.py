@@ -12,7 +12,7 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
         from ..models import Banword
         from ..services import BanwordQueryService, ScopeService
         from ..views.admin import banwords_get
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         banword1 = self._make(Banword(expr="https?:\\/\\/bit\\.ly"))
         banword2 = self._make(Banword(expr="https?:\\/\\/goo\\.gl"))
@@ -20,7 +20,11 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
         self._make(Banword(expr="https?:\\/\\/example\\.com", active=False))
         request = mock_service(
             self.request,
-            {IBanwordQueryService: BanwordQueryService(self.dbsession, ScopeService())},
+            {
+                IBanwordQueryService: BanwordQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                )
+            },
         )
         request.method = "GET"
         response = banwords_get(request)
@@ -31,7 +35,7 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
         from ..models import Banword
         from ..services import BanwordQueryService, ScopeService
         from ..views.admin import banwords_inactive_get
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         self._make(Banword(expr="https?:\\/\\/bit\\.ly"))
         self._make(Banword(expr="https?:\\/\\/goo\\.gl"))
@@ -40,7 +44,11 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
         self.dbsession.commit()
         request = mock_service(
             self.request,
-            {IBanwordQueryService: BanwordQueryService(self.dbsession, ScopeService())},
+            {
+                IBanwordQueryService: BanwordQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                )
+            },
         )
         request.method = "GET"
         response = banwords_inactive_get(request)
@@ -59,13 +67,15 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
         from ..models import Banword
         from ..services import BanwordCreateService
         from ..views.admin import banword_new_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         request = mock_service(
             self.request,
             {
                 "db": self.dbsession,
-                IBanwordCreateService: BanwordCreateService(self.dbsession),
+                IBanwordCreateService: BanwordCreateService(
+                    self.dbsession, make_cache_region()
+                ),
             },
         )
         request.method = "POST"
@@ -106,10 +116,15 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
         from ..models import Banword
         from ..services import BanwordCreateService
         from ..views.admin import banword_new_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         request = mock_service(
-            self.request, {IBanwordCreateService: BanwordCreateService(self.dbsession)}
+            self.request,
+            {
+                IBanwordCreateService: BanwordCreateService(
+                    self.dbsession, make_cache_region()
+                )
+            },
         )
         request.method = "POST"
         request.content_type = "application/x-www-form-urlencoded"
@@ -131,13 +146,17 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanwordQueryService
         from ..services import BanwordQueryService, ScopeService
         from ..views.admin import banword_get
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         banword = self._make(Banword(expr="https?:\\/\\/bit\\.ly"))
         self.dbsession.commit()
         request = mock_service(
             self.request,
-            {IBanwordQueryService: BanwordQueryService(self.dbsession, ScopeService())},
+            {
+                IBanwordQueryService: BanwordQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                )
+            },
         )
         request.method = "GET"
         request.matchdict["banword"] = str(banword.id)
@@ -149,11 +168,15 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanwordQueryService
         from ..services import BanwordQueryService, ScopeService
         from ..views.admin import banword_get
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         request = mock_service(
             self.request,
-            {IBanwordQueryService: BanwordQueryService(self.dbsession, ScopeService())},
+            {
+                IBanwordQueryService: BanwordQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                )
+            },
         )
         request.method = "GET"
         request.matchdict["banword"] = "-1"
@@ -165,7 +188,7 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanwordQueryService
         from ..services import BanwordQueryService, ScopeService
         from ..views.admin import banword_edit_get
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         banword = self._make(
             Banword(
@@ -175,7 +198,11 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
         self.dbsession.commit()
         request = mock_service(
             self.request,
-            {IBanwordQueryService: BanwordQueryService(self.dbsession, ScopeService())},
+            {
+                IBanwordQueryService: BanwordQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                )
+            },
         )
         request.method = "GET"
         request.matchdict["banword"] = str(banword.id)
@@ -190,11 +217,15 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanwordQueryService
         from ..services import BanwordQueryService, ScopeService
         from ..views.admin import banword_edit_get
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         request = mock_service(
             self.request,
-            {IBanwordQueryService: BanwordQueryService(self.dbsession, ScopeService())},
+            {
+                IBanwordQueryService: BanwordQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                )
+            },
         )
         request.method = "GET"
         request.matchdict["banword"] = "-1"
@@ -206,7 +237,7 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanwordQueryService, IBanwordUpdateService
         from ..services import BanwordQueryService, BanwordUpdateService, ScopeService
         from ..views.admin import banword_edit_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         banword = self._make(
             Banword(
@@ -221,9 +252,11 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
             self.request,
             {
                 IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
+                    self.dbsession, ScopeService(), make_cache_region()
+                ),
+                IBanwordUpdateService: BanwordUpdateService(
+                    self.dbsession, make_cache_region()
                 ),
-                IBanwordUpdateService: BanwordUpdateService(self.dbsession),
             },
         )
         request.method = "POST"
@@ -248,11 +281,15 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanwordQueryService
         from ..services import BanwordQueryService, ScopeService
         from ..views.admin import banword_edit_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         request = mock_service(
             self.request,
-            {IBanwordQueryService: BanwordQueryService(self.dbsession, ScopeService())},
+            {
+                IBanwordQueryService: BanwordQueryService(
+                    self.dbsession, ScopeService(), make_cache_region()
+                )
+            },
         )
         request.method = "POST"
         request.matchdict["banword"] = "-1"
@@ -284,7 +321,7 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
         from ..interfaces import IBanwordQueryService, IBanwordUpdateService
         from ..services import BanwordQueryService, BanwordUpdateService, ScopeService
         from ..views.admin import banword_edit_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         banword = self._make(
             Banword(
@@ -299,9 +336,11 @@ class TestIntegrationAdminBanwords(IntegrationMixin, unittest.TestCase):
             self.request,
             {
                 IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
+                    self.dbsession, ScopeService(), make_cache_region()
+                ),
+                IBanwordUpdateService: BanwordUpdateService(
+                    self.dbsession, make_cache_region()
                 ),
-                IBanwordUpdateService: BanwordUpdateService(self.dbsession),
             },
         )
         request.method = "POST"
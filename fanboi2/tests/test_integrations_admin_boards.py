@@ -71,6 +71,7 @@ class TestIntegrationAdminBoards(IntegrationMixin, unittest.TestCase):
                 "max_posts": 1000,
                 "name": "Nameless Foobar",
                 "post_delay": 10,
+                "post_delay_engine": "list",
                 "post_delay_period": 0,
                 "post_delay_threshold": 0,
                 "use_ident": True,
@@ -214,6 +215,7 @@ class TestIntegrationAdminBoards(IntegrationMixin, unittest.TestCase):
             + '    "max_posts": 1000,\n'
             + '    "name": "Nameless Foobar",\n'
             + '    "post_delay": 10,\n'
+            + '    "post_delay_engine": "list",\n'
             + '    "post_delay_period": 0,\n'
             + '    "post_delay_threshold": 0,\n'
             + '    "use_ident": true\n'
@@ -275,6 +277,7 @@ class TestIntegrationAdminBoards(IntegrationMixin, unittest.TestCase):
                 "max_posts": 1000,
                 "name": "Nameless Foobar",
                 "post_delay": 10,
+                "post_delay_engine": "list",
                 "post_delay_period": 0,
                 "post_delay_threshold": 0,
                 "use_ident": True,
@@ -163,6 +163,151 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
             ],
         )
 
+    def test_board_topics_get_not_modified(self):
+        from datetime import timedelta
+        from sqlalchemy.sql import func
+        from ..interfaces import IBoardQueryService, ITopicQueryService
+        from ..models import Board, Topic, TopicMeta
+        from ..services.board import BoardQueryService
+        from ..services.topic import TopicQueryService
+        from ..views.api import board_topics_get
+        from . import mock_service
+
+        board = self._make(Board(title="Foo", slug="foo"))
+        topic1 = self._make(Topic(board=board, title="Foo"))
+        self._make(
+            TopicMeta(
+                topic=topic1, post_count=1, posted_at=func.now(), bumped_at=func.now()
+            )
+        )
+        self.dbsession.commit()
+
+        def _make_request(**headers):
+            request = testing.DummyRequest(headers=headers)
+            request.registry = self.config.registry
+            request.method = "GET"
+            request.matchdict["board"] = board.slug
+            return mock_service(
+                request,
+                {
+                    IBoardQueryService: BoardQueryService(self.dbsession),
+                    ITopicQueryService: TopicQueryService(
+                        self.dbsession, BoardQueryService(self.dbsession)
+                    ),
+                },
+            )
+
+        request = _make_request()
+        self.assertEqual(board_topics_get(request), [topic1])
+        etag = request.response.etag
+
+        request = _make_request(**{"If-None-Match": '"%s"' % etag})
+        self.assertEqual(board_topics_get(request).status_code, 304)
+
+        topic2 = self._make(Topic(board=board, title="Bar"))
+        self._make(
+            TopicMeta(
+                topic=topic2,
+                post_count=1,
+                posted_at=func.now() + timedelta(seconds=1),
+                bumped_at=func.now() + timedelta(seconds=1),
+            )
+        )
+        self.dbsession.commit()
+
+        request = _make_request(**{"If-None-Match": '"%s"' % etag})
+        self.assertEqual(board_topics_get(request), [topic2, topic1])
+
+    @unittest.mock.patch("fanboi2.services.topic.TOPIC_PAGE_SIZE", 2)
+    def test_board_topics_get_paginated(self):
+        from datetime import timedelta
+        from sqlalchemy.sql import func
+        from ..interfaces import IBoardQueryService, ITopicQueryService
+        from ..models import Board, Topic, TopicMeta
+        from ..services.board import BoardQueryService
+        from ..services.topic import TopicQueryService
+        from ..views.api import board_topics_get
+        from . import mock_service
+
+        def _make_topic(days=0, **kwargs):
+            topic = self._make(Topic(**kwargs))
+            self._make(
+                TopicMeta(
+                    topic=topic,
+                    post_count=0,
+                    posted_at=func.now(),
+                    bumped_at=func.now() - timedelta(days=days),
+                )
+            )
+            return topic
+
+        board = self._make(Board(title="Foo", slug="foo"))
+        topic1 = _make_topic(board=board, title="Foo")
+        topic2 = _make_topic(days=1, board=board, title="Foo")
+        topic3 = _make_topic(days=2, board=board, title="Foo")
+        self.dbsession.commit()
+        self.config.add_route("api_board_topics", "/api/1.0/boards/{board}/topics/")
+        request = mock_service(
+            self.request,
+            {
+                IBoardQueryService: BoardQueryService(self.dbsession),
+                ITopicQueryService: TopicQueryService(
+                    self.dbsession, BoardQueryService(self.dbsession)
+                ),
+            },
+        )
+        request.method = "GET"
+        request.matchdict["board"] = board.slug
+        self.assertEqual(board_topics_get(request), [topic1, topic2])
+        link = request.response.headers["Link"]
+        self.assertTrue(
+            link.startswith(
+                "<https://www.example.com/api/1.0/boards/foo/topics/?cursor="
+            )
+        )
+        self.assertTrue(link.endswith('>; rel="next"'))
+
+        request = mock_service(
+            testing.DummyRequest(),
+            {
+                IBoardQueryService: BoardQueryService(self.dbsession),
+                ITopicQueryService: TopicQueryService(
+                    self.dbsession, BoardQueryService(self.dbsession)
+                ),
+            },
+        )
+        request.method = "GET"
+        request.matchdict["board"] = board.slug
+        request.params["cursor"] = link[link.index("cursor=") + 7 : link.index(">")]
+        self.assertEqual(board_topics_get(request), [topic3])
+        self.assertNotIn("Link", request.response.headers)
+
+    def test_board_topics_get_invalid_cursor(self):
+        from ..errors import ParamsInvalidError
+        from ..interfaces import IBoardQueryService, ITopicQueryService
+        from ..models import Board
+        from ..services.board import BoardQueryService
+        from ..services.topic import TopicQueryService
+        from ..views.api import board_topics_get
+        from . import mock_service
+
+        board = self._make(Board(title="Foo", slug="foo"))
+        self.dbsession.commit()
+        request = mock_service(
+            self.request,
+            {
+                IBoardQueryService: BoardQueryService(self.dbsession),
+                ITopicQueryService: TopicQueryService(
+                    self.dbsession, BoardQueryService(self.dbsession)
+                ),
+            },
+        )
+        request.method = "GET"
+        request.matchdict["board"] = board.slug
+        request.params["cursor"] = "invalid"
+        with self.assertRaises(ParamsInvalidError):
+            board_topics_get(request)
+
     def test_board_topics_get_empty(self):
         from ..interfaces import IBoardQueryService, ITopicQueryService
         from ..models import Board
@@ -210,11 +355,10 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
 
     @unittest.mock.patch("fanboi2.tasks.topic.add_topic.delay")
     def test_board_topics_post(self, add_):
+        from fakeredis import FakeStrictRedis
         from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
             IBoardQueryService,
-            IRateLimiterService,
+            IPostingGuardService,
             ITopicCreateService,
         )
         from ..models import Board
@@ -223,6 +367,7 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
             BanwordQueryService,
             BoardQueryService,
             IdentityService,
+            PostingGuardService,
             RateLimiterService,
             ScopeService,
             SettingQueryService,
@@ -230,22 +375,26 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
             UserQueryService,
         )
         from ..views.api import board_topics_post
-        from . import mock_service, make_cache_region, DummyRedis
+        from . import mock_service, make_cache_region
 
         board = self._make(Board(title="Foobar", slug="foo"))
         self.dbsession.commit()
-        redis_conn = DummyRedis()
+        redis_conn = FakeStrictRedis()
         cache_region = make_cache_region()
         rate_limiter_svc = RateLimiterService(redis_conn)
         request = mock_service(
             self.request,
             {
-                IBoardQueryService: BoardQueryService(self.dbsession),
-                IRateLimiterService: rate_limiter_svc,
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    rate_limiter_svc,
                 ),
+                IBoardQueryService: BoardQueryService(self.dbsession),
                 ITopicCreateService: TopicCreateService(
                     self.dbsession,
                     IdentityService(
@@ -292,11 +441,10 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
 
     @unittest.mock.patch("fanboi2.tasks.topic.add_topic.delay")
     def test_board_topics_post_wwwform(self, add_):
+        from fakeredis import FakeStrictRedis
         from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
             IBoardQueryService,
-            IRateLimiterService,
+            IPostingGuardService,
             ITopicCreateService,
         )
         from ..models import Board
@@ -305,6 +453,7 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
             BanwordQueryService,
             BoardQueryService,
             IdentityService,
+            PostingGuardService,
             RateLimiterService,
             ScopeService,
             SettingQueryService,
@@ -312,22 +461,26 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
             UserQueryService,
         )
         from ..views.api import board_topics_post
-        from . import mock_service, make_cache_region, DummyRedis
+        from . import mock_service, make_cache_region
 
         board = self._make(Board(title="Foobar", slug="foo"))
         self.dbsession.commit()
-        redis_conn = DummyRedis()
+        redis_conn = FakeStrictRedis()
         cache_region = make_cache_region()
         rate_limiter_svc = RateLimiterService(redis_conn)
         request = mock_service(
             self.request,
             {
-                IBoardQueryService: BoardQueryService(self.dbsession),
-                IRateLimiterService: rate_limiter_svc,
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    rate_limiter_svc,
                 ),
+                IBoardQueryService: BoardQueryService(self.dbsession),
                 ITopicCreateService: TopicCreateService(
                     self.dbsession,
                     IdentityService(
@@ -435,11 +588,16 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
 
     def test_board_topics_post_banned(self):
         from ..errors import BanRejectedError
-        from ..interfaces import IBoardQueryService, IBanQueryService
+        from ..interfaces import IBoardQueryService, IPostingGuardService
         from ..models import Board, Topic, Ban
-        from ..services import BoardQueryService, BanQueryService, ScopeService
+        from ..services import (
+            BanQueryService,
+            BoardQueryService,
+            PostingGuardService,
+            ScopeService,
+        )
         from ..views.api import board_topics_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foo"))
         self._make(Ban(ip_address="127.0.0.0/24", scope="board:foo"))
@@ -447,8 +605,14 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    None,
+                    None,
+                ),
                 IBoardQueryService: BoardQueryService(self.dbsession),
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
             },
         )
         request.method = "POST"
@@ -464,11 +628,16 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
 
     def test_board_topics_post_banned_unscoped(self):
         from ..errors import BanRejectedError
-        from ..interfaces import IBoardQueryService, IBanQueryService
+        from ..interfaces import IBoardQueryService, IPostingGuardService
         from ..models import Board, Topic, Ban
-        from ..services import BoardQueryService, BanQueryService, ScopeService
+        from ..services import (
+            BanQueryService,
+            BoardQueryService,
+            PostingGuardService,
+            ScopeService,
+        )
         from ..views.api import board_topics_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foo"))
         self._make(Ban(ip_address="127.0.0.0/24"))
@@ -476,8 +645,14 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    None,
+                    None,
+                ),
                 IBoardQueryService: BoardQueryService(self.dbsession),
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
             },
         )
         request.method = "POST"
@@ -493,20 +668,17 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
 
     def test_board_topics_post_banword_banned(self):
         from ..errors import BanwordRejectedError
-        from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
-            IBoardQueryService,
-        )
+        from ..interfaces import IBoardQueryService, IPostingGuardService
         from ..models import Banword, Board, Topic
         from ..services import (
-            BoardQueryService,
             BanQueryService,
             BanwordQueryService,
+            BoardQueryService,
+            PostingGuardService,
             ScopeService,
         )
         from ..views.api import board_topics_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foo"))
         self._make(Banword(expr="https?:\\/\\/bit\\.ly", scope="board:foo"))
@@ -514,9 +686,14 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    None,
                 ),
                 IBoardQueryService: BoardQueryService(self.dbsession),
             },
@@ -534,20 +711,17 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
 
     def test_board_topics_post_banword_banned_unscoped(self):
         from ..errors import BanwordRejectedError
-        from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
-            IBoardQueryService,
-        )
+        from ..interfaces import IBoardQueryService, IPostingGuardService
         from ..models import Banword, Board, Topic
         from ..services import (
-            BoardQueryService,
             BanQueryService,
             BanwordQueryService,
+            BoardQueryService,
+            PostingGuardService,
             ScopeService,
         )
         from ..views.api import board_topics_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foo"))
         self._make(Banword(expr="https?:\\/\\/bit\\.ly"))
@@ -555,9 +729,14 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    None,
                 ),
                 IBoardQueryService: BoardQueryService(self.dbsession),
             },
@@ -574,37 +753,38 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
         self.assertEqual(self.dbsession.query(Topic).count(), 0)
 
     def test_board_topics_post_rate_limited(self):
+        from fakeredis import FakeStrictRedis
         from ..errors import RateLimitedError
-        from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
-            IBoardQueryService,
-            IRateLimiterService,
-        )
+        from ..interfaces import IBoardQueryService, IPostingGuardService
         from ..models import Board, Topic
         from ..services import (
             BanQueryService,
             BanwordQueryService,
             BoardQueryService,
+            PostingGuardService,
             RateLimiterService,
             ScopeService,
         )
         from ..views.api import board_topics_post
-        from . import mock_service, DummyRedis
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foo"))
         self.dbsession.commit()
-        redis_conn = DummyRedis()
+        redis_conn = FakeStrictRedis()
         rate_limiter_svc = RateLimiterService(redis_conn)
         request = mock_service(
             self.request,
             {
-                IBoardQueryService: BoardQueryService(self.dbsession),
-                IRateLimiterService: rate_limiter_svc,
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    rate_limiter_svc,
                 ),
+                IBoardQueryService: BoardQueryService(self.dbsession),
             },
         )
         request.method = "POST"
@@ -703,9 +883,9 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
             topic_get(request)
 
     def test_topic_posts_get(self):
-        from ..interfaces import IPostQueryService
+        from ..interfaces import IPostQueryService, ITopicQueryService
         from ..models import Board, Topic, Post
-        from ..services import PostQueryService
+        from ..services import BoardQueryService, PostQueryService, TopicQueryService
         from ..views.api import topic_posts_get
         from . import mock_service
 
@@ -741,16 +921,143 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
         )
         self.dbsession.commit()
         request = mock_service(
-            self.request, {IPostQueryService: PostQueryService(self.dbsession)}
+            self.request,
+            {
+                IPostQueryService: PostQueryService(self.dbsession),
+                ITopicQueryService: TopicQueryService(
+                    self.dbsession, BoardQueryService(self.dbsession)
+                ),
+            },
         )
         request.method = "GET"
         request.matchdict["topic"] = topic1.id
         self.assertEqual(topic_posts_get(request), [post1, post2])
 
+    def test_topic_posts_get_not_modified(self):
+        from datetime import timedelta
+        from sqlalchemy.sql import func
+        from ..interfaces import IPostQueryService, ITopicQueryService
+        from ..models import Board, Topic, TopicMeta, Post
+        from ..services import BoardQueryService, PostQueryService, TopicQueryService
+        from ..views.api import topic_posts_get
+        from . import mock_service
+
+        board = self._make(Board(title="Foobar", slug="foobar"))
+        topic = self._make(Topic(board=board, title="Demo"))
+        topic_meta = self._make(
+            TopicMeta(topic=topic, post_count=1, posted_at=func.now())
+        )
+        post1 = self._make(
+            Post(
+                topic=topic,
+                number=1,
+                name="Nameless Fanboi",
+                body="Lorem ipsum",
+                ip_address="127.0.0.1",
+            )
+        )
+        self.dbsession.commit()
+
+        post_query_svc = unittest.mock.Mock(wraps=PostQueryService(self.dbsession))
+
+        def _make_request(**headers):
+            request = testing.DummyRequest(headers=headers)
+            request.registry = self.config.registry
+            request.method = "GET"
+            request.matchdict["topic"] = topic.id
+            return mock_service(
+                request,
+                {
+                    IPostQueryService: post_query_svc,
+                    ITopicQueryService: TopicQueryService(
+                        self.dbsession, BoardQueryService(self.dbsession)
+                    ),
+                },
+            )
+
+        request = _make_request()
+        self.assertEqual(topic_posts_get(request), [post1])
+        etag = request.response.etag
+        self.assertIsNotNone(etag)
+        self.assertEqual(
+            request.response.last_modified, topic_meta.posted_at.replace(microsecond=0)
+        )
+        self.assertTrue(request.response.cache_control.no_cache)
+        self.assertEqual(post_query_svc.list_from_topic_id.call_count, 1)
+
+        request = _make_request(**{"If-None-Match": '"%s"' % etag})
+        response = topic_posts_get(request)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.etag, etag)
+        self.assertEqual(post_query_svc.list_from_topic_id.call_count, 1)
+
+        request = _make_request(
+            **{"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"}
+        )
+        self.assertEqual(topic_posts_get(request).status_code, 304)
+        request = _make_request(
+            **{"If-Modified-Since": "Fri, 01 Jan 2010 00:00:00 GMT"}
+        )
+        self.assertEqual(topic_posts_get(request), [post1])
+
+        post2 = self._make(
+            Post(
+                topic=topic,
+                number=2,
+                name="Nameless Fanboi",
+                body="Dolor sit",
+                ip_address="127.0.0.1",
+            )
+        )
+        topic_meta.post_count = 2
+        topic_meta.posted_at = func.now() + timedelta(seconds=1)
+        self.dbsession.add(topic_meta)
+        self.dbsession.commit()
+
+        request = _make_request(**{"If-None-Match": '"%s"' % etag})
+        self.assertEqual(topic_posts_get(request), [post1, post2])
+        self.assertNotEqual(request.response.etag, etag)
+
+    def test_topic_posts_get_archived(self):
+        from sqlalchemy.sql import func
+        from ..interfaces import IPostQueryService, ITopicQueryService
+        from ..models import Board, Topic, TopicMeta, Post
+        from ..services import BoardQueryService, PostQueryService, TopicQueryService
+        from ..views.api import topic_posts_get
+        from . import mock_service
+
+        board = self._make(Board(title="Foobar", slug="foobar"))
+        topic = self._make(Topic(board=board, title="Demo", status="archived"))
+        self._make(TopicMeta(topic=topic, post_count=1, posted_at=func.now()))
+        post = self._make(
+            Post(
+                topic=topic,
+                number=1,
+                name="Nameless Fanboi",
+                body="Lorem ipsum",
+                ip_address="127.0.0.1",
+            )
+        )
+        self.dbsession.commit()
+        request = mock_service(
+            self.request,
+            {
+                IPostQueryService: PostQueryService(self.dbsession),
+                ITopicQueryService: TopicQueryService(
+                    self.dbsession, BoardQueryService(self.dbsession)
+                ),
+            },
+        )
+        request.method = "GET"
+        request.matchdict["topic"] = topic.id
+        self.assertEqual(topic_posts_get(request), [post])
+        self.assertEqual(request.response.cache_control.max_age, 86400)
+        self.assertFalse(request.response.cache_control.no_cache)
+
     def test_topic_posts_get_query(self):
-        from ..interfaces import IPostQueryService
+        from ..interfaces import IPostQueryService, ITopicQueryService
         from ..models import Board, Topic, Post
-        from ..services import PostQueryService
+        from ..services import BoardQueryService, PostQueryService, TopicQueryService
         from ..views.api import topic_posts_get
         from . import mock_service
 
@@ -781,7 +1088,13 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
         )
         self.dbsession.commit()
         request = mock_service(
-            self.request, {IPostQueryService: PostQueryService(self.dbsession)}
+            self.request,
+            {
+                IPostQueryService: PostQueryService(self.dbsession),
+                ITopicQueryService: TopicQueryService(
+                    self.dbsession, BoardQueryService(self.dbsession)
+                ),
+            },
         )
         request.method = "GET"
         request.matchdict["topic"] = topic1.id
@@ -814,13 +1127,19 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
 
     def test_topic_posts_get_not_found(self):
         from sqlalchemy.orm.exc import NoResultFound
-        from ..interfaces import IPostQueryService
-        from ..services import PostQueryService
+        from ..interfaces import IPostQueryService, ITopicQueryService
+        from ..services import BoardQueryService, PostQueryService, TopicQueryService
         from ..views.api import topic_posts_get
         from . import mock_service
 
         request = mock_service(
-            self.request, {IPostQueryService: PostQueryService(self.dbsession)}
+            self.request,
+            {
+                IPostQueryService: PostQueryService(self.dbsession),
+                ITopicQueryService: TopicQueryService(
+                    self.dbsession, BoardQueryService(self.dbsession)
+                ),
+            },
         )
         request.method = "GET"
         request.matchdict["topic"] = "-1"
@@ -829,11 +1148,10 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
 
     @unittest.mock.patch("fanboi2.tasks.post.add_post.delay")
     def test_topic_posts_post(self, add_):
+        from fakeredis import FakeStrictRedis
         from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
             IPostCreateService,
-            IRateLimiterService,
+            IPostingGuardService,
             ITopicQueryService,
         )
         from ..models import Board, Topic, TopicMeta
@@ -843,6 +1161,7 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
             BoardQueryService,
             IdentityService,
             PostCreateService,
+            PostingGuardService,
             RateLimiterService,
             ScopeService,
             SettingQueryService,
@@ -850,26 +1169,30 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
             UserQueryService,
         )
         from ..views.api import topic_posts_post
-        from . import mock_service, make_cache_region, DummyRedis
+        from . import mock_service, make_cache_region
 
         board = self._make(Board(title="Foobar", slug="foobar"))
         topic = self._make(Topic(board=board, title="Foobar"))
         self._make(TopicMeta(topic=topic, post_count=0))
         self.dbsession.commit()
-        redis_conn = DummyRedis()
+        redis_conn = FakeStrictRedis()
         cache_region = make_cache_region()
         rate_limiter_svc = RateLimiterService(redis_conn)
         request = mock_service(
             self.request,
             {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    rate_limiter_svc,
+                ),
                 ITopicQueryService: TopicQueryService(
                     self.dbsession, BoardQueryService(self.dbsession)
                 ),
-                IRateLimiterService: rate_limiter_svc,
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
-                ),
                 IPostCreateService: PostCreateService(
                     self.dbsession,
                     IdentityService(
@@ -914,13 +1237,86 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
             },
         )
 
+    @unittest.mock.patch("fanboi2.tasks.post.add_post.delay")
+    def test_topic_posts_post_direct(self, add_):
+        from fakeredis import FakeStrictRedis
+        from ..interfaces import (
+            IPostCreateService,
+            IPostingGuardService,
+            ITopicQueryService,
+        )
+        from ..models import Board, Topic, TopicMeta, Setting
+        from ..services import (
+            BanQueryService,
+            BanwordQueryService,
+            BoardQueryService,
+            IdentityService,
+            PostCreateService,
+            PostingGuardService,
+            RateLimiterService,
+            RecentPosterService,
+            ScopeService,
+            SettingQueryService,
+            TopicQueryService,
+            UserQueryService,
+        )
+        from ..views.api import topic_posts_post
+        from . import mock_service, make_cache_region
+
+        board = self._make(Board(title="Foobar", slug="foobar"))
+        topic = self._make(Topic(board=board, title="Foobar"))
+        self._make(TopicMeta(topic=topic, post_count=0))
+        self._make(Setting(key="app.post_direct", value=True))
+        self.dbsession.commit()
+        redis_conn = FakeStrictRedis()
+        cache_region = make_cache_region()
+        recent_poster_svc = RecentPosterService(redis_conn, self.dbsession)
+        recent_poster_svc.mark_seen("127.0.0.1")
+        request = mock_service(
+            self.request,
+            {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    RateLimiterService(redis_conn),
+                ),
+                ITopicQueryService: TopicQueryService(
+                    self.dbsession, BoardQueryService(self.dbsession)
+                ),
+                IPostCreateService: PostCreateService(
+                    self.dbsession,
+                    IdentityService(
+                        redis_conn, SettingQueryService(self.dbsession, cache_region)
+                    ),
+                    SettingQueryService(self.dbsession, cache_region),
+                    UserQueryService(self.dbsession),
+                    recent_poster_svc,
+                ),
+            },
+        )
+        request.method = "POST"
+        request.matchdict["topic"] = topic.id
+        request.content_type = "application/json"
+        request.json_body = {}
+        request.json_body["body"] = "bodyb"
+        request.json_body["bumped"] = True
+        response = topic_posts_post(request)
+        self.assertIsNotNone(response.id)
+        self.assertEqual(response.topic, topic)
+        self.assertEqual(response.number, 1)
+        self.assertEqual(response.body, "bodyb")
+        self.assertFalse(add_.called)
+
     @unittest.mock.patch("fanboi2.tasks.post.add_post.delay")
     def test_topic_posts_post_wwwform(self, add_):
+        from fakeredis import FakeStrictRedis
         from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
             IPostCreateService,
-            IRateLimiterService,
+            IPostingGuardService,
             ITopicQueryService,
         )
         from ..models import Board, Topic, TopicMeta
@@ -930,6 +1326,7 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
             BoardQueryService,
             IdentityService,
             PostCreateService,
+            PostingGuardService,
             RateLimiterService,
             ScopeService,
             SettingQueryService,
@@ -937,26 +1334,30 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
             UserQueryService,
         )
         from ..views.api import topic_posts_post
-        from . import mock_service, make_cache_region, DummyRedis
+        from . import mock_service, make_cache_region
 
         board = self._make(Board(title="Foobar", slug="foobar"))
         topic = self._make(Topic(board=board, title="Foobar"))
         self._make(TopicMeta(topic=topic, post_count=0))
         self.dbsession.commit()
-        redis_conn = DummyRedis()
+        redis_conn = FakeStrictRedis()
         cache_region = make_cache_region()
         rate_limiter_svc = RateLimiterService(redis_conn)
         request = mock_service(
             self.request,
             {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    rate_limiter_svc,
+                ),
                 ITopicQueryService: TopicQueryService(
                     self.dbsession, BoardQueryService(self.dbsession)
                 ),
-                IRateLimiterService: rate_limiter_svc,
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
-                ),
                 IPostCreateService: PostCreateService(
                     self.dbsession,
                     IdentityService(
@@ -1053,16 +1454,17 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
 
     def test_topic_posts_post_banned(self):
         from ..errors import BanRejectedError
-        from ..interfaces import ITopicQueryService, IBanQueryService
+        from ..interfaces import IPostingGuardService, ITopicQueryService
         from ..models import Board, Topic, TopicMeta, Post, Ban
         from ..services import (
-            BoardQueryService,
-            TopicQueryService,
             BanQueryService,
+            BoardQueryService,
+            PostingGuardService,
             ScopeService,
+            TopicQueryService,
         )
         from ..views.api import topic_posts_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foobar"))
         topic = self._make(Topic(board=board, title="Foobar"))
@@ -1072,10 +1474,16 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    None,
+                    None,
+                ),
                 ITopicQueryService: TopicQueryService(
                     self.dbsession, BoardQueryService(self.dbsession)
                 ),
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
             },
         )
         request.method = "POST"
@@ -1091,16 +1499,17 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
 
     def test_topic_posts_post_banned_unscoped(self):
         from ..errors import BanRejectedError
-        from ..interfaces import ITopicQueryService, IBanQueryService
+        from ..interfaces import IPostingGuardService, ITopicQueryService
         from ..models import Board, Topic, TopicMeta, Post, Ban
         from ..services import (
-            BoardQueryService,
-            TopicQueryService,
             BanQueryService,
+            BoardQueryService,
+            PostingGuardService,
             ScopeService,
+            TopicQueryService,
         )
         from ..views.api import topic_posts_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foobar"))
         topic = self._make(Topic(board=board, title="Foobar"))
@@ -1110,10 +1519,16 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    None,
+                    None,
+                ),
                 ITopicQueryService: TopicQueryService(
                     self.dbsession, BoardQueryService(self.dbsession)
                 ),
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
             },
         )
         request.method = "POST"
@@ -1129,21 +1544,18 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
 
     def test_topic_posts_banword_banned(self):
         from ..errors import BanwordRejectedError
-        from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
-            ITopicQueryService,
-        )
+        from ..interfaces import IPostingGuardService, ITopicQueryService
         from ..models import Board, Topic, TopicMeta, Post, Banword
         from ..services import (
             BanQueryService,
             BanwordQueryService,
             BoardQueryService,
+            PostingGuardService,
             ScopeService,
             TopicQueryService,
         )
         from ..views.api import topic_posts_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foobar"))
         topic = self._make(Topic(board=board, title="Foobar"))
@@ -1153,13 +1565,18 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    None,
+                ),
                 ITopicQueryService: TopicQueryService(
                     self.dbsession, BoardQueryService(self.dbsession)
                 ),
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
-                ),
             },
         )
 
@@ -1175,42 +1592,43 @@ class TestIntegrationAPI(ModelSessionMixin, unittest.TestCase):
         self.assertEqual(self.dbsession.query(Post).count(), 0)
 
     def test_topic_posts_post_rate_limited(self):
+        from fakeredis import FakeStrictRedis
         from ..errors import RateLimitedError
-        from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
-            IRateLimiterService,
-            ITopicQueryService,
-        )
+        from ..interfaces import IPostingGuardService, ITopicQueryService
         from ..models import Board, Topic, TopicMeta, Post
         from ..services import (
             BanQueryService,
             BanwordQueryService,
             BoardQueryService,
+            PostingGuardService,
             RateLimiterService,
-            TopicQueryService,
             ScopeService,
+            TopicQueryService,
         )
         from ..views.api import topic_posts_post
-        from . import mock_service, DummyRedis
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foobar"))
         topic = self._make(Topic(board=board, title="Foobar"))
         self._make(TopicMeta(topic=topic, post_count=0))
         self.dbsession.commit()
-        redis_conn = DummyRedis()
+        redis_conn = FakeStrictRedis()
         rate_limiter_svc = RateLimiterService(redis_conn)
         request = mock_service(
             self.request,
             {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    rate_limiter_svc,
+                ),
                 ITopicQueryService: TopicQueryService(
                     self.dbsession, BoardQueryService(self.dbsession)
                 ),
-                IRateLimiterService: rate_limiter_svc,
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
-                ),
             },
         )
         request.method = "POST"
@@ -30,9 +30,14 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
     def test_board_show(self):
         from datetime import timedelta
         from sqlalchemy.sql import func
-        from ..interfaces import IBoardQueryService, ITopicQueryService
-        from ..models import Board, Topic, TopicMeta
+        from ..interfaces import (
+            IBoardQueryService,
+            IPostQueryService,
+            ITopicQueryService,
+        )
+        from ..models import Board, Post, Topic, TopicMeta
         from ..services.board import BoardQueryService
+        from ..services.post import PostQueryService
         from ..services.topic import TopicQueryService
         from ..views.boards import board_show
         from . import mock_service
@@ -66,11 +71,34 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         _make_topic(days=7, hours=1, board=board1, title="Foo", status="locked")
         _make_topic(days=8, board=board1, title="Foo")
         _make_topic(days=9, board=board1, title="Foo")
+        posts1 = []
+        for i in range(7):
+            posts1.append(
+                self._make(
+                    Post(
+                        topic=topic1,
+                        number=i + 1,
+                        name="Nameless Fanboi",
+                        body="Foobar",
+                        ip_address="127.0.0.1",
+                    )
+                )
+            )
+        post2 = self._make(
+            Post(
+                topic=topic2,
+                number=1,
+                name="Nameless Fanboi",
+                body="Foobar",
+                ip_address="127.0.0.1",
+            )
+        )
         self.dbsession.commit()
         request = mock_service(
             self.request,
             {
                 IBoardQueryService: BoardQueryService(self.dbsession),
+                IPostQueryService: PostQueryService(self.dbsession),
                 ITopicQueryService: TopicQueryService(
                     self.dbsession, BoardQueryService(self.dbsession)
                 ),
@@ -95,11 +123,19 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
                 topic10,
             ],
         )
+        self.assertEqual(response["recent_posts"][topic1.id], posts1[2:])
+        self.assertEqual(response["recent_posts"][topic2.id], [post2])
+        self.assertEqual(response["recent_posts"][topic3.id], [])
 
     def test_board_show_empty(self):
-        from ..interfaces import IBoardQueryService, ITopicQueryService
+        from ..interfaces import (
+            IBoardQueryService,
+            IPostQueryService,
+            ITopicQueryService,
+        )
         from ..models import Board
         from ..services.board import BoardQueryService
+        from ..services.post import PostQueryService
         from ..services.topic import TopicQueryService
         from ..views.boards import board_show
         from . import mock_service
@@ -110,6 +146,7 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
             self.request,
             {
                 IBoardQueryService: BoardQueryService(self.dbsession),
+                IPostQueryService: PostQueryService(self.dbsession),
                 ITopicQueryService: TopicQueryService(
                     self.dbsession, BoardQueryService(self.dbsession)
                 ),
@@ -120,11 +157,17 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         response = board_show(request)
         self.assertEqual(response["board"], board)
         self.assertEqual(response["topics"], [])
+        self.assertEqual(response["recent_posts"], {})
 
     def test_board_show_archived(self):
-        from ..interfaces import IBoardQueryService, ITopicQueryService
+        from ..interfaces import (
+            IBoardQueryService,
+            IPostQueryService,
+            ITopicQueryService,
+        )
         from ..models import Board
         from ..services.board import BoardQueryService
+        from ..services.post import PostQueryService
         from ..services.topic import TopicQueryService
         from ..views.boards import board_show
         from . import mock_service
@@ -135,6 +178,7 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
             self.request,
             {
                 IBoardQueryService: BoardQueryService(self.dbsession),
+                IPostQueryService: PostQueryService(self.dbsession),
                 ITopicQueryService: TopicQueryService(
                     self.dbsession, BoardQueryService(self.dbsession)
                 ),
@@ -145,11 +189,17 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         response = board_show(request)
         self.assertEqual(response["board"], board)
         self.assertEqual(response["topics"], [])
+        self.assertEqual(response["recent_posts"], {})
 
     def test_board_show_not_found(self):
         from sqlalchemy.orm.exc import NoResultFound
-        from ..interfaces import IBoardQueryService, ITopicQueryService
+        from ..interfaces import (
+            IBoardQueryService,
+            IPostQueryService,
+            ITopicQueryService,
+        )
         from ..services.board import BoardQueryService
+        from ..services.post import PostQueryService
         from ..services.topic import TopicQueryService
         from ..views.boards import board_show
         from . import mock_service
@@ -158,6 +208,7 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
             self.request,
             {
                 IBoardQueryService: BoardQueryService(self.dbsession),
+                IPostQueryService: PostQueryService(self.dbsession),
                 ITopicQueryService: TopicQueryService(
                     self.dbsession, BoardQueryService(self.dbsession)
                 ),
@@ -168,6 +219,64 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         with self.assertRaises(NoResultFound):
             board_show(request)
 
+    def test_board_show_not_modified(self):
+        from sqlalchemy.sql import func
+        from ..interfaces import (
+            IBoardQueryService,
+            IPostQueryService,
+            ITopicQueryService,
+        )
+        from ..models import Board, Topic, TopicMeta
+        from ..services.board import BoardQueryService
+        from ..services.post import PostQueryService
+        from ..services.topic import TopicQueryService
+        from ..views.boards import board_show
+        from . import mock_service
+
+        board = self._make(Board(title="Foo", slug="foo"))
+        topic = self._make(Topic(board=board, title="Foo"))
+        topic_meta = self._make(
+            TopicMeta(topic=topic, post_count=0, posted_at=func.now())
+        )
+        self.dbsession.commit()
+
+        post_query_svc = unittest.mock.Mock(wraps=PostQueryService(self.dbsession))
+
+        def _make_request(**headers):
+            request = testing.DummyRequest(headers=headers)
+            request.registry = self.config.registry
+            request.method = "GET"
+            request.matchdict["board"] = board.slug
+            return mock_service(
+                request,
+                {
+                    IBoardQueryService: BoardQueryService(self.dbsession),
+                    IPostQueryService: post_query_svc,
+                    ITopicQueryService: TopicQueryService(
+                        self.dbsession, BoardQueryService(self.dbsession)
+                    ),
+                },
+            )
+
+        request = _make_request()
+        self.assertEqual(board_show(request)["topics"], [topic])
+        etag = request.response.etag
+        self.assertIsNotNone(etag)
+        self.assertTrue(request.response.cache_control.no_cache)
+        self.assertTrue(request.response.cache_control.private)
+        self.assertEqual(post_query_svc.list_recent_from_topic_ids.call_count, 1)
+
+        request = _make_request(**{"If-None-Match": '"%s"' % etag})
+        response = board_show(request)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(post_query_svc.list_recent_from_topic_ids.call_count, 1)
+
+        topic_meta.post_count = 1
+        self.dbsession.commit()
+        request = _make_request(**{"If-None-Match": '"%s"' % etag})
+        self.assertEqual(board_show(request)["topics"], [topic])
+        self.assertNotEqual(request.response.etag, etag)
+
     def test_board_all(self):
         from datetime import timedelta
         from sqlalchemy.sql import func
@@ -239,6 +348,81 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
             ],
         )
 
+    @unittest.mock.patch("fanboi2.services.topic.TOPIC_PAGE_SIZE", 2)
+    def test_board_all_paginated(self):
+        from datetime import timedelta
+        from sqlalchemy.sql import func
+        from ..interfaces import IBoardQueryService, ITopicQueryService
+        from ..models import Board, Topic, TopicMeta
+        from ..services.board import BoardQueryService
+        from ..services.topic import TopicQueryService
+        from ..views.boards import board_all
+        from . import mock_service
+
+        def _make_topic(days=0, **kwargs):
+            topic = self._make(Topic(**kwargs))
+            self._make(
+                TopicMeta(
+                    topic=topic,
+                    post_count=0,
+                    posted_at=func.now(),
+                    bumped_at=func.now() - timedelta(days=days),
+                )
+            )
+            return topic
+
+        board = self._make(Board(title="Foo", slug="foo"))
+        topic1 = _make_topic(board=board, title="Foo")
+        topic2 = _make_topic(days=1, board=board, title="Foo")
+        topic3 = _make_topic(days=2, board=board, title="Foo")
+        self.dbsession.commit()
+        request = mock_service(
+            self.request,
+            {
+                IBoardQueryService: BoardQueryService(self.dbsession),
+                ITopicQueryService: TopicQueryService(
+                    self.dbsession, BoardQueryService(self.dbsession)
+                ),
+            },
+        )
+        request.method = "GET"
+        request.matchdict["board"] = board.slug
+        response = board_all(request)
+        self.assertEqual(response["board"], board)
+        self.assertEqual(response["topics"], [topic1, topic2])
+        self.assertIsNotNone(response["next_cursor"])
+
+        request.params["cursor"] = response["next_cursor"]
+        response = board_all(request)
+        self.assertEqual(response["topics"], [topic3])
+        self.assertIsNone(response["next_cursor"])
+
+    def test_board_all_invalid_cursor(self):
+        from pyramid.httpexceptions import HTTPNotFound
+        from ..interfaces import IBoardQueryService, ITopicQueryService
+        from ..models import Board
+        from ..services.board import BoardQueryService
+        from ..services.topic import TopicQueryService
+        from ..views.boards import board_all
+        from . import mock_service
+
+        board = self._make(Board(title="Foo", slug="foo"))
+        self.dbsession.commit()
+        request = mock_service(
+            self.request,
+            {
+                IBoardQueryService: BoardQueryService(self.dbsession),
+                ITopicQueryService: TopicQueryService(
+                    self.dbsession, BoardQueryService(self.dbsession)
+                ),
+            },
+        )
+        request.method = "GET"
+        request.matchdict["board"] = board.slug
+        request.params["cursor"] = "invalid"
+        with self.assertRaises(HTTPNotFound):
+            board_all(request)
+
     def test_board_all_not_found(self):
         from sqlalchemy.orm.exc import NoResultFound
         from ..interfaces import IBoardQueryService, ITopicQueryService
@@ -552,11 +736,10 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
 
     @unittest.mock.patch("fanboi2.tasks.topic.add_topic.delay")
     def test_board_new_post(self, add_):
+        from fakeredis import FakeStrictRedis
         from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
             IBoardQueryService,
-            IRateLimiterService,
+            IPostingGuardService,
             ITopicCreateService,
         )
         from ..models import Board
@@ -565,6 +748,7 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
             BanwordQueryService,
             BoardQueryService,
             IdentityService,
+            PostingGuardService,
             RateLimiterService,
             ScopeService,
             SettingQueryService,
@@ -572,22 +756,26 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
             UserQueryService,
         )
         from ..views.boards import board_new_post
-        from . import mock_service, make_cache_region, DummyRedis
+        from . import mock_service, make_cache_region
 
         board = self._make(Board(title="Foobar", slug="foo"))
         self.dbsession.commit()
-        redis_conn = DummyRedis()
+        redis_conn = FakeStrictRedis()
         cache_region = make_cache_region()
         rate_limiter_svc = RateLimiterService(redis_conn)
         request = mock_service(
             self.request,
             {
-                IBoardQueryService: BoardQueryService(self.dbsession),
-                IRateLimiterService: rate_limiter_svc,
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    rate_limiter_svc,
                 ),
+                IBoardQueryService: BoardQueryService(self.dbsession),
                 ITopicCreateService: TopicCreateService(
                     self.dbsession,
                     IdentityService(
@@ -735,11 +923,16 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         )
 
     def test_board_new_post_banned(self):
-        from ..interfaces import IBoardQueryService, IBanQueryService
+        from ..interfaces import IBoardQueryService, IPostingGuardService
         from ..models import Board, Topic, Ban
-        from ..services import BoardQueryService, BanQueryService, ScopeService
+        from ..services import (
+            BanQueryService,
+            BoardQueryService,
+            PostingGuardService,
+            ScopeService,
+        )
         from ..views.boards import board_new_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foo"))
         self._make(Ban(ip_address="127.0.0.0/24", scope="board:foo"))
@@ -747,8 +940,14 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    None,
+                    None,
+                ),
                 IBoardQueryService: BoardQueryService(self.dbsession),
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
             },
         )
         request.method = "POST"
@@ -766,11 +965,16 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         self.assertEqual(self.dbsession.query(Topic).count(), 0)
 
     def test_board_new_post_banned_unscoped(self):
-        from ..interfaces import IBoardQueryService, IBanQueryService
+        from ..interfaces import IBoardQueryService, IPostingGuardService
         from ..models import Board, Topic, Ban
-        from ..services import BoardQueryService, BanQueryService, ScopeService
+        from ..services import (
+            BanQueryService,
+            BoardQueryService,
+            PostingGuardService,
+            ScopeService,
+        )
         from ..views.boards import board_new_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foo"))
         self._make(Ban(ip_address="127.0.0.0/24"))
@@ -778,8 +982,14 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    None,
+                    None,
+                ),
                 IBoardQueryService: BoardQueryService(self.dbsession),
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
             },
         )
         request.method = "POST"
@@ -797,20 +1007,17 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         self.assertEqual(self.dbsession.query(Topic).count(), 0)
 
     def test_board_new_post_banword_banned(self):
-        from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
-            IBoardQueryService,
-        )
+        from ..interfaces import IBoardQueryService, IPostingGuardService
         from ..models import Board, Topic, Banword
         from ..services import (
-            BoardQueryService,
             BanQueryService,
             BanwordQueryService,
+            BoardQueryService,
+            PostingGuardService,
             ScopeService,
         )
         from ..views.boards import board_new_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foo"))
         self._make(Banword(expr="https?:\\/\\/bit\\.ly", scope="board:foo"))
@@ -818,11 +1025,16 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
-                IBoardQueryService: BoardQueryService(self.dbsession),
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    None,
                 ),
+                IBoardQueryService: BoardQueryService(self.dbsession),
             },
         )
         request.method = "POST"
@@ -840,20 +1052,17 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         self.assertEqual(self.dbsession.query(Topic).count(), 0)
 
     def test_board_new_post_banword_banned_unscoped(self):
-        from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
-            IBoardQueryService,
-        )
+        from ..interfaces import IBoardQueryService, IPostingGuardService
         from ..models import Board, Topic, Banword
         from ..services import (
-            BoardQueryService,
             BanQueryService,
             BanwordQueryService,
+            BoardQueryService,
+            PostingGuardService,
             ScopeService,
         )
         from ..views.boards import board_new_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foo"))
         self._make(Banword(expr="https?:\\/\\/bit\\.ly"))
@@ -861,11 +1070,16 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
-                IBoardQueryService: BoardQueryService(self.dbsession),
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    None,
                 ),
+                IBoardQueryService: BoardQueryService(self.dbsession),
             },
         )
         request.method = "POST"
@@ -883,36 +1097,37 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         self.assertEqual(self.dbsession.query(Topic).count(), 0)
 
     def test_board_new_post_rate_limited(self):
-        from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
-            IBoardQueryService,
-            IRateLimiterService,
-        )
+        from fakeredis import FakeStrictRedis
+        from ..interfaces import IBoardQueryService, IPostingGuardService
         from ..models import Board, Topic
         from ..services import (
             BanQueryService,
             BanwordQueryService,
             BoardQueryService,
+            PostingGuardService,
             RateLimiterService,
             ScopeService,
         )
         from ..views.boards import board_new_post
-        from . import mock_service, DummyRedis
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foo"))
         self.dbsession.commit()
-        redis_conn = DummyRedis()
+        redis_conn = FakeStrictRedis()
         rate_limiter_svc = RateLimiterService(redis_conn)
         request = mock_service(
             self.request,
             {
-                IBoardQueryService: BoardQueryService(self.dbsession),
-                IRateLimiterService: rate_limiter_svc,
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    rate_limiter_svc,
                 ),
+                IBoardQueryService: BoardQueryService(self.dbsession),
             },
         )
         request.method = "POST"
@@ -991,6 +1206,113 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         self.assertEqual(response["topic"], topic1)
         self.assertEqual(response["posts"], [post1, post2])
 
+    def test_topic_show_get_not_modified(self):
+        from sqlalchemy.sql import func
+        from ..interfaces import (
+            IBoardQueryService,
+            IPostQueryService,
+            ITopicQueryService,
+        )
+        from ..models import Board, Topic, TopicMeta, Post
+        from ..services import BoardQueryService, TopicQueryService, PostQueryService
+        from ..views.boards import topic_show_get
+        from . import mock_service
+
+        board = self._make(Board(title="Foobar", slug="foobar"))
+        topic = self._make(Topic(board=board, title="Demo"))
+        self._make(TopicMeta(topic=topic, post_count=1, posted_at=func.now()))
+        post = self._make(
+            Post(
+                topic=topic,
+                number=1,
+                name="Nameless Fanboi",
+                body="Lorem ipsum",
+                ip_address="127.0.0.1",
+            )
+        )
+        self.dbsession.commit()
+
+        post_query_svc = unittest.mock.Mock(wraps=PostQueryService(self.dbsession))
+        session = {}
+
+        def _make_request(**headers):
+            request = testing.DummyRequest(headers=headers)
+            request.registry = self.config.registry
+            request.session.update(session)
+            request.method = "GET"
+            request.matchdict["board"] = board.slug
+            request.matchdict["topic"] = topic.id
+            return mock_service(
+                request,
+                {
+                    IBoardQueryService: BoardQueryService(self.dbsession),
+                    ITopicQueryService: TopicQueryService(
+                        self.dbsession, BoardQueryService(self.dbsession)
+                    ),
+                    IPostQueryService: post_query_svc,
+                },
+            )
+
+        request = _make_request()
+        self.assertEqual(topic_show_get(request)["posts"], [post])
+        session.update(request.session)
+        etag = request.response.etag
+        self.assertIsNotNone(etag)
+        self.assertTrue(request.response.cache_control.no_cache)
+        self.assertTrue(request.response.cache_control.private)
+        self.assertEqual(post_query_svc.list_from_topic_id.call_count, 1)
+
+        request = _make_request(**{"If-None-Match": '"%s"' % etag})
+        response = topic_show_get(request)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(post_query_svc.list_from_topic_id.call_count, 1)
+
+        session["_csrft_"] = "new_csrf_token"
+        request = _make_request(**{"If-None-Match": '"%s"' % etag})
+        self.assertEqual(topic_show_get(request)["posts"], [post])
+        self.assertNotEqual(request.response.etag, etag)
+
+    def test_topic_show_get_archived(self):
+        from ..interfaces import (
+            IBoardQueryService,
+            IPostQueryService,
+            ITopicQueryService,
+        )
+        from ..models import Board, Topic, Post
+        from ..services import BoardQueryService, TopicQueryService, PostQueryService
+        from ..views.boards import topic_show_get
+        from . import mock_service
+
+        board = self._make(Board(title="Foobar", slug="foobar"))
+        topic = self._make(Topic(board=board, title="Demo", status="archived"))
+        post = self._make(
+            Post(
+                topic=topic,
+                number=1,
+                name="Nameless Fanboi",
+                body="Lorem ipsum",
+                ip_address="127.0.0.1",
+            )
+        )
+        self.dbsession.commit()
+        request = mock_service(
+            self.request,
+            {
+                IBoardQueryService: BoardQueryService(self.dbsession),
+                ITopicQueryService: TopicQueryService(
+                    self.dbsession, BoardQueryService(self.dbsession)
+                ),
+                IPostQueryService: PostQueryService(self.dbsession),
+            },
+        )
+        request.method = "GET"
+        request.matchdict["board"] = board.slug
+        request.matchdict["topic"] = topic.id
+        response = topic_show_get(request)
+        self.assertEqual(response["posts"], [post])
+        self.assertEqual(request.response.cache_control.max_age, 86400)
+        self.assertTrue(request.response.cache_control.private)
+
     def test_topic_show_get_query(self):
         from pyramid.httpexceptions import HTTPNotFound
         from ..interfaces import (
@@ -1500,12 +1822,11 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
 
     @unittest.mock.patch("fanboi2.tasks.post.add_post.delay")
     def test_topic_show_post(self, add_):
+        from fakeredis import FakeStrictRedis
         from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
             IBoardQueryService,
             IPostCreateService,
-            IRateLimiterService,
+            IPostingGuardService,
             ITopicQueryService,
         )
         from ..models import Board, Topic, TopicMeta
@@ -1515,6 +1836,7 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
             BoardQueryService,
             IdentityService,
             PostCreateService,
+            PostingGuardService,
             RateLimiterService,
             ScopeService,
             SettingQueryService,
@@ -1522,27 +1844,31 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
             UserQueryService,
         )
         from ..views.boards import topic_show_post
-        from . import mock_service, make_cache_region, DummyRedis
+        from . import mock_service, make_cache_region
 
         board = self._make(Board(title="Foobar", slug="foobar"))
         topic = self._make(Topic(board=board, title="Foobar"))
         self._make(TopicMeta(topic=topic, post_count=0))
         self.dbsession.commit()
-        redis_conn = DummyRedis()
+        redis_conn = FakeStrictRedis()
         cache_region = make_cache_region()
         rate_limiter_svc = RateLimiterService(redis_conn)
         request = mock_service(
             self.request,
             {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    rate_limiter_svc,
+                ),
                 IBoardQueryService: BoardQueryService(self.dbsession),
                 ITopicQueryService: TopicQueryService(
                     self.dbsession, BoardQueryService(self.dbsession)
                 ),
-                IRateLimiterService: rate_limiter_svc,
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
-                ),
                 IPostCreateService: PostCreateService(
                     self.dbsession,
                     IdentityService(
@@ -1593,6 +1919,84 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
             },
         )
 
+    @unittest.mock.patch("fanboi2.tasks.post.add_post.delay")
+    def test_topic_show_post_direct(self, add_):
+        from fakeredis import FakeStrictRedis
+        from ..interfaces import (
+            IBoardQueryService,
+            IPostCreateService,
+            IPostingGuardService,
+            ITopicQueryService,
+        )
+        from ..models import Board, Topic, TopicMeta, Post, Setting
+        from ..services import (
+            BanQueryService,
+            BanwordQueryService,
+            BoardQueryService,
+            IdentityService,
+            PostCreateService,
+            PostingGuardService,
+            RateLimiterService,
+            RecentPosterService,
+            ScopeService,
+            SettingQueryService,
+            TopicQueryService,
+            UserQueryService,
+        )
+        from ..views.boards import topic_show_post
+        from . import mock_service, make_cache_region
+
+        board = self._make(Board(title="Foobar", slug="foobar"))
+        topic = self._make(Topic(board=board, title="Foobar"))
+        self._make(TopicMeta(topic=topic, post_count=0))
+        self._make(Setting(key="app.post_direct", value=True))
+        self.dbsession.commit()
+        redis_conn = FakeStrictRedis()
+        cache_region = make_cache_region()
+        recent_poster_svc = RecentPosterService(redis_conn, self.dbsession)
+        recent_poster_svc.mark_seen("127.0.0.1")
+        request = mock_service(
+            self.request,
+            {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    RateLimiterService(redis_conn),
+                ),
+                IBoardQueryService: BoardQueryService(self.dbsession),
+                ITopicQueryService: TopicQueryService(
+                    self.dbsession, BoardQueryService(self.dbsession)
+                ),
+                IPostCreateService: PostCreateService(
+                    self.dbsession,
+                    IdentityService(
+                        redis_conn, SettingQueryService(self.dbsession, cache_region)
+                    ),
+                    SettingQueryService(self.dbsession, cache_region),
+                    UserQueryService(self.dbsession),
+                    recent_poster_svc,
+                ),
+            },
+        )
+        request.method = "POST"
+        request.matchdict["board"] = board.slug
+        request.matchdict["topic"] = topic.id
+        request.content_type = "application/x-www-form-urlencoded"
+        request.session = testing.DummySession()
+        request.POST = MultiDict({})
+        request.POST["body"] = "bodyb"
+        request.POST["bumped"] = True
+        request.POST["csrf_token"] = request.session.get_csrf_token()
+        self.config.add_route("topic_scoped", "/{board}/{topic}/{query}")
+        response = topic_show_post(request)
+        self.assertEqual(response.location, "/%s/%s/l10" % (board.slug, topic.id))
+        self.assertEqual(self.dbsession.query(Post).filter_by(topic=topic).count(), 1)
+        self.assertFalse(add_.called)
+
     def test_topic_show_post_bad_csrf(self):
         from pyramid.csrf import BadCSRFToken
         from ..interfaces import IBoardQueryService, ITopicQueryService
@@ -1750,19 +2154,20 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
 
     def test_topic_show_post_banned(self):
         from ..interfaces import (
-            IBanQueryService,
             IBoardQueryService,
+            IPostingGuardService,
             ITopicQueryService,
         )
         from ..models import Board, Topic, TopicMeta, Post, Ban
         from ..services import (
             BanQueryService,
             BoardQueryService,
-            TopicQueryService,
+            PostingGuardService,
             ScopeService,
+            TopicQueryService,
         )
         from ..views.boards import topic_show_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foobar"))
         topic = self._make(Topic(board=board, title="Foobar"))
@@ -1772,11 +2177,17 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    None,
+                    None,
+                ),
                 IBoardQueryService: BoardQueryService(self.dbsession),
                 ITopicQueryService: TopicQueryService(
                     self.dbsession, BoardQueryService(self.dbsession)
                 ),
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
             },
         )
         request.method = "POST"
@@ -1796,19 +2207,20 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
 
     def test_topic_show_post_banned_unscoped(self):
         from ..interfaces import (
-            IBanQueryService,
             IBoardQueryService,
+            IPostingGuardService,
             ITopicQueryService,
         )
         from ..models import Board, Topic, TopicMeta, Post, Ban
         from ..services import (
             BanQueryService,
             BoardQueryService,
-            TopicQueryService,
+            PostingGuardService,
             ScopeService,
+            TopicQueryService,
         )
         from ..views.boards import topic_show_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foobar"))
         topic = self._make(Topic(board=board, title="Foobar"))
@@ -1818,11 +2230,17 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    None,
+                    None,
+                ),
                 IBoardQueryService: BoardQueryService(self.dbsession),
                 ITopicQueryService: TopicQueryService(
                     self.dbsession, BoardQueryService(self.dbsession)
                 ),
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
             },
         )
         request.method = "POST"
@@ -1842,9 +2260,8 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
 
     def test_topic_show_post_banword_banned(self):
         from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
             IBoardQueryService,
+            IPostingGuardService,
             ITopicQueryService,
         )
         from ..models import Board, Topic, TopicMeta, Post, Banword
@@ -1852,11 +2269,12 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
             BanQueryService,
             BanwordQueryService,
             BoardQueryService,
+            PostingGuardService,
             ScopeService,
             TopicQueryService,
         )
         from ..views.boards import topic_show_post
-        from . import mock_service
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foobar"))
         topic = self._make(Topic(board=board, title="Foobar"))
@@ -1866,14 +2284,19 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         request = mock_service(
             self.request,
             {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    None,
+                ),
                 IBoardQueryService: BoardQueryService(self.dbsession),
                 ITopicQueryService: TopicQueryService(
                     self.dbsession, BoardQueryService(self.dbsession)
                 ),
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
-                ),
             },
         )
         request.method = "POST"
@@ -1894,11 +2317,10 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
         self.assertEqual(self.dbsession.query(Post).count(), 0)
 
     def test_topic_show_post_rate_limited(self):
+        from fakeredis import FakeStrictRedis
         from ..interfaces import (
-            IBanQueryService,
-            IBanwordQueryService,
             IBoardQueryService,
-            IRateLimiterService,
+            IPostingGuardService,
             ITopicQueryService,
         )
         from ..models import Board, Topic, TopicMeta, Post
@@ -1906,31 +2328,36 @@ class TestIntegrationBoard(IntegrationMixin, unittest.TestCase):
             BanQueryService,
             BanwordQueryService,
             BoardQueryService,
+            PostingGuardService,
             RateLimiterService,
             ScopeService,
             TopicQueryService,
         )
         from ..views.boards import topic_show_post
-        from . import mock_service, DummyRedis
+        from . import make_cache_region, mock_service
 
         board = self._make(Board(title="Foobar", slug="foobar"))
         topic = self._make(Topic(board=board, title="Foobar"))
         self._make(TopicMeta(topic=topic, post_count=0))
         self.dbsession.commit()
-        redis_conn = DummyRedis()
+        redis_conn = FakeStrictRedis()
         rate_limiter_svc = RateLimiterService(redis_conn)
         request = mock_service(
             self.request,
             {
+                IPostingGuardService: PostingGuardService(
+                    BanQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    BanwordQueryService(
+                        self.dbsession, ScopeService(), make_cache_region()
+                    ),
+                    rate_limiter_svc,
+                ),
                 IBoardQueryService: BoardQueryService(self.dbsession),
                 ITopicQueryService: TopicQueryService(
                     self.dbsession, BoardQueryService(self.dbsession)
                 ),
-                IRateLimiterService: rate_limiter_svc,
-                IBanQueryService: BanQueryService(self.dbsession, ScopeService()),
-                IBanwordQueryService: BanwordQueryService(
-                    self.dbsession, ScopeService()
-                ),
             },
         )
         request.method = "POST"
@@ -81,3 +81,31 @@ class TestPostModel(ModelSessionMixin, unittest.TestCase):
         self.assertEqual(post_1.body, "Foobar baz")
         self.assertEqual(post_1.change_type, "delete")
         self.assertEqual(post_1.version, 1)
+
+    def test_body_formatted_discarded(self):
+        from ..models import Board, Topic, Post
+
+        board = self._make(Board(title="Foobar", slug="foo"))
+        topic = self._make(Topic(board=board, title="Lorem ipsum dolor"))
+        post = self._make(
+            Post(
+                topic=topic,
+                number=1,
+                name="Nameless Fanboi",
+                body="Foobar baz",
+                body_formatted="<p>Foobar baz</p>",
+                body_formatted_version=1,
+                ip_address="127.0.0.1",
+            )
+        )
+        self.dbsession.commit()
+        post.bumped = False
+        self.dbsession.add(post)
+        self.dbsession.commit()
+        self.assertEqual(post.body_formatted, "<p>Foobar baz</p>")
+        self.assertEqual(post.body_formatted_version, 1)
+        post.body = "Foobar baz updated"
+        self.dbsession.add(post)
+        self.dbsession.commit()
+        self.assertIsNone(post.body_formatted)
+        self.assertIsNone(post.body_formatted_version)
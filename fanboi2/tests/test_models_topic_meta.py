@@ -13,3 +13,37 @@ class TestTopicMetaModel(ModelSessionMixin, unittest.TestCase):
         self.dbsession.commit()
         self.assertEqual(topic_meta.topic, topic)
         self.assertEqual(topic_meta, topic.meta)
+
+    def test_bump_key(self):
+        from datetime import datetime, timedelta, timezone
+        from ..models import Board, Topic, TopicMeta
+
+        bumped_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        board = self._make(Board(title="Foobar", slug="foo"))
+        topic = self._make(Topic(board=board, title="Lorem ipsum dolor sit"))
+        topic_meta = self._make(
+            TopicMeta(topic=topic, post_count=1, bumped_at=bumped_at)
+        )
+        self.dbsession.commit()
+        self.assertEqual(topic_meta.board_id, board.id)
+        self.assertEqual(topic_meta.bump_key, bumped_at)
+
+        topic_meta.bumped_at = bumped_at + timedelta(days=1)
+        self.dbsession.add(topic_meta)
+        self.dbsession.commit()
+        self.assertEqual(topic_meta.bump_key, bumped_at + timedelta(days=1))
+
+        topic_meta.post_count = 2
+        self.dbsession.add(topic_meta)
+        self.dbsession.commit()
+        self.assertEqual(topic_meta.bump_key, bumped_at + timedelta(days=1))
+
+    def test_bump_key_without_bumped_at(self):
+        from ..models import Board, Topic, TopicMeta
+
+        board = self._make(Board(title="Foobar", slug="foo"))
+        topic = self._make(Topic(board=board, title="Lorem ipsum dolor sit"))
+        topic_meta = self._make(TopicMeta(topic=topic, post_count=0))
+        self.dbsession.commit()
+        self.assertIsNone(topic_meta.bumped_at)
+        self.assertEqual(topic_meta.bump_key, topic.created_at)
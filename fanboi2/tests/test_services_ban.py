@@ -1,7 +1,7 @@
 import unittest
 import unittest.mock
 
-from . import ModelSessionMixin
+from . import ModelSessionMixin, ModelCommittedSessionMixin, make_cache_region
 
 
 class TestBanCreateService(ModelSessionMixin, unittest.TestCase):
@@ -14,7 +14,7 @@ class TestBanCreateService(ModelSessionMixin, unittest.TestCase):
         import pytz
         from datetime import datetime, timedelta
 
-        ban_create_svc = self._get_target_class()(self.dbsession)
+        ban_create_svc = self._get_target_class()(self.dbsession, make_cache_region())
         ban = ban_create_svc.create(
             "10.0.1.0/24",
             description="Violation of galactic law.",
@@ -32,7 +32,7 @@ class TestBanCreateService(ModelSessionMixin, unittest.TestCase):
         self.assertTrue(ban.active)
 
     def test_create_without_optional_fields(self):
-        ban_create_svc = self._get_target_class()(self.dbsession)
+        ban_create_svc = self._get_target_class()(self.dbsession, make_cache_region())
         ban = ban_create_svc.create("10.0.1.0/24")
         self.assertEqual(ban.ip_address, "10.0.1.0/24")
         self.assertIsNone(ban.description)
@@ -41,7 +41,7 @@ class TestBanCreateService(ModelSessionMixin, unittest.TestCase):
         self.assertTrue(ban.active)
 
     def test_create_with_empty_fields(self):
-        ban_create_svc = self._get_target_class()(self.dbsession)
+        ban_create_svc = self._get_target_class()(self.dbsession, make_cache_region())
         ban = ban_create_svc.create(
             "10.0.1.0/24", description="", duration="", scope="", active=""
         )
@@ -51,10 +51,21 @@ class TestBanCreateService(ModelSessionMixin, unittest.TestCase):
         self.assertFalse(ban.active)
 
     def test_create_deactivated(self):
-        ban_create_svc = self._get_target_class()(self.dbsession)
+        ban_create_svc = self._get_target_class()(self.dbsession, make_cache_region())
         ban = ban_create_svc.create("10.0.1.0/24", active=False)
         self.assertFalse(ban.active)
 
+    def test_create_invalidate_index(self):
+        from ..services.ban import BAN_VERSION_KEY
+
+        cache_region = make_cache_region({})
+        cache_region.set(BAN_VERSION_KEY, "v1")
+        ban_create_svc = self._get_target_class()(self.dbsession, cache_region)
+        ban_create_svc.create("10.0.1.0/24")
+        self.assertEqual(cache_region.get(BAN_VERSION_KEY), "v1")
+        self.dbsession.commit()
+        self.assertNotEqual(cache_region.get(BAN_VERSION_KEY), "v1")
+
 
 class TestBanQueryService(ModelSessionMixin, unittest.TestCase):
     def _get_target_class(self):
@@ -62,12 +73,16 @@ class TestBanQueryService(ModelSessionMixin, unittest.TestCase):
 
         return BanQueryService
 
-    def _make_one(self, retval=True):
+    def _make_one(self, retval=True, cache_region=None):
         class _DummyScopeService(object):
             def evaluate(self, _scope, _obj):
                 return retval
 
-        return self._get_target_class()(self.dbsession, _DummyScopeService())
+        if cache_region is None:
+            cache_region = make_cache_region({})
+        return self._get_target_class()(
+            self.dbsession, _DummyScopeService(), cache_region
+        )
 
     def test_list_active(self):
         from datetime import timedelta
@@ -176,6 +191,66 @@ class TestBanQueryService(ModelSessionMixin, unittest.TestCase):
         self.assertFalse(ban_query_svc.is_banned("10.0.7.255"))
         self.assertFalse(ban_query_svc.is_banned("10.0.8.1"))
 
+    def test_is_banned_longest_prefix(self):
+        from ..models import Ban
+
+        ban1 = self._make(Ban(ip_address="10.0.0.0/8"))
+        ban2 = self._make(Ban(ip_address="10.0.9.0/24"))
+        ban3 = self._make(Ban(ip_address="10.0.9.9/32"))
+        ban4 = self._make(Ban(ip_address="2001:db8::/32"))
+        self.dbsession.commit()
+        ban_query_svc = self._make_one(True)
+        self.assertEqual(ban_query_svc.is_banned("10.0.9.9"), ban3)
+        self.assertEqual(ban_query_svc.is_banned("10.0.9.10"), ban2)
+        self.assertEqual(ban_query_svc.is_banned("10.1.0.1"), ban1)
+        self.assertEqual(ban_query_svc.is_banned("2001:db8::1"), ban4)
+        self.assertIsNone(ban_query_svc.is_banned("11.0.0.1"))
+        self.assertIsNone(ban_query_svc.is_banned("2001:db9::1"))
+
+    def test_is_banned_all(self):
+        from ..models import Ban
+
+        ban = self._make(Ban(ip_address="0.0.0.0/0"))
+        self.dbsession.commit()
+        ban_query_svc = self._make_one(True)
+        self.assertEqual(ban_query_svc.is_banned("192.168.1.1"), ban)
+        self.assertIsNone(ban_query_svc.is_banned("::1"))
+
+    def test_is_banned_expired_after_index(self):
+        from datetime import timedelta
+        from sqlalchemy.sql import func
+        from ..models import Ban
+
+        cache_region = make_cache_region({})
+        ban = self._make(
+            Ban(ip_address="10.0.7.0/24", active_until=func.now() + timedelta(days=1))
+        )
+        self.dbsession.commit()
+        ban_query_svc = self._make_one(True, cache_region)
+        self.assertEqual(ban_query_svc.is_banned("10.0.7.1"), ban)
+        with unittest.mock.patch("fanboi2.services.ban.datetime") as datetime_mock:
+            now = ban.active_until + timedelta(seconds=1)
+            datetime_mock.datetime.now.return_value = now
+            self.assertIsNone(ban_query_svc.is_banned("10.0.7.1"))
+
+    def test_is_banned_invalidated(self):
+        from ..services import BanCreateService, BanUpdateService
+
+        cache_region = make_cache_region({})
+        ban_query_svc = self._make_one(True, cache_region)
+        ban_create_svc = BanCreateService(self.dbsession, cache_region)
+        ban_update_svc = BanUpdateService(self.dbsession, cache_region)
+        self.assertIsNone(ban_query_svc.is_banned("10.0.1.1"))
+        ban = ban_create_svc.create("10.0.1.0/24")
+        self.dbsession.commit()
+        self.assertEqual(ban_query_svc.is_banned("10.0.1.1"), ban)
+        with unittest.mock.patch.object(ban_query_svc, "list_active") as list_fn:
+            self.assertIsNone(ban_query_svc.is_banned("10.0.2.1"))
+            self.assertFalse(list_fn.called)
+        ban_update_svc.update(ban.id, active=False)
+        self.dbsession.commit()
+        self.assertIsNone(ban_query_svc.is_banned("10.0.1.1"))
+
     def test_ban_from_id(self):
         from ..models import Ban
 
@@ -213,7 +288,7 @@ class TestBanUpdateService(ModelSessionMixin, unittest.TestCase):
 
         ban = self._make(Ban(ip_address="10.0.1.0/24"))
         self.dbsession.commit()
-        ban_update_svc = self._get_target_class()(self.dbsession)
+        ban_update_svc = self._get_target_class()(self.dbsession, make_cache_region())
         ban = ban_update_svc.update(
             ban.id,
             ip_address="10.0.2.0/24",
@@ -233,7 +308,7 @@ class TestBanUpdateService(ModelSessionMixin, unittest.TestCase):
     def test_update_not_found(self):
         from sqlalchemy.orm.exc import NoResultFound
 
-        ban_update_svc = self._get_target_class()(self.dbsession)
+        ban_update_svc = self._get_target_class()(self.dbsession, make_cache_region())
         with self.assertRaises(NoResultFound):
             ban_update_svc.update(-1, active=False)
 
@@ -253,7 +328,7 @@ class TestBanUpdateService(ModelSessionMixin, unittest.TestCase):
         )
         self.dbsession.commit()
         active_until = ban.active_until
-        ban_update_svc = self._get_target_class()(self.dbsession)
+        ban_update_svc = self._get_target_class()(self.dbsession, make_cache_region())
         ban = ban_update_svc.update(ban.id, duration=14)
         self.assertEqual(ban.duration, 14)
         self.assertGreater(ban.active_until, active_until)
@@ -274,7 +349,7 @@ class TestBanUpdateService(ModelSessionMixin, unittest.TestCase):
         )
         self.dbsession.commit()
         active_until = ban.active_until
-        ban_update_svc = self._get_target_class()(self.dbsession)
+        ban_update_svc = self._get_target_class()(self.dbsession, make_cache_region())
         ban = ban_update_svc.update(ban.id, duration=7)
         self.assertEqual(ban.active_until, active_until)
 
@@ -285,7 +360,7 @@ class TestBanUpdateService(ModelSessionMixin, unittest.TestCase):
             Ban(ip_address="10.0.1.0/24", description="In a galaxy far away")
         )
         self.dbsession.commit()
-        ban_update_svc = self._get_target_class()(self.dbsession)
+        ban_update_svc = self._get_target_class()(self.dbsession, make_cache_region())
         ban = ban_update_svc.update(ban.id, description=None)
         self.assertIsNone(ban.description)
 
@@ -303,7 +378,7 @@ class TestBanUpdateService(ModelSessionMixin, unittest.TestCase):
             )
         )
         self.dbsession.commit()
-        ban_update_svc = self._get_target_class()(self.dbsession)
+        ban_update_svc = self._get_target_class()(self.dbsession, make_cache_region())
         ban = ban_update_svc.update(
             ban.id, description="", duration="", scope="", active=""
         )
@@ -312,3 +387,31 @@ class TestBanUpdateService(ModelSessionMixin, unittest.TestCase):
         self.assertIsNone(ban.active_until)
         self.assertIsNone(ban.scope)
         self.assertFalse(ban.active)
+
+
+class TestBanServicesCommitted(ModelCommittedSessionMixin, unittest.TestCase):
+    tables = ("ban",)
+
+    def test_is_banned_across_sessions(self):
+        from ..services import (
+            BanCreateService,
+            BanQueryService,
+            BanUpdateService,
+            ScopeService,
+        )
+
+        cache_region = make_cache_region({})
+        dbsession_a = self._make_session()
+        dbsession_b = self._make_session()
+        ban_query_svc = BanQueryService(dbsession_b, ScopeService(), cache_region)
+        ban = BanCreateService(dbsession_a, cache_region).create("10.1.2.0/24")
+        dbsession_a.flush()
+        self.assertIsNone(ban_query_svc.is_banned("10.1.2.3"))
+        dbsession_a.commit()
+        self.assertEqual(ban_query_svc.is_banned("10.1.2.3").id, ban.id)
+
+        BanUpdateService(dbsession_a, cache_region).update(ban.id, active=False)
+        dbsession_a.flush()
+        self.assertIsNotNone(ban_query_svc.is_banned("10.1.2.3"))
+        dbsession_a.commit()
+        self.assertIsNone(ban_query_svc.is_banned("10.1.2.3"))
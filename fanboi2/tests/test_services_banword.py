@@ -1,7 +1,7 @@
 import unittest
 import unittest.mock
 
-from . import ModelSessionMixin
+from . import ModelSessionMixin, ModelCommittedSessionMixin, make_cache_region
 
 
 class TestBanwordCreateService(ModelSessionMixin, unittest.TestCase):
@@ -11,7 +11,9 @@ class TestBanwordCreateService(ModelSessionMixin, unittest.TestCase):
         return BanwordCreateService
 
     def test_create(self):
-        banword_create_svc = self._get_target_class()(self.dbsession)
+        banword_create_svc = self._get_target_class()(
+            self.dbsession, make_cache_region()
+        )
         banword = banword_create_svc.create(
             r"https?:\/\/bit\.ly",
             description="no shortlinks",
@@ -24,14 +26,18 @@ class TestBanwordCreateService(ModelSessionMixin, unittest.TestCase):
         self.assertTrue(banword.active)
 
     def test_create_without_optional_fields(self):
-        banword_create_svc = self._get_target_class()(self.dbsession)
+        banword_create_svc = self._get_target_class()(
+            self.dbsession, make_cache_region()
+        )
         banword = banword_create_svc.create(r"https?:\/\/bit\.ly")
         self.assertIsNone(banword.description)
         self.assertIsNone(banword.scope)
         self.assertTrue(banword.active)
 
     def test_create_with_empty_fields(self):
-        banword_create_svc = self._get_target_class()(self.dbsession)
+        banword_create_svc = self._get_target_class()(
+            self.dbsession, make_cache_region()
+        )
         banword = banword_create_svc.create("", description="", scope="", active="")
         self.assertIsNone(banword.expr)
         self.assertIsNone(banword.description)
@@ -39,10 +45,23 @@ class TestBanwordCreateService(ModelSessionMixin, unittest.TestCase):
         self.assertFalse(banword.active)
 
     def test_create_deactivated(self):
-        banword_create_svc = self._get_target_class()(self.dbsession)
+        banword_create_svc = self._get_target_class()(
+            self.dbsession, make_cache_region()
+        )
         banword = banword_create_svc.create(r"https?:\/\/bit\.ly", active=False)
         self.assertFalse(banword.active)
 
+    def test_create_invalidate_matcher(self):
+        from ..services.banword import BANWORD_VERSION_KEY
+
+        cache_region = make_cache_region({})
+        cache_region.set(BANWORD_VERSION_KEY, "v1")
+        banword_create_svc = self._get_target_class()(self.dbsession, cache_region)
+        banword_create_svc.create(r"https?:\/\/bit\.ly")
+        self.assertEqual(cache_region.get(BANWORD_VERSION_KEY), "v1")
+        self.dbsession.commit()
+        self.assertNotEqual(cache_region.get(BANWORD_VERSION_KEY), "v1")
+
 
 class TestBanwordQueryService(ModelSessionMixin, unittest.TestCase):
     def _get_target_class(self):
@@ -50,12 +69,19 @@ class TestBanwordQueryService(ModelSessionMixin, unittest.TestCase):
 
         return BanwordQueryService
 
-    def _make_one(self, retval=True):
+    def _make_one(self, retval=True, cache_region=None):
         class _DummyScopeService(object):
             def evaluate(self, _scope, _obj):
                 return retval
 
-        return self._get_target_class()(self.dbsession, _DummyScopeService())
+            def evaluate_many(self, scopes, _obj):
+                return [retval for _ in scopes]
+
+        if cache_region is None:
+            cache_region = make_cache_region({})
+        return self._get_target_class()(
+            self.dbsession, _DummyScopeService(), cache_region
+        )
 
     def test_list_active(self):
         from ..models import Banword
@@ -128,6 +154,54 @@ class TestBanwordQueryService(ModelSessionMixin, unittest.TestCase):
         self.assertFalse(banword_query_svc.is_banned("a\nb\nhttps://bit.ly/Spam\nd"))
         self.assertFalse(banword_query_svc.is_banned("a\nb\nhttps://goo.gl/Spam\nd"))
 
+    def test_is_banned_literal_and_regexp(self):
+        from ..models import Banword
+
+        self._make(Banword(expr=r"spam\.com"))
+        self._make(Banword(expr=r"eggs"))
+        self._make(Banword(expr=r"(?i)^HAM$"))
+        self._make(Banword(expr=r"(fo)o\1"))
+        self._make(Banword(expr=r"ba[rz]+"))
+        self.dbsession.commit()
+        banword_query_svc = self._make_one(True)
+        self.assertTrue(banword_query_svc.is_banned("visit spam.com"))
+        self.assertFalse(banword_query_svc.is_banned("visit spamxcom"))
+        self.assertTrue(banword_query_svc.is_banned("green eggs"))
+        self.assertTrue(banword_query_svc.is_banned("ham"))
+        self.assertFalse(banword_query_svc.is_banned("ham and eggz"))
+        self.assertTrue(banword_query_svc.is_banned("foofo"))
+        self.assertFalse(banword_query_svc.is_banned("foof"))
+        self.assertTrue(banword_query_svc.is_banned("bazzz"))
+
+    def test_is_banned_cached(self):
+        from ..models import Banword
+
+        cache_region = make_cache_region({})
+        self._make(Banword(expr=r"https?:\/\/bit\.ly"))
+        self.dbsession.commit()
+        banword_query_svc = self._make_one(True, cache_region)
+        self.assertTrue(banword_query_svc.is_banned("https://bit.ly/Spam"))
+        self._make(Banword(expr=r"https?:\/\/goo\.gl"))
+        self.dbsession.commit()
+        with unittest.mock.patch.object(banword_query_svc, "list_active") as list_fn:
+            self.assertFalse(banword_query_svc.is_banned("https://goo.gl/Spam"))
+            self.assertFalse(list_fn.called)
+
+    def test_is_banned_invalidated(self):
+        from ..services import BanwordCreateService, BanwordUpdateService
+
+        cache_region = make_cache_region({})
+        banword_query_svc = self._make_one(True, cache_region)
+        banword_create_svc = BanwordCreateService(self.dbsession, cache_region)
+        banword_update_svc = BanwordUpdateService(self.dbsession, cache_region)
+        self.assertFalse(banword_query_svc.is_banned("https://bit.ly/Spam"))
+        banword = banword_create_svc.create(r"https?:\/\/bit\.ly")
+        self.dbsession.commit()
+        self.assertTrue(banword_query_svc.is_banned("https://bit.ly/Spam"))
+        banword_update_svc.update(banword.id, active=False)
+        self.dbsession.commit()
+        self.assertFalse(banword_query_svc.is_banned("https://bit.ly/Spam"))
+
     def test_banword_from_id(self):
         from ..models import Banword
 
@@ -155,7 +229,9 @@ class TestBanwordUpdateService(ModelSessionMixin, unittest.TestCase):
             )
         )
         self.dbsession.commit()
-        banword_update_svc = self._get_target_class()(self.dbsession)
+        banword_update_svc = self._get_target_class()(
+            self.dbsession, make_cache_region()
+        )
         banword = banword_update_svc.update(
             banword.id,
             expr=r"https?:\/\/(bit\.ly|goo\.gl)",
@@ -171,7 +247,9 @@ class TestBanwordUpdateService(ModelSessionMixin, unittest.TestCase):
     def test_update_not_found(self):
         from sqlalchemy.orm.exc import NoResultFound
 
-        banword_update_svc = self._get_target_class()(self.dbsession)
+        banword_update_svc = self._get_target_class()(
+            self.dbsession, make_cache_region()
+        )
         with self.assertRaises(NoResultFound):
             banword_update_svc.update(-1, active=False)
 
@@ -187,7 +265,9 @@ class TestBanwordUpdateService(ModelSessionMixin, unittest.TestCase):
             )
         )
         self.dbsession.commit()
-        banword_update_svc = self._get_target_class()(self.dbsession)
+        banword_update_svc = self._get_target_class()(
+            self.dbsession, make_cache_region()
+        )
         banword = banword_update_svc.update(
             banword.id, expr=None, description=None, scope=None, active=None
         )
@@ -208,7 +288,9 @@ class TestBanwordUpdateService(ModelSessionMixin, unittest.TestCase):
             )
         )
         self.dbsession.commit()
-        banword_update_svc = self._get_target_class()(self.dbsession)
+        banword_update_svc = self._get_target_class()(
+            self.dbsession, make_cache_region()
+        )
         banword = banword_update_svc.update(
             banword.id, expr="", description="", scope="", active=""
         )
@@ -216,3 +298,38 @@ class TestBanwordUpdateService(ModelSessionMixin, unittest.TestCase):
         self.assertIsNone(banword.description)
         self.assertIsNone(banword.scope)
         self.assertFalse(banword.active)
+
+
+class TestBanwordServicesCommitted(ModelCommittedSessionMixin, unittest.TestCase):
+    tables = ("banword",)
+
+    def test_is_banned_across_sessions(self):
+        from ..services import (
+            BanwordCreateService,
+            BanwordQueryService,
+            BanwordUpdateService,
+            ScopeService,
+        )
+
+        cache_region = make_cache_region({})
+        dbsession_a = self._make_session()
+        dbsession_b = self._make_session()
+        banword_query_svc = BanwordQueryService(
+            dbsession_b, ScopeService(), cache_region
+        )
+        banword = BanwordCreateService(dbsession_a, cache_region).create(
+            r"https?:\/\/bit\.ly"
+        )
+        dbsession_a.flush()
+        self.assertFalse(banword_query_svc.is_banned("https://bit.ly/Spam"))
+        dbsession_a.commit()
+        self.assertTrue(banword_query_svc.is_banned("https://bit.ly/Spam"))
+
+        BanwordUpdateService(dbsession_a, cache_region).update(
+            banword.id, expr=r"https?:\/\/goo\.gl"
+        )
+        dbsession_a.flush()
+        self.assertTrue(banword_query_svc.is_banned("https://bit.ly/Spam"))
+        dbsession_a.commit()
+        self.assertFalse(banword_query_svc.is_banned("https://bit.ly/Spam"))
+        self.assertTrue(banword_query_svc.is_banned("https://goo.gl/Spam"))
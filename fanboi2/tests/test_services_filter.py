@@ -66,7 +66,7 @@ class TestFilterService(unittest.TestCase):
         self.assertEqual(_payload, {"foo": "bar"})
 
     def test_evaluate_recently_seen(self):
-        from ..interfaces import IPostQueryService
+        from ..interfaces import IRecentPosterService
 
         called_ = False
 
@@ -79,12 +79,13 @@ class TestFilterService(unittest.TestCase):
                 called_ = True
                 return True
 
-        class _DummyPostQueryService(object):
+        class _DummyRecentPosterService(object):
             def was_recently_seen(self, ip_address):
                 return True
 
         filter_svc = self._make_one(
-            (("dummy", _DummyFilter),), {IPostQueryService: _DummyPostQueryService()}
+            (("dummy", _DummyFilter),),
+            {IRecentPosterService: _DummyRecentPosterService()},
         )
 
         results = filter_svc.evaluate({"ip_address": "127.0.0.1"})
@@ -147,3 +148,239 @@ class TestFilterService(unittest.TestCase):
         results = filter_svc.evaluate({"foo": "bar"})
         self.assertEqual(results.filters, ["dummy1", "dummy2"])
         self.assertIsNone(results.rejected_by)
+
+    def test_evaluate_concurrent_reject(self):
+        import threading
+        import time
+        from . import make_cache_region
+        from ..interfaces import ISettingQueryService
+
+        release = threading.Event()
+
+        class _DummyFilterSlow(object):
+            def __init__(self, settings=None, services=None):
+                pass
+
+            def should_reject(self, payload):
+                release.wait(5)
+                return False
+
+        class _DummyFilterTrue(_DummyFilterSlow):
+            def should_reject(self, payload):
+                return True
+
+        class _DummySettingQueryService(object):
+            def value_from_key(self, key, **kwargs):
+                return {}.get(key, None)
+
+        filter_svc = self._make_one(
+            (("dummy1", _DummyFilterSlow), ("dummy2", _DummyFilterTrue)),
+            {
+                "cache": make_cache_region({}),
+                ISettingQueryService: _DummySettingQueryService(),
+            },
+        )
+
+        started_at = time.monotonic()
+        results = filter_svc.evaluate({"foo": "bar"})
+        release.set()
+        self.assertLess(time.monotonic() - started_at, 1)
+        self.assertEqual(results.filters, ["dummy1", "dummy2"])
+        self.assertEqual(results.rejected_by, "dummy2")
+
+    def test_evaluate_timeout(self):
+        import threading
+        from . import make_cache_region
+        from ..interfaces import ISettingQueryService
+
+        release = threading.Event()
+
+        class _DummyFilterSlowTrue(object):
+            def __init__(self, settings=None, services=None):
+                pass
+
+            def should_reject(self, payload):
+                release.wait(5)
+                return True
+
+        class _DummyFilterFalse(_DummyFilterSlowTrue):
+            def should_reject(self, payload):
+                return False
+
+        class _DummySettingQueryService(object):
+            def value_from_key(self, key, **kwargs):
+                return {"ext.filters.timeouts": {"dummy1": 0.1}}.get(key, None)
+
+        filter_svc = self._make_one(
+            (("dummy1", _DummyFilterSlowTrue), ("dummy2", _DummyFilterFalse)),
+            {
+                "cache": make_cache_region({}),
+                ISettingQueryService: _DummySettingQueryService(),
+            },
+        )
+
+        results = filter_svc.evaluate({"foo": "bar"})
+        release.set()
+        self.assertEqual(results.filters, ["dummy1", "dummy2"])
+        self.assertIsNone(results.rejected_by)
+
+    def test_evaluate_deadline(self):
+        import threading
+        import time
+        from . import make_cache_region
+        from ..interfaces import ISettingQueryService
+
+        release = threading.Event()
+
+        class _DummyFilterSlowTrue(object):
+            def __init__(self, settings=None, services=None):
+                pass
+
+            def should_reject(self, payload):
+                release.wait(5)
+                return True
+
+        class _DummySettingQueryService(object):
+            def value_from_key(self, key, **kwargs):
+                return {
+                    "ext.filters.deadline": 0.1,
+                    "ext.filters.timeouts": {"dummy1": 10, "dummy2": 10},
+                }.get(key, None)
+
+        filter_svc = self._make_one(
+            (("dummy1", _DummyFilterSlowTrue), ("dummy2", _DummyFilterSlowTrue)),
+            {
+                "cache": make_cache_region({}),
+                ISettingQueryService: _DummySettingQueryService(),
+            },
+        )
+
+        started_at = time.monotonic()
+        results = filter_svc.evaluate({"foo": "bar"})
+        release.set()
+        self.assertLess(time.monotonic() - started_at, 1)
+        self.assertEqual(results.filters, ["dummy1", "dummy2"])
+        self.assertIsNone(results.rejected_by)
+
+    def test_evaluate_many(self):
+        from . import make_cache_region
+        from ..interfaces import IRecentPosterService, ISettingQueryService
+
+        class _DummyFilter(object):
+            def __init__(self, settings=None, services=None):
+                pass
+
+            def should_reject(self, payload):
+                return payload["body"] == "spam"
+
+        class _DummySettingQueryService(object):
+            def value_from_key(self, key, **kwargs):
+                return None
+
+        class _DummyRecentPosterService(object):
+            def was_recently_seen(self, ip_address):
+                return ip_address == "10.0.0.1"
+
+        filter_svc = self._make_one(
+            (("dummy1", _DummyFilter), ("dummy2", _DummyFilter)),
+            {
+                "cache": make_cache_region({}),
+                ISettingQueryService: _DummySettingQueryService(),
+                IRecentPosterService: _DummyRecentPosterService(),
+            },
+        )
+
+        results = filter_svc.evaluate_many(
+            [
+                {"body": "spam", "ip_address": "10.0.0.2"},
+                {"body": "ham", "ip_address": "10.0.0.2"},
+                {"body": "spam", "ip_address": "10.0.0.1"},
+            ]
+        )
+        self.assertEqual(results[0].rejected_by, "dummy1")
+        self.assertEqual(results[0].filters, ["dummy1", "dummy2"])
+        self.assertIsNone(results[1].rejected_by)
+        self.assertEqual(results[1].filters, ["dummy1", "dummy2"])
+        self.assertIsNone(results[2].rejected_by)
+        self.assertEqual(results[2].filters, [])
+        self.assertEqual(filter_svc.evaluate_many([]), [])
+
+    def test_evaluate_many_deadline(self):
+        import threading
+        import time
+        from . import make_cache_region
+        from ..interfaces import ISettingQueryService
+
+        release = threading.Event()
+
+        class _DummyFilterSlowTrue(object):
+            def __init__(self, settings=None, services=None):
+                pass
+
+            def should_reject(self, payload):
+                release.wait(5)
+                return True
+
+        class _DummySettingQueryService(object):
+            def value_from_key(self, key, **kwargs):
+                return {"ext.filters.deadline": 0.1}.get(key, None)
+
+        filter_svc = self._make_one(
+            (("dummy1", _DummyFilterSlowTrue), ("dummy2", _DummyFilterSlowTrue)),
+            {
+                "cache": make_cache_region({}),
+                ISettingQueryService: _DummySettingQueryService(),
+            },
+        )
+
+        started_at = time.monotonic()
+        results = filter_svc.evaluate_many([{"foo": "bar"}] * 20)
+        release.set()
+        self.assertLess(time.monotonic() - started_at, 1)
+        self.assertEqual(len(results), 20)
+        for result in results:
+            self.assertIsNone(result.rejected_by)
+
+    def test_evaluate_cached(self):
+        from . import make_cache_region
+        from ..interfaces import ISettingQueryService
+        from ..services.filter_ import FILTER_VERSION_KEY
+
+        instances = []
+        settings_calls = []
+
+        class _DummyFilter(object):
+            def __init__(self, settings=None, services=None):
+                self.settings = settings
+                instances.append(self)
+
+            def should_reject(self, payload):
+                return self.settings == "reject"
+
+        class _DummySettingQueryService(object):
+            value = "accept"
+
+            def value_from_key(self, key, **kwargs):
+                settings_calls.append(key)
+                return {"ext.filters.dummy": self.value}.get(key, None)
+
+        setting_query_svc = _DummySettingQueryService()
+        cache_region = make_cache_region({})
+        filter_svc = self._make_one(
+            (("dummy", _DummyFilter),),
+            {"cache": cache_region, ISettingQueryService: setting_query_svc},
+        )
+
+        self.assertIsNone(filter_svc.evaluate({"foo": "bar"}).rejected_by)
+        self.assertIsNone(filter_svc.evaluate({"foo": "bar"}).rejected_by)
+        self.assertEqual(len(instances), 1)
+        settings_calls_count = len(settings_calls)
+
+        setting_query_svc.value = "reject"
+        self.assertIsNone(filter_svc.evaluate({"foo": "bar"}).rejected_by)
+        self.assertEqual(len(instances), 1)
+        self.assertEqual(len(settings_calls), settings_calls_count)
+
+        cache_region.set(FILTER_VERSION_KEY, "updated")
+        self.assertEqual(filter_svc.evaluate({"foo": "bar"}).rejected_by, "dummy")
+        self.assertEqual(len(instances), 2)
@@ -119,3 +119,78 @@ class TestIdentityService(unittest.TestCase):
         self.assertEqual(
             len(identity_svc.identity_with_tz_for("Asia/Bangkok", a="1", b="2")), 5
         )
+
+    @unittest.mock.patch("fanboi2.services.identity.datetime")
+    def test_identity_with_tz_for_hmac(self, datetime_mock):
+        from . import DummyRedis
+
+        class _DummySettingQueryService(object):
+            def value_from_key(self, key, **kwargs):
+                return {"app.ident_size": 10, "app.ident_mode": "hmac"}.get(key, None)
+
+        current_time = datetime.datetime(2018, 12, 9, 17, 0, 0, 0, pytz.utc)
+        datetime_mock.datetime.now.side_effect = lambda tz: current_time.astimezone(tz)
+        tz = "Asia/Bangkok"
+        redis_conn = DummyRedis()
+        identity_svc = self._get_target_class()(
+            redis_conn, _DummySettingQueryService(), "secret"
+        )
+        ident1 = identity_svc.identity_with_tz_for(tz, a="1", b="2")
+        ident2 = identity_svc.identity_with_tz_for(tz, b="2", a="1", timestamp="foo")
+        current_time = datetime.datetime(2018, 12, 10, 16, 59, 59, 0, pytz.utc)
+        ident3 = identity_svc.identity_with_tz_for(tz, a="1", b="2")
+        ident4 = identity_svc.identity_with_tz_for(tz, a="3", b="4")
+        current_time = datetime.datetime(2018, 12, 10, 17, 0, 0, 0, pytz.utc)
+        ident5 = identity_svc.identity_with_tz_for(tz, a="1", b="2")
+        self.assertEqual(ident1, ident2)
+        self.assertEqual(ident1, ident3)
+        self.assertNotEqual(ident1, ident5)
+        self.assertNotEqual(ident3, ident4)
+        self.assertEqual(len(ident1), 10)
+        self.assertEqual(len(ident5), 10)
+        self.assertEqual(redis_conn._store, {})
+        self.assertEqual(redis_conn._expire, {})
+
+        other_identity_svc = self._get_target_class()(
+            redis_conn, _DummySettingQueryService(), "other"
+        )
+        self.assertNotEqual(
+            other_identity_svc.identity_with_tz_for(tz, a="1", b="2"), ident5
+        )
+
+    def test_hmac_identity_for(self):
+        from . import DummyRedis
+        from ..services.identity import STRINGS
+
+        class _DummySettingQueryService(object):
+            def value_from_key(self, key, **kwargs):
+                return {"app.ident_size": 5, "app.ident_mode": "hmac"}.get(key, None)
+
+        identity_svc = self._get_target_class()(
+            DummyRedis(), _DummySettingQueryService(), b"secret"
+        )
+        ident = identity_svc.hmac_identity_for(a="1", b="2")
+        self.assertEqual(ident, identity_svc.hmac_identity_for(b="2", a="1"))
+        self.assertEqual(len(ident), 5)
+        self.assertTrue(all(c in STRINGS for c in ident))
+
+    def test_init_hmac_without_secret(self):
+        from . import DummyRedis
+
+        class _DummySettingQueryService(object):
+            def value_from_key(self, key, **kwargs):
+                return {"app.ident_size": 10, "app.ident_mode": "hmac"}.get(key, None)
+
+        redis_conn = DummyRedis(
+            time=datetime.datetime(2001, 1, 1, 0, 0, 0, tzinfo=pytz.utc)
+        )
+        with self.assertLogs("fanboi2.services.identity", "WARNING"):
+            identity_svc = self._get_target_class()(
+                redis_conn, _DummySettingQueryService()
+            )
+        self.assertEqual(identity_svc.ident_mode, "stored")
+        ident = identity_svc.identity_with_tz_for("UTC", a="hello")
+        self.assertEqual(
+            redis_conn.get("services.identity:a=hello,timestamp=20010101"),
+            ident.encode("utf-8"),
+        )
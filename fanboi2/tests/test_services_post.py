@@ -12,7 +12,7 @@ class TestPostCreateService(ModelSessionMixin, unittest.TestCase):
 
         return PostCreateService
 
-    def _make_one(self):
+    def _make_one(self, recent_poster_svc=None, prerender_fn=None):
         from ..services import UserQueryService
 
         class _DummyIdentityService(object):
@@ -28,8 +28,18 @@ class TestPostCreateService(ModelSessionMixin, unittest.TestCase):
             _DummyIdentityService(),
             _DummySettingQueryService(),
             UserQueryService(self.dbsession),
+            recent_poster_svc,
+            prerender_fn=prerender_fn,
         )
 
+    def _make_prerender_fn(self, calls):
+        def _prerender(post, topic):
+            calls.append((post.number, topic.id))
+            post.body_formatted = "<p>%s</p>" % (post.body,)
+            post.body_formatted_version = 1
+
+        return _prerender
+
     def test_create(self):
         from ..models import Board, Topic, TopicMeta
 
@@ -52,6 +62,40 @@ class TestPostCreateService(ModelSessionMixin, unittest.TestCase):
         self.assertEqual(topic_meta.post_count, 1)
         self.assertIsNotNone(topic_meta.bumped_at)
 
+    def test_create_prerender(self):
+        from ..models import Board, Topic, TopicMeta
+
+        board = self._make(Board(slug="foo", title="Foo"))
+        topic = self._make(Topic(board=board, title="Hello", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=0))
+        self.dbsession.commit()
+        calls = []
+        post_create_svc = self._make_one(prerender_fn=self._make_prerender_fn(calls))
+        post = post_create_svc.create(topic.id, "Hello!", True, "127.0.0.1")
+        self.dbsession.commit()
+        self.assertEqual(calls, [(None, topic.id)])
+        self.assertEqual(post.number, 1)
+        self.assertEqual(post.body_formatted, "<p>Hello!</p>")
+        self.assertEqual(post.body_formatted_version, 1)
+        self.assertEqual(post.version, 1)
+
+    def test_create_mark_seen(self):
+        from fakeredis import FakeStrictRedis
+        from ..models import Board, Topic, TopicMeta
+        from ..services import RecentPosterService
+
+        board = self._make(Board(slug="foo", title="Foo"))
+        topic = self._make(Topic(board=board, title="Hello", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=0))
+        self.dbsession.commit()
+        recent_poster_svc = RecentPosterService(FakeStrictRedis(), self.dbsession)
+        post_create_svc = self._make_one(recent_poster_svc)
+        self.assertFalse(recent_poster_svc.was_recently_seen("127.0.0.1"))
+        post_create_svc.create(topic.id, "Hello!", True, "127.0.0.1")
+        self.assertFalse(recent_poster_svc.was_recently_seen("127.0.0.1"))
+        self.dbsession.commit()
+        self.assertTrue(recent_poster_svc.was_recently_seen("127.0.0.1"))
+
     def test_create_ipv6(self):
         from ..models import Board, Topic, TopicMeta
 
@@ -119,6 +163,73 @@ class TestPostCreateService(ModelSessionMixin, unittest.TestCase):
         self.assertEqual(topic_meta.post_count, 10)
         self.assertEqual(topic.status, "archived")
 
+    def test_create_topic_full(self):
+        from ..errors import StatusRejectedError
+        from ..models import Board, Topic, TopicMeta
+
+        board = self._make(Board(slug="foo", title="Foo", settings={"max_posts": 10}))
+        topic = self._make(Topic(board=board, title="Hello", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=10))
+        self.dbsession.commit()
+        post_create_svc = self._make_one()
+        with self.assertRaises(StatusRejectedError) as cm:
+            post_create_svc.create(topic.id, "Hello!", True, "127.0.0.1")
+        self.assertEqual(cm.exception.status, "archived")
+        topic_meta = self.dbsession.query(TopicMeta).get(topic.id)
+        self.assertEqual(topic_meta.post_count, 10)
+        self.assertEqual(topic.status, "archived")
+
+    def test_create_topic_limit_lowered(self):
+        from ..errors import StatusRejectedError
+        from ..models import Board, Topic, TopicMeta
+
+        board = self._make(Board(slug="foo", title="Foo", settings={"max_posts": 5}))
+        topic = self._make(Topic(board=board, title="Hello", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=8))
+        self.dbsession.commit()
+        post_create_svc = self._make_one()
+        with self.assertRaises(StatusRejectedError) as cm:
+            post_create_svc.create(topic.id, "Hello!", True, "127.0.0.1")
+        self.assertEqual(cm.exception.status, "archived")
+        self.dbsession.flush()
+        self.dbsession.refresh(topic)
+        self.assertEqual(topic.status, "archived")
+        topic_meta = self.dbsession.query(TopicMeta).get(topic.id)
+        self.assertEqual(topic_meta.post_count, 8)
+
+    def test_create_topic_status_changed(self):
+        from ..errors import StatusRejectedError
+        from ..models import Board, Topic, TopicMeta
+
+        board = self._make(Board(slug="foo", title="Foo"))
+        topic = self._make(Topic(board=board, title="Hello", status="open"))
+        topic_meta = self._make(TopicMeta(topic=topic, post_count=0))
+        self.dbsession.commit()
+        post_create_svc = self._make_one()
+        board, topic = post_create_svc._prepare_c(topic.id, ("open",), ("open",))
+        self.dbsession.execute(
+            Topic.__table__.update()
+            .values(status="locked")
+            .where(Topic.__table__.c.id == topic.id)
+        )
+        with self.assertRaises(StatusRejectedError) as cm:
+            post_create_svc._allocate_number(board, topic, True, ("open",), ("open",))
+        self.assertEqual(cm.exception.status, "locked")
+        self.assertEqual(topic_meta.post_count, 0)
+
+    def test_create_topic_meta_loaded(self):
+        from ..models import Board, Topic, TopicMeta
+
+        board = self._make(Board(slug="foo", title="Foo"))
+        topic = self._make(Topic(board=board, title="Hello", status="open"))
+        topic_meta = self._make(TopicMeta(topic=topic, post_count=0))
+        self.dbsession.commit()
+        self.assertEqual(topic_meta.post_count, 0)
+        post_create_svc = self._make_one()
+        post = post_create_svc.create(topic.id, "Hello!", True, "127.0.0.1")
+        self.assertEqual(post.number, 1)
+        self.assertEqual(topic_meta.post_count, 1)
+
     def test_create_topic_locked(self):
         from ..errors import StatusRejectedError
         from ..models import Board, Topic, TopicMeta
@@ -178,6 +289,163 @@ class TestPostCreateService(ModelSessionMixin, unittest.TestCase):
         with self.assertRaises(StatusRejectedError):
             post_create_svc.create(topic.id, "Hello!", True, "127.0.0.1")
 
+    def test_create_direct(self):
+        from fakeredis import FakeStrictRedis
+        from ..models import Board, Topic, TopicMeta
+        from ..services import RecentPosterService, UserQueryService
+
+        class _DummySettingQueryService(object):
+            def value_from_key(self, key, **kwargs):
+                return {"app.post_direct": True}.get(key, None)
+
+        board = self._make(
+            Board(slug="foo", title="Foo", settings={"use_ident": False})
+        )
+        topic = self._make(Topic(board=board, title="Hello", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=0))
+        self.dbsession.commit()
+        recent_poster_svc = RecentPosterService(FakeStrictRedis(), self.dbsession)
+        post_create_svc = self._get_target_class()(
+            self.dbsession,
+            None,
+            _DummySettingQueryService(),
+            UserQueryService(self.dbsession),
+            recent_poster_svc,
+        )
+        self.assertIsNone(
+            post_create_svc.create_direct(topic.id, "Hello!", True, "127.0.0.1")
+        )
+        recent_poster_svc.mark_seen("127.0.0.1")
+        post = post_create_svc.create_direct(topic.id, "Hello!", True, "127.0.0.1")
+        self.assertIsNotNone(post.id)
+        self.assertEqual(post.number, 1)
+        self.assertEqual(post.topic, topic)
+
+    def test_create_direct_disabled(self):
+        from fakeredis import FakeStrictRedis
+        from ..models import Board, Topic, TopicMeta
+        from ..services import RecentPosterService
+
+        board = self._make(Board(slug="foo", title="Foo"))
+        topic = self._make(Topic(board=board, title="Hello", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=0))
+        self.dbsession.commit()
+        recent_poster_svc = RecentPosterService(FakeStrictRedis(), self.dbsession)
+        recent_poster_svc.mark_seen("127.0.0.1")
+        post_create_svc = self._make_one(recent_poster_svc)
+        self.assertIsNone(
+            post_create_svc.create_direct(topic.id, "Hello!", True, "127.0.0.1")
+        )
+
+    def test_create_many(self):
+        from ..models import Board, Topic, TopicMeta
+
+        board = self._make(Board(slug="foo", title="Foo"))
+        topic = self._make(Topic(board=board, title="Hello", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=2))
+        self.dbsession.commit()
+        post_create_svc = self._make_one()
+        posts = post_create_svc.create_many(
+            topic.id,
+            [("Hello", False, "127.0.0.1"), ("World", False, "fe80:c9cd::1")],
+        )
+        self.assertEqual([p.number for p in posts], [3, 4])
+        self.assertEqual([p.body for p in posts], ["Hello", "World"])
+        self.assertEqual([p.body_formatted for p in posts], [None, None])
+        self.assertEqual(posts[0].ident, "foo,127.0.0.1")
+        self.assertEqual(posts[1].ident, "foo,fe80:c9cd::/64")
+        self.assertEqual(posts[1].ident_type, "ident_v6")
+        topic_meta = self.dbsession.query(TopicMeta).get(topic.id)
+        self.assertEqual(topic_meta.post_count, 4)
+        self.assertIsNone(topic_meta.bumped_at)
+
+    def test_create_many_prerender(self):
+        from ..models import Board, Topic, TopicMeta
+
+        board = self._make(Board(slug="foo", title="Foo"))
+        topic = self._make(Topic(board=board, title="Hello", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=0))
+        self.dbsession.commit()
+        calls = []
+        post_create_svc = self._make_one(prerender_fn=self._make_prerender_fn(calls))
+        posts = post_create_svc.create_many(
+            topic.id,
+            [("Hello", False, "127.0.0.1"), ("World", False, "127.0.0.1")],
+        )
+        self.dbsession.commit()
+        self.assertEqual(calls, [(None, topic.id), (None, topic.id)])
+        self.assertEqual(
+            [p.body_formatted for p in posts], ["<p>Hello</p>", "<p>World</p>"]
+        )
+        self.assertEqual([p.version for p in posts], [1, 1])
+
+    def test_create_many_topic_limit(self):
+        from ..errors import StatusRejectedError
+        from ..models import Board, Topic, TopicMeta
+
+        board = self._make(Board(slug="foo", title="Foo", settings={"max_posts": 10}))
+        topic = self._make(Topic(board=board, title="Hello", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=8))
+        self.dbsession.commit()
+        post_create_svc = self._make_one()
+        posts = post_create_svc.create_many(
+            topic.id,
+            [
+                ("Hello", True, "127.0.0.1"),
+                ("World", True, "127.0.0.1"),
+                ("Again", True, "127.0.0.1"),
+            ],
+        )
+        self.assertEqual([p.number for p in posts[:2]], [9, 10])
+        self.assertIsInstance(posts[2], StatusRejectedError)
+        self.assertEqual(posts[2].status, "archived")
+        topic = self.dbsession.query(Topic).get(topic.id)
+        topic_meta = self.dbsession.query(TopicMeta).get(topic.id)
+        self.assertEqual(topic_meta.post_count, 10)
+        self.assertEqual(topic.status, "archived")
+
+    def test_create_many_topic_locked(self):
+        from ..errors import StatusRejectedError
+        from ..models import Board, Topic, TopicMeta
+
+        board = self._make(Board(slug="foo", title="Foo"))
+        topic = self._make(Topic(board=board, title="Hello", status="locked"))
+        self._make(TopicMeta(topic=topic, post_count=0))
+        self.dbsession.commit()
+        post_create_svc = self._make_one()
+        posts = post_create_svc.create_many(
+            topic.id, [("Hello", True, "127.0.0.1"), ("World", True, "127.0.0.1")]
+        )
+        self.assertEqual(len(posts), 2)
+        for post in posts:
+            self.assertIsInstance(post, StatusRejectedError)
+            self.assertEqual(post.status, "locked")
+
+    @unittest.mock.patch("fanboi2.tasks.post.add_posts.apply_async")
+    @unittest.mock.patch("fanboi2.services.post.add_post.delay")
+    def test_enqueue_batched(self, delay, apply_async):
+        from fakeredis import FakeStrictRedis
+        from ..services import UserQueryService
+
+        class _DummySettingQueryService(object):
+            def value_from_key(self, key, **kwargs):
+                return {"app.post_batch_window": 0.5}.get(key, None)
+
+        redis_conn = FakeStrictRedis()
+        post_create_svc = self._get_target_class()(
+            self.dbsession,
+            None,
+            _DummySettingQueryService(),
+            UserQueryService(self.dbsession),
+            None,
+            redis_conn,
+        )
+        task = post_create_svc.enqueue(1, "Hello", True, "127.0.0.1", {})
+        self.assertIsNotNone(task.id)
+        self.assertEqual(redis_conn.llen("tasks.post:batch:topic_id=1"), 1)
+        apply_async.assert_called_once_with((1,), countdown=0.5)
+        delay.assert_not_called()
+
     def test_create_with_user(self):
         from ..models import Board, Topic, TopicMeta, User
 
@@ -211,6 +479,32 @@ class TestPostCreateService(ModelSessionMixin, unittest.TestCase):
         self.assertEqual(topic_meta.post_count, 1)
         self.assertIsNotNone(topic_meta.bumped_at)
 
+    def test_create_with_user_prerender(self):
+        from ..models import Board, Topic, TopicMeta, User
+
+        board = self._make(Board(slug="foo", title="Foo"))
+        topic = self._make(Topic(board=board, title="Hello", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=0))
+        user = self._make(
+            User(
+                username="root",
+                encrypted_password="foobar",
+                ident="fooident",
+                ident_type="ident_admin",
+                name="Root",
+            )
+        )
+        self.dbsession.commit()
+        calls = []
+        post_create_svc = self._make_one(prerender_fn=self._make_prerender_fn(calls))
+        post = post_create_svc.create_with_user(
+            topic.id, user.id, "Hello!", True, "127.0.0.1"
+        )
+        self.dbsession.commit()
+        self.assertEqual(calls, [(None, topic.id)])
+        self.assertEqual(post.body_formatted, "<p>Hello!</p>")
+        self.assertEqual(post.version, 1)
+
     def test_create_with_user_without_bumped(self):
         from ..models import Board, Topic, TopicMeta, User
 
@@ -481,6 +775,31 @@ class TestPostDeleteService(ModelSessionMixin, unittest.TestCase):
         self.assertFalse(inspect(post1).was_deleted)
         self.assertTrue(inspect(post2).was_deleted)
         self.assertFalse(inspect(post3).was_deleted)
+        self.dbsession.refresh(topic)
+        self.assertIsNotNone(topic.updated_at)
+        self.assertEqual(topic.version, 1)
+
+    def test_delete_from_topic_id_cached(self):
+        from ..helpers import formatters
+        from ..models import Board, Topic, TopicMeta, Post
+
+        board = self._make(Board(slug="foo", title="Foobar"))
+        topic = self._make(Topic(board=board, title="Foobar Baz"))
+        self._make(TopicMeta(topic=topic, post_count=1))
+        post = self._make(
+            Post(
+                topic=topic,
+                number=1,
+                name="Nameless Foobar",
+                body="Foobar Baz",
+                ip_address="127.0.0.1",
+            )
+        )
+        self.dbsession.commit()
+        formatters._post_cache[(post.id, post.version)] = {None: "<p>Foobar</p>"}
+        post_delete_svc = self._get_target_class()(self.dbsession)
+        post_delete_svc.delete_from_topic_id(topic.id, 1)
+        self.assertNotIn((post.id, post.version), formatters._post_cache)
 
     def test_delete_from_topic_id_not_found(self):
         from sqlalchemy.orm.exc import NoResultFound
@@ -586,46 +905,122 @@ class TestPostQueryService(ModelSessionMixin, unittest.TestCase):
         with self.assertRaises(NoResultFound):
             post_query_svc.list_from_topic_id(-1)
 
-    def test_was_recently_seen(self):
-        from datetime import timedelta
-        from sqlalchemy.sql import func
+    def test_list_recent_from_topic_ids(self):
         from ..models import Board, Topic, TopicMeta, Post
 
         board = self._make(Board(slug="foo", title="Foo"))
-        topic = self._make(Topic(board=board, title="Foo", status="open"))
-        self._make(TopicMeta(topic=topic, post_count=1))
+        topics = []
+        posts = []
+        for count in (7, 2, 0):
+            topic = self._make(Topic(board=board, title="Foo", status="open"))
+            self._make(TopicMeta(topic=topic, post_count=count))
+            topics.append(topic)
+            posts.append(
+                [
+                    self._make(
+                        Post(
+                            topic=topic,
+                            number=i + 1,
+                            name="Nameless Fanboi",
+                            body="Foobar",
+                            ip_address="127.0.0.1",
+                        )
+                    )
+                    for i in range(count)
+                ]
+            )
+        topic4 = self._make(Topic(board=board, title="Bar", status="open"))
+        self._make(TopicMeta(topic=topic4, post_count=1))
         self._make(
             Post(
-                topic=topic,
+                topic=topic4,
                 number=1,
                 name="Nameless Fanboi",
                 body="Hi",
                 ip_address="127.0.0.1",
-                created_at=func.now() - timedelta(days=2),
             )
         )
         self.dbsession.commit()
         post_query_svc = self._get_target_class()(self.dbsession)
-        self.assertTrue(post_query_svc.was_recently_seen("127.0.0.1"))
+        self.assertEqual(
+            post_query_svc.list_recent_from_topic_ids([t.id for t in topics], count=5),
+            {
+                topics[0].id: posts[0][2:],
+                topics[1].id: posts[1],
+                topics[2].id: [],
+            },
+        )
+        self.assertEqual(
+            post_query_svc.list_recent_from_topic_ids([topics[0].id]),
+            {topics[0].id: posts[0]},
+        )
+
+    def test_list_recent_from_topic_ids_single_query(self):
+        from sqlalchemy import event
+        from ..models import Board, Topic, TopicMeta, Post
+
+        board = self._make(Board(slug="foo", title="Foo"))
+        topics = []
+        for _ in range(10):
+            topic = self._make(Topic(board=board, title="Foo", status="open"))
+            self._make(TopicMeta(topic=topic, post_count=1))
+            self._make(
+                Post(
+                    topic=topic,
+                    number=1,
+                    name="Nameless Fanboi",
+                    body="Foobar",
+                    ip_address="127.0.0.1",
+                )
+            )
+            topics.append(topic)
+        self.dbsession.commit()
+        topic_ids = [topic.id for topic in topics]
+        self.dbsession.expunge_all()
+
+        queries = []
+
+        @event.listens_for(self.connection, "before_cursor_execute")
+        def _count(conn, cursor, statement, *args):
+            queries.append(statement)
+
+        self.addCleanup(event.remove, self.connection, "before_cursor_execute", _count)
+        post_query_svc = self._get_target_class()(self.dbsession)
+        results = post_query_svc.list_recent_from_topic_ids(topic_ids, count=5)
+        self.assertEqual(len([q for q in queries if q.startswith("SELECT")]), 1)
+        self.assertEqual(sorted(results.keys()), sorted(topic_ids))
+
+    def test_list_recent_from_topic_ids_empty(self):
+        post_query_svc = self._get_target_class()(self.dbsession)
+        self.assertEqual(post_query_svc.list_recent_from_topic_ids([]), {})
 
-    def test_was_recently_seen_not_recent(self):
-        from datetime import timedelta
-        from sqlalchemy.sql import func
+    def test_list_unformatted(self):
         from ..models import Board, Topic, TopicMeta, Post
 
         board = self._make(Board(slug="foo", title="Foo"))
         topic = self._make(Topic(board=board, title="Foo", status="open"))
-        self._make(TopicMeta(topic=topic, post_count=1))
-        self._make(
-            Post(
-                topic=topic,
-                number=1,
-                name="Nameless Fanboi",
-                body="Hi",
-                ip_address="127.0.0.1",
-                created_at=func.now() - timedelta(days=4),
+        self._make(TopicMeta(topic=topic, post_count=4))
+        posts = []
+        for i, version in enumerate((None, 1, 2, None)):
+            posts.append(
+                self._make(
+                    Post(
+                        topic=topic,
+                        number=i + 1,
+                        name="Nameless Fanboi",
+                        body="Foobar",
+                        body_formatted=None if version is None else "<p>Foobar</p>",
+                        body_formatted_version=version,
+                        ip_address="127.0.0.1",
+                    )
+                )
             )
-        )
         self.dbsession.commit()
         post_query_svc = self._get_target_class()(self.dbsession)
-        self.assertFalse(post_query_svc.was_recently_seen("127.0.0.1"))
+        self.assertEqual(
+            post_query_svc.list_unformatted(2), [posts[0], posts[1], posts[3]]
+        )
+        self.assertEqual(post_query_svc.list_unformatted(2, limit=1), [posts[0]])
+        self.assertEqual(
+            post_query_svc.list_unformatted(2, after_id=posts[1].id), [posts[3]]
+        )
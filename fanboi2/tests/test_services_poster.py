@@ -0,0 +1,115 @@
+import unittest
+import unittest.mock
+
+from . import ModelSessionMixin
+
+
+class TestRecentPosterService(ModelSessionMixin, unittest.TestCase):
+    def _get_target_class(self):
+        from ..services import RecentPosterService
+
+        return RecentPosterService
+
+    def _make_one(self, redis_conn=None):
+        from fakeredis import FakeStrictRedis
+
+        if redis_conn is None:
+            redis_conn = FakeStrictRedis()
+        return self._get_target_class()(redis_conn, self.dbsession)
+
+    def test_was_recently_seen(self):
+        recent_poster_svc = self._make_one()
+        self.assertFalse(recent_poster_svc.was_recently_seen("127.0.0.1"))
+        recent_poster_svc.mark_seen("127.0.0.1")
+        self.assertTrue(recent_poster_svc.was_recently_seen("127.0.0.1"))
+        self.assertFalse(recent_poster_svc.was_recently_seen("127.0.0.2"))
+
+    def test_mark_seen_on_commit(self):
+        recent_poster_svc = self._make_one()
+        recent_poster_svc.mark_seen_on_commit("127.0.0.1")
+        self.assertFalse(recent_poster_svc.was_recently_seen("127.0.0.1"))
+        self.dbsession.commit()
+        self.assertTrue(recent_poster_svc.was_recently_seen("127.0.0.1"))
+        self.dbsession.rollback()
+        self.assertTrue(recent_poster_svc.was_recently_seen("127.0.0.1"))
+
+    def test_mark_seen_on_commit_rollback(self):
+        recent_poster_svc = self._make_one()
+        recent_poster_svc.mark_seen_on_commit("127.0.0.1")
+        self.dbsession.rollback()
+        self.dbsession.commit()
+        self.assertFalse(recent_poster_svc.was_recently_seen("127.0.0.1"))
+
+    @unittest.mock.patch("fanboi2.services.poster.time.time")
+    def test_was_recently_seen_not_recent(self, time_call):
+        from fakeredis import FakeStrictRedis
+        from ..services.poster import RECENT_POSTERS_KEY
+
+        redis_conn = FakeStrictRedis()
+        recent_poster_svc = self._make_one(redis_conn)
+        time_call.return_value = 1000000
+        recent_poster_svc.mark_seen("127.0.0.1")
+        time_call.return_value = 1000000 + 86400 * 3
+        self.assertTrue(recent_poster_svc.was_recently_seen("127.0.0.1"))
+        time_call.return_value = 1000000 + 86400 * 3 + 1
+        self.assertFalse(recent_poster_svc.was_recently_seen("127.0.0.1"))
+        recent_poster_svc.mark_seen("127.0.0.2")
+        self.assertIsNone(redis_conn.zscore(RECENT_POSTERS_KEY, "127.0.0.1"))
+        self.assertIsNotNone(redis_conn.zscore(RECENT_POSTERS_KEY, "127.0.0.2"))
+
+    def test_backfill(self):
+        from datetime import timedelta
+        from sqlalchemy.sql import func
+        from ..models import Board, Topic, TopicMeta, Post
+
+        board = self._make(Board(slug="foo", title="Foo"))
+        topic = self._make(Topic(board=board, title="Foo", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=3))
+        for number, ip_address, days in (
+            (1, "127.0.0.1", 2),
+            (2, "127.0.0.1", 1),
+            (3, "127.0.0.2", 4),
+        ):
+            self._make(
+                Post(
+                    topic=topic,
+                    number=number,
+                    name="Nameless Fanboi",
+                    body="Hi",
+                    ip_address=ip_address,
+                    created_at=func.now() - timedelta(days=days),
+                )
+            )
+        self.dbsession.commit()
+        recent_poster_svc = self._make_one()
+        self.assertEqual(recent_poster_svc.backfill(), 1)
+        self.assertTrue(recent_poster_svc.was_recently_seen("127.0.0.1"))
+        self.assertFalse(recent_poster_svc.was_recently_seen("127.0.0.2"))
+
+    def test_backfill_keep_newer(self):
+        from datetime import timedelta
+        from fakeredis import FakeStrictRedis
+        from sqlalchemy.sql import func
+        from ..models import Board, Topic, TopicMeta, Post
+        from ..services.poster import RECENT_POSTERS_KEY
+
+        board = self._make(Board(slug="foo", title="Foo"))
+        topic = self._make(Topic(board=board, title="Foo", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=1))
+        self._make(
+            Post(
+                topic=topic,
+                number=1,
+                name="Nameless Fanboi",
+                body="Hi",
+                ip_address="127.0.0.1",
+                created_at=func.now() - timedelta(days=2),
+            )
+        )
+        self.dbsession.commit()
+        redis_conn = FakeStrictRedis()
+        recent_poster_svc = self._make_one(redis_conn)
+        recent_poster_svc.mark_seen("127.0.0.1")
+        score = redis_conn.zscore(RECENT_POSTERS_KEY, "127.0.0.1")
+        recent_poster_svc.backfill()
+        self.assertEqual(redis_conn.zscore(RECENT_POSTERS_KEY, "127.0.0.1"), score)
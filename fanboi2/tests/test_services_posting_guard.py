@@ -0,0 +1,150 @@
+import unittest
+import unittest.mock
+
+
+class _DummyQueryService(object):
+    def __init__(self, banned=False):
+        self.banned = banned
+        self.calls = []
+
+    def is_banned(self, value, scopes=None):
+        self.calls.append((value, scopes))
+        return self.banned
+
+
+class TestPostingGuardService(unittest.TestCase):
+    def _get_target_class(self):
+        from ..services import PostingGuardService
+
+        return PostingGuardService
+
+    def _make_board(self, **kwargs):
+        from ..models import Board
+
+        return Board(slug="foo", title="Foo", settings=kwargs)
+
+    def _make_rate_limiter(self):
+        from fakeredis import FakeStrictRedis
+        from ..services import RateLimiterService
+
+        return RateLimiterService(FakeStrictRedis())
+
+    def test_check(self):
+        from ..services.posting_guard import VerdictType
+
+        ban_query_svc = _DummyQueryService()
+        banword_query_svc = _DummyQueryService()
+        rate_limiter_svc = self._make_rate_limiter()
+        board = self._make_board(
+            post_delay=10, post_delay_threshold=0, post_delay_period=0
+        )
+        posting_guard_svc = self._get_target_class()(
+            ban_query_svc, banword_query_svc, rate_limiter_svc
+        )
+        scopes = {"board": "foo"}
+        verdict = posting_guard_svc.check(board, "10.0.0.1", "Hello", scopes=scopes)
+        self.assertTrue(verdict.ok)
+        self.assertEqual(verdict.type, VerdictType.OK)
+        self.assertIsNone(verdict.name)
+        self.assertIsNone(verdict.error())
+        self.assertEqual(ban_query_svc.calls, [("10.0.0.1", scopes)])
+        self.assertEqual(banword_query_svc.calls, [("Hello", scopes)])
+        self.assertEqual(
+            rate_limiter_svc.time_left(ip_address="10.0.0.1", board="foo"), 10
+        )
+
+    def test_check_without_rate_limiter(self):
+        board = self._make_board()
+        posting_guard_svc = self._get_target_class()(
+            _DummyQueryService(), _DummyQueryService(), None
+        )
+        self.assertTrue(posting_guard_svc.check(board, "10.0.0.1", "Hello").ok)
+
+    def test_check_banned(self):
+        from ..errors import BanRejectedError
+        from ..services.posting_guard import VerdictType
+
+        banword_query_svc = _DummyQueryService()
+        rate_limiter_svc = self._make_rate_limiter()
+        board = self._make_board(
+            post_delay=10, post_delay_threshold=0, post_delay_period=0
+        )
+        posting_guard_svc = self._get_target_class()(
+            _DummyQueryService(True), banword_query_svc, rate_limiter_svc
+        )
+        verdict = posting_guard_svc.check(board, "10.0.0.1", "Hello")
+        self.assertFalse(verdict.ok)
+        self.assertEqual(verdict.type, VerdictType.BANNED)
+        self.assertEqual(verdict.name, "ban_rejected")
+        self.assertEqual(verdict.http_status, "403 Forbidden")
+        self.assertIsInstance(verdict.error(), BanRejectedError)
+        self.assertEqual(banword_query_svc.calls, [])
+        self.assertFalse(
+            rate_limiter_svc.is_limited(ip_address="10.0.0.1", board="foo")
+        )
+
+    def test_check_banword(self):
+        from ..errors import BanwordRejectedError
+        from ..services.posting_guard import VerdictType
+
+        rate_limiter_svc = self._make_rate_limiter()
+        board = self._make_board(
+            post_delay=10, post_delay_threshold=0, post_delay_period=0
+        )
+        posting_guard_svc = self._get_target_class()(
+            _DummyQueryService(), _DummyQueryService(True), rate_limiter_svc
+        )
+        verdict = posting_guard_svc.check(board, "10.0.0.1", "Hello")
+        self.assertFalse(verdict.ok)
+        self.assertEqual(verdict.type, VerdictType.BANWORD)
+        self.assertEqual(verdict.name, "banword_rejected")
+        self.assertEqual(verdict.http_status, "403 Forbidden")
+        self.assertIsInstance(verdict.error(), BanwordRejectedError)
+        self.assertFalse(
+            rate_limiter_svc.is_limited(ip_address="10.0.0.1", board="foo")
+        )
+
+    def test_check_rate_limited(self):
+        from ..errors import RateLimitedError
+        from ..services.posting_guard import VerdictType
+
+        rate_limiter_svc = self._make_rate_limiter()
+        board = self._make_board(
+            post_delay=10, post_delay_threshold=0, post_delay_period=0
+        )
+        posting_guard_svc = self._get_target_class()(
+            _DummyQueryService(), _DummyQueryService(), rate_limiter_svc
+        )
+        self.assertTrue(posting_guard_svc.check(board, "10.0.0.1", "Hello").ok)
+        verdict = posting_guard_svc.check(board, "10.0.0.1", "Hello")
+        self.assertFalse(verdict.ok)
+        self.assertEqual(verdict.type, VerdictType.RATE_LIMITED)
+        self.assertEqual(verdict.name, "rate_limited")
+        self.assertEqual(verdict.http_status, "429 Too Many Requests")
+        self.assertEqual(verdict.time_left, 10)
+        self.assertIsInstance(verdict.error(), RateLimitedError)
+        self.assertTrue(posting_guard_svc.check(board, "10.0.0.2", "Hello").ok)
+
+    def test_check_rate_limited_zset(self):
+        from ..services.posting_guard import VerdictType
+
+        rate_limiter_svc = self._make_rate_limiter()
+        board = self._make_board(
+            post_delay=10,
+            post_delay_threshold=5,
+            post_delay_period=1800,
+            post_delay_engine="zset",
+        )
+        posting_guard_svc = self._get_target_class()(
+            _DummyQueryService(), _DummyQueryService(), rate_limiter_svc
+        )
+        self.assertTrue(posting_guard_svc.check(board, "10.0.0.1", "Hello").ok)
+        verdict = posting_guard_svc.check(board, "10.0.0.1", "Hello")
+        self.assertEqual(verdict.type, VerdictType.RATE_LIMITED)
+        self.assertEqual(verdict.time_left, 10)
+        self.assertEqual(
+            rate_limiter_svc.redis_conn.zcard(
+                "services.rate_limiter:board=foo,ip_address=10.0.0.1,type=zts"
+            ),
+            1,
+        )
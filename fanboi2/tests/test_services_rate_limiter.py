@@ -92,3 +92,68 @@ class TestRateLimiterService(unittest.TestCase):
 
         rate_limiter_svc.limit_for(10, 5, 1800, foo="bar")
         self.assertEqual(rate_limiter_svc.time_left(foo="bar"), 1800)
+
+    def test_naive_check_and_limit(self):
+        from fakeredis import FakeStrictRedis
+
+        redis_conn = FakeStrictRedis()
+        rate_limiter_svc = self._get_target_class()(redis_conn)
+        self.assertEqual(rate_limiter_svc.check_and_limit(10, foo="bar"), 0)
+        self.assertEqual(rate_limiter_svc.time_left(foo="bar"), 10)
+        self.assertEqual(rate_limiter_svc.check_and_limit(10, foo="bar"), 10)
+        self.assertEqual(rate_limiter_svc.check_and_limit(10, foo="baz"), 0)
+
+    def test_scaled_check_and_limit(self):
+        from fakeredis import FakeStrictRedis
+
+        redis_conn = FakeStrictRedis()
+        rate_limiter_svc = self._get_target_class()(redis_conn)
+        for expected in (10, 37, 134, 491, 1800, 1800):
+            self.assertEqual(rate_limiter_svc.check_and_limit(10, 5, 1800, foo="bar"), 0)
+            self.assertEqual(rate_limiter_svc.time_left(foo="bar"), expected)
+            self.assertEqual(rate_limiter_svc.check_and_limit(10, 5, 1800, foo="bar"), expected)
+            redis_conn.delete("services.rate_limiter:foo=bar")
+
+    def test_sliding_window_check_and_limit(self):
+        from fakeredis import FakeStrictRedis
+
+        redis_conn = FakeStrictRedis()
+        rate_limiter_svc = self._get_target_class()(redis_conn)
+        for expected in (10, 37, 134, 491, 1800, 1800):
+            self.assertEqual(rate_limiter_svc.check_and_limit(10, 5, 1800, engine="zset", foo="bar"), 0)
+            self.assertEqual(rate_limiter_svc.time_left(foo="bar"), expected)
+            self.assertEqual(rate_limiter_svc.check_and_limit(10, 5, 1800, engine="zset", foo="bar"), expected)
+            redis_conn.delete("services.rate_limiter:foo=bar")
+        self.assertEqual(redis_conn.zcard("services.rate_limiter:foo=bar,type=zts"), 6)
+        self.assertFalse(redis_conn.exists("services.rate_limiter:foo=bar,type=ts"))
+
+    def test_sliding_window_check_and_limit_prune(self):
+        from fakeredis import FakeStrictRedis
+
+        redis_conn = FakeStrictRedis()
+        rate_limiter_svc = self._get_target_class()(redis_conn)
+        ts = redis_conn.time()[0]
+        redis_conn.zadd(
+            "services.rate_limiter:foo=bar,type=zts",
+            {"a": ts - 1800, "b": ts - 1801, "c": ts - 60})
+        self.assertEqual(rate_limiter_svc.check_and_limit(10, 5, 1800, engine="zset", foo="bar"), 0)
+        self.assertEqual(rate_limiter_svc.time_left(foo="bar"), 37)
+        self.assertEqual(redis_conn.zcard("services.rate_limiter:foo=bar,type=zts"), 2)
+
+    def test_sliding_window_check_and_limit_naive(self):
+        from fakeredis import FakeStrictRedis
+
+        redis_conn = FakeStrictRedis()
+        rate_limiter_svc = self._get_target_class()(redis_conn)
+        self.assertEqual(rate_limiter_svc.check_and_limit(10, engine="zset", foo="bar"), 0)
+        self.assertEqual(rate_limiter_svc.check_and_limit(10, engine="zset", foo="bar"), 10)
+        self.assertFalse(redis_conn.exists("services.rate_limiter:foo=bar,type=zts"))
+
+    def test_check_and_limit_unknown_engine(self):
+        from fakeredis import FakeStrictRedis
+
+        redis_conn = FakeStrictRedis()
+        rate_limiter_svc = self._get_target_class()(redis_conn)
+        with self.assertLogs("fanboi2.services.rate_limiter", "WARNING"):
+            self.assertEqual(rate_limiter_svc.check_and_limit(10, engine="foo", foo="bar"), 0)
+        self.assertEqual(rate_limiter_svc.check_and_limit(10, foo="bar"), 10)
@@ -49,3 +49,39 @@ class TestScopeService(unittest.TestCase):
         self.assertFalse(scope_svc.evaluate("board:bar", obj))
         self.assertFalse(scope_svc.evaluate("key:valuez", obj))
         self.assertFalse(scope_svc.evaluate("title:/Ello/", obj))
+
+    def test_evaluate_many(self):
+        scope_svc = self._get_target_class()()
+        obj = {"board": "foo", "title": "hello world"}
+        self.assertEqual(
+            scope_svc.evaluate_many(["", "board:foo", "board:bar", "title:/wor/"], obj),
+            [True, True, False, True],
+        )
+        self.assertEqual(scope_svc.evaluate_many([], obj), [])
+
+
+class TestCompileScope(unittest.TestCase):
+    def _get_target_function(self):
+        from ..services.scope import compile_scope
+
+        return compile_scope
+
+    def test_compile(self):
+        from ..services.scope import Scope, ScopeType
+
+        compile_scope = self._get_target_function()
+        self.assertIsNone(compile_scope(""))
+        self.assertEqual(compile_scope("foo:"), Scope("foo", None, None))
+        self.assertEqual(
+            compile_scope("foo:bar"), Scope("foo", ScopeType.STRING, "bar")
+        )
+        c_scope = compile_scope("foo:/(?i)Aa/")
+        self.assertEqual(c_scope.kind, ScopeType.REGEXP)
+        self.assertEqual(c_scope.value.pattern, "(?i)Aa")
+        self.assertTrue(c_scope.matches({"foo": "baa"}))
+        self.assertFalse(c_scope.matches({"foo": "bbb"}))
+        self.assertFalse(c_scope.matches({"bar": "baa"}))
+
+    def test_compile_cached(self):
+        compile_scope = self._get_target_function()
+        self.assertIs(compile_scope("foo:/cached/"), compile_scope("foo:/cached/"))
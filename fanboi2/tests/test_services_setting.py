@@ -145,3 +145,19 @@ class TestSettingUpdateService(ModelSessionMixin, unittest.TestCase):
         setting = setting_update_svc.update("app.test", {"foo": "bar"})
         self.assertEqual(setting.key, "app.test")
         self.assertEqual(setting.value, {"foo": "bar"})
+
+    def test_update_invalidate_filters(self):
+        from . import make_cache_region
+        from ..services.filter_ import FILTER_VERSION_KEY
+
+        cache_region = make_cache_region()
+        cache_region.set(FILTER_VERSION_KEY, "foo")
+        setting_update_svc = self._get_target_class()(self.dbsession, cache_region)
+        setting_update_svc.update("app.test", "test")
+        self.assertEqual(cache_region.get(FILTER_VERSION_KEY), "foo")
+        self.dbsession.commit()
+        self.assertEqual(cache_region.get(FILTER_VERSION_KEY), "foo")
+        setting_update_svc.update("ext.filters.akismet", "key")
+        self.assertEqual(cache_region.get(FILTER_VERSION_KEY), "foo")
+        self.dbsession.commit()
+        self.assertNotEqual(cache_region.get(FILTER_VERSION_KEY), "foo")
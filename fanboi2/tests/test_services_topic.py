@@ -12,7 +12,7 @@ class TestTopicCreateService(ModelSessionMixin, unittest.TestCase):
 
         return TopicCreateService
 
-    def _make_one(self):
+    def _make_one(self, recent_poster_svc=None, prerender_fn=None):
         from ..services import UserQueryService
 
         class _DummyIdentityService(object):
@@ -28,8 +28,33 @@ class TestTopicCreateService(ModelSessionMixin, unittest.TestCase):
             _DummyIdentityService(),
             _DummySettingQueryService(),
             UserQueryService(self.dbsession),
+            recent_poster_svc,
+            prerender_fn=prerender_fn,
         )
 
+    def _make_prerender_fn(self, calls):
+        def _prerender(post, topic):
+            calls.append((post.number, topic.id))
+            post.body_formatted = "<p>%s</p>" % (post.body,)
+            post.body_formatted_version = 1
+
+        return _prerender
+
+    def test_create_mark_seen(self):
+        from fakeredis import FakeStrictRedis
+        from ..models import Board
+        from ..services import RecentPosterService
+
+        board = self._make(Board(slug="foo", title="Foo"))
+        self.dbsession.commit()
+        recent_poster_svc = RecentPosterService(FakeStrictRedis(), self.dbsession)
+        topic_create_svc = self._make_one(recent_poster_svc)
+        self.assertFalse(recent_poster_svc.was_recently_seen("127.0.0.1"))
+        topic_create_svc.create(board.slug, "Hello", "Hello Eartians", "127.0.0.1")
+        self.assertFalse(recent_poster_svc.was_recently_seen("127.0.0.1"))
+        self.dbsession.commit()
+        self.assertTrue(recent_poster_svc.was_recently_seen("127.0.0.1"))
+
     def test_create(self):
         from ..models import Board
 
@@ -52,6 +77,22 @@ class TestTopicCreateService(ModelSessionMixin, unittest.TestCase):
         self.assertEqual(topic.posts[0].ident, "foo,127.0.0.1")
         self.assertEqual(topic.posts[0].ident_type, "ident")
 
+    def test_create_prerender(self):
+        from ..models import Board
+
+        board = self._make(Board(slug="foo", title="Foo"))
+        self.dbsession.commit()
+        calls = []
+        topic_create_svc = self._make_one(prerender_fn=self._make_prerender_fn(calls))
+        topic = topic_create_svc.create(
+            board.slug, "Hello, world!", "Hello Eartians", "127.0.0.1"
+        )
+        self.dbsession.commit()
+        self.assertEqual(calls, [(None, topic.id)])
+        self.assertEqual(topic.posts[0].number, 1)
+        self.assertEqual(topic.posts[0].body_formatted, "<p>Hello Eartians</p>")
+        self.assertEqual(topic.posts[0].version, 1)
+
     def test_create_ipv6(self):
         from ..models import Board
 
@@ -164,6 +205,30 @@ class TestTopicCreateService(ModelSessionMixin, unittest.TestCase):
         self.assertEqual(topic.posts[0].ident, "fooident")
         self.assertEqual(topic.posts[0].ident_type, "ident_admin")
 
+    def test_create_with_user_prerender(self):
+        from ..models import Board, User
+
+        board = self._make(Board(slug="foo", title="Foo"))
+        user = self._make(
+            User(
+                username="root",
+                encrypted_password="foobar",
+                ident="fooident",
+                ident_type="ident_admin",
+                name="Root",
+            )
+        )
+        self.dbsession.commit()
+        calls = []
+        topic_create_svc = self._make_one(prerender_fn=self._make_prerender_fn(calls))
+        topic = topic_create_svc.create_with_user(
+            board.slug, user.id, "Hello, world!", "Hello Eartians", "127.0.0.1"
+        )
+        self.dbsession.commit()
+        self.assertEqual(calls, [(None, topic.id)])
+        self.assertEqual(topic.posts[0].body_formatted, "<p>Hello Eartians</p>")
+        self.assertEqual(topic.posts[0].version, 1)
+
     def test_create_with_user_without_ident(self):
         from ..models import Board, User
 
@@ -432,6 +497,63 @@ class TestTopicQueryService(ModelSessionMixin, unittest.TestCase):
         topic_query_svc = self._make_one()
         self.assertEqual(topic_query_svc.list_from_board_slug("notfound"), [])
 
+    def test_page_from_board_slug(self):
+        from datetime import timedelta
+        from sqlalchemy.sql import func
+        from ..models import Board, Topic, TopicMeta
+
+        def _make_topic(days=0, **kwargs):
+            topic = self._make(Topic(**kwargs))
+            self._make(
+                TopicMeta(
+                    topic=topic,
+                    post_count=0,
+                    posted_at=func.now(),
+                    bumped_at=func.now() - timedelta(days=days),
+                )
+            )
+            return topic
+
+        board1 = self._make(Board(title="Foo", slug="foo"))
+        board2 = self._make(Board(title="Bar", slug="bar"))
+        topic1 = _make_topic(board=board1, title="Foo")
+        topic2 = _make_topic(board=board1, title="Foo")
+        topic3 = _make_topic(board=board1, title="Foo")
+        topic4 = _make_topic(days=1, board=board1, title="Foo")
+        topic5 = _make_topic(days=2, board=board1, title="Foo")
+        _make_topic(board=board2, title="Foo")
+        _make_topic(days=8, board=board1, title="Foo", status="archived")
+        self.dbsession.commit()
+        topic_query_svc = self._make_one()
+
+        topics, cursor = topic_query_svc.page_from_board_slug("foo", limit=2)
+        self.assertEqual(topics, [topic3, topic2])
+        self.assertIsNotNone(cursor)
+        topics, cursor = topic_query_svc.page_from_board_slug(
+            "foo", cursor=cursor, limit=2
+        )
+        self.assertEqual(topics, [topic1, topic4])
+        self.assertIsNotNone(cursor)
+        topics, cursor = topic_query_svc.page_from_board_slug(
+            "foo", cursor=cursor, limit=2
+        )
+        self.assertEqual(topics, [topic5])
+        self.assertIsNone(cursor)
+        self.assertEqual(
+            topic_query_svc.page_from_board_slug("foo"),
+            ([topic3, topic2, topic1, topic4, topic5], None),
+        )
+
+    def test_page_from_board_slug_invalid_cursor(self):
+        topic_query_svc = self._make_one()
+        for cursor in ("foo", "Zm9vLGJhcg", "!"):
+            with self.assertRaises(ValueError):
+                topic_query_svc.page_from_board_slug("foo", cursor=cursor)
+
+    def test_page_from_board_slug_not_found(self):
+        topic_query_svc = self._make_one()
+        self.assertEqual(topic_query_svc.page_from_board_slug("notfound"), ([], None))
+
     def test_list_recent_from_board_slug(self):
         from datetime import timedelta
         from sqlalchemy.sql import func
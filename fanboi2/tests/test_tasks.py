@@ -15,6 +15,9 @@ class _DummyFilterService(object):
 
         return FilterResult(rejected_by=self._rejected_by, filters=[])
 
+    def evaluate_many(self, payloads):
+        return [self.evaluate(payload) for payload in payloads]
+
 
 class _DummyIdentityService(object):
     def identity_with_tz_for(self, tz, **kwargs):
@@ -26,6 +29,32 @@ class _DummySettingQueryService(object):
         return {"app.time_zone": "Asia/Bangkok"}.get(key, None)
 
 
+class _FailingDataManager(object):
+    def __init__(self, transaction_manager):
+        self.transaction_manager = transaction_manager
+
+    def abort(self, transaction):
+        pass
+
+    def tpc_begin(self, transaction):
+        pass
+
+    def commit(self, transaction):
+        pass
+
+    def tpc_vote(self, transaction):
+        raise RuntimeError("could not serialize access")
+
+    def tpc_finish(self, transaction):  # pragma: no cover
+        pass
+
+    def tpc_abort(self, transaction):
+        pass
+
+    def sortKey(self):
+        return "failing"
+
+
 class TestResultProxyWithModel(ModelSessionMixin, unittest.TestCase):
     def setUp(self):
         super(TestResultProxyWithModel, self).setUp()
@@ -125,6 +154,79 @@ class TestResultProxyWithModel(ModelSessionMixin, unittest.TestCase):
         request = mock_service(self.request, {"db": self.dbsession})
         self.assertEqual(result_proxy.deserialize(request), topic)
 
+    def _count_queries(self):
+        from sqlalchemy import event
+
+        queries = []
+
+        @event.listens_for(self.connection, "before_cursor_execute")
+        def _count(conn, cursor, statement, *args):
+            queries.append(statement)
+
+        self.addCleanup(event.remove, self.connection, "before_cursor_execute", _count)
+        return queries
+
+    def test_deserialize_post_snapshot(self):
+        from ..models import Board, Topic, Post
+        from ..tasks._snapshot import snapshot_model
+        from . import mock_service, DummyAsyncResult
+
+        board = self._make(Board(title="Foobar", slug="foobar"))
+        topic = self._make(Topic(board=board, title="Foobar"))
+        post = self._make(
+            Post(
+                topic=topic,
+                number=1,
+                name="Nameless Fanboi",
+                body="Foobar",
+                ip_address="127.0.0.1",
+            )
+        )
+        self.dbsession.commit()
+        snapshot = snapshot_model(post)
+        post_id, topic_id, created_at = post.id, topic.id, post.created_at
+        self.dbsession.expunge_all()
+        result_proxy = self._get_target_class()(
+            DummyAsyncResult("demo", "success", ["post", post_id, snapshot])
+        )
+        request = mock_service(self.request, {"db": self.dbsession})
+        queries = self._count_queries()
+        obj = result_proxy.deserialize(request)
+        self.assertEqual(obj.id, post_id)
+        self.assertEqual(obj.topic_id, topic_id)
+        self.assertEqual(obj.number, 1)
+        self.assertEqual(obj.body, "Foobar")
+        self.assertEqual(obj.created_at, created_at)
+        self.assertEqual(queries, [])
+        self.assertEqual(obj.topic.board.slug, "foobar")
+        self.assertNotIn(obj, self.dbsession.dirty)
+
+    def test_deserialize_topic_snapshot(self):
+        from ..models import Board, Topic, TopicMeta
+        from ..tasks._snapshot import snapshot_model
+        from . import mock_service, DummyAsyncResult
+
+        board = self._make(Board(title="Foobar", slug="foobar"))
+        topic = self._make(Topic(board=board, title="Foobar"))
+        self._make(TopicMeta(topic=topic, post_count=1, bumped_at=None))
+        self.dbsession.commit()
+        snapshot = snapshot_model(topic)
+        topic_id = topic.id
+        self.dbsession.expunge_all()
+        result_proxy = self._get_target_class()(
+            DummyAsyncResult("demo", "success", ["topic", topic_id, snapshot])
+        )
+        request = mock_service(self.request, {"db": self.dbsession})
+        queries = self._count_queries()
+        obj = result_proxy.deserialize(request)
+        self.assertEqual(obj.id, topic_id)
+        self.assertEqual(obj.title, "Foobar")
+        self.assertEqual(obj.status, "open")
+        self.assertEqual(obj.meta.post_count, 1)
+        self.assertIsNone(obj.meta.bumped_at)
+        self.assertEqual(queries, [])
+        self.assertEqual(obj.board.slug, "foobar")
+
     def test_deserialize_topic_meta(self):
         from ..models import Board, Topic, TopicMeta
         from . import mock_service, DummyAsyncResult
@@ -383,6 +485,9 @@ class TestAddPostTask(ModelSessionMixin, unittest.TestCase):
         topic = self.dbsession.query(Topic).get(topic.id)
         topic_meta = self.dbsession.query(TopicMeta).get(topic.id)
         self.assertEqual(post.number, 1)
+        self.assertEqual(resp[2]["number"], 1)
+        self.assertEqual(resp[2]["body"], "Hello, world!")
+        self.assertEqual(resp[2]["topic_id"], topic.id)
         self.assertEqual(post.name, "Nameless Foobar")
         self.assertEqual(post.ip_address, "127.0.0.1")
         self.assertEqual(post.body, "Hello, world!")
@@ -433,6 +538,56 @@ class TestAddPostTask(ModelSessionMixin, unittest.TestCase):
         post = self.dbsession.query(Post).get(resp[1])
         self.assertFalse(post.bumped)
 
+    def test_add_post_prerender(self):
+        from ..helpers.formatters import FORMATTER_VERSION, prerender_post
+        from ..interfaces import IFilterService, IPostCreateService
+        from ..models import Board, Topic, TopicMeta, Post
+        from ..services import PostCreateService, UserQueryService
+        from . import mock_service
+
+        self.config.add_route("topic_scoped", "/{board}/{topic}/{query}")
+        board = self._make(Board(title="Foobar", slug="foo"))
+        topic = self._make(Topic(board=board, title="Foobar", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=0))
+        self.dbsession.commit()
+        request = mock_service(
+            self.request,
+            {
+                "db": self.dbsession,
+                IFilterService: _DummyFilterService(),
+                IPostCreateService: PostCreateService(
+                    self.dbsession,
+                    _DummyIdentityService(),
+                    _DummySettingQueryService(),
+                    UserQueryService(self.dbsession),
+                    prerender_fn=lambda p, t: prerender_post(self.request, p, t),
+                ),
+            },
+        )
+        resp = self._get_target_func()(
+            topic.id,
+            ">>1 https://imgur.com/image",
+            True,
+            "127.0.0.1",
+            payload={},
+            _request=request,
+            _registry=self.config.registry,
+        )
+        post = self.dbsession.query(Post).get(resp[1])
+        self.assertEqual(post.version, 1)
+        self.assertEqual(post.body_formatted_version, FORMATTER_VERSION)
+        self.assertEqual(
+            post.body_formatted,
+            '<p><a data-anchor-topic="%s" data-anchor="1" href="/foo/%s/1" '
+            'class="anchor">&gt;&gt;1</a> <a href="https://imgur.com/image" '
+            'class="link" target="_blank" rel="nofollow">'
+            "https://imgur.com/image</a></p>\n"
+            '<p class="thumbnails"><a href="//imgur.com/image" '
+            'class="thumbnail" target="_blank">'
+            '<img src="//i.imgur.com/imageb.jpg"></a></p>' % (topic.id, topic.id),
+        )
+        self.assertEqual(resp[2]["body_formatted"], post.body_formatted)
+
     def test_add_post_without_ident(self):
         from ..interfaces import IFilterService, IPostCreateService
         from ..models import Board, Topic, TopicMeta, Post
@@ -849,6 +1004,282 @@ class TestAddPostTask(ModelSessionMixin, unittest.TestCase):
         self.assertEqual(resp, ("failure", "proxy_rejected"))
 
 
+class TestAddPostsTask(ModelSessionMixin, unittest.TestCase):
+    def setUp(self):
+        super(TestAddPostsTask, self).setUp()
+        self.config = testing.setUp()
+        self.request = testing.DummyRequest()
+        self.request.registry = self.config.registry
+
+    def tearDown(self):
+        import transaction
+
+        super(TestAddPostsTask, self).tearDown()
+        testing.tearDown()
+        transaction.abort()
+
+    def _get_target_func(self):
+        from ..tasks.post import add_posts
+
+        return add_posts
+
+    def _make_request(self, redis_conn, filter_svc=None):
+        from ..interfaces import IFilterService, IPostCreateService
+        from ..services import PostCreateService, UserQueryService
+        from . import mock_service
+
+        if filter_svc is None:
+            filter_svc = _DummyFilterService()
+        return mock_service(
+            self.request,
+            {
+                "db": self.dbsession,
+                "redis": redis_conn,
+                IFilterService: filter_svc,
+                IPostCreateService: PostCreateService(
+                    self.dbsession,
+                    _DummyIdentityService(),
+                    _DummySettingQueryService(),
+                    UserQueryService(self.dbsession),
+                ),
+            },
+        )
+
+    @unittest.mock.patch("fanboi2.tasks.post.add_posts.apply_async")
+    def test_queue_post(self, apply_async):
+        from fakeredis import FakeStrictRedis
+        from ..tasks.post import queue_post
+
+        redis_conn = FakeStrictRedis()
+        result1 = queue_post(redis_conn, 0.5, 1, "Hello", True, "127.0.0.1", {})
+        result2 = queue_post(redis_conn, 0.5, 1, "World", False, "127.0.0.1", {})
+        result3 = queue_post(redis_conn, 0.5, 2, "Hello", True, "127.0.0.1", {})
+        self.assertNotEqual(result1.id, result2.id)
+        self.assertEqual(redis_conn.llen("tasks.post:batch:topic_id=1"), 2)
+        self.assertEqual(redis_conn.llen("tasks.post:batch:topic_id=2"), 1)
+        self.assertIsNotNone(result3.id)
+        self.assertEqual(
+            apply_async.call_args_list,
+            [
+                unittest.mock.call((1,), countdown=0.5),
+                unittest.mock.call((2,), countdown=0.5),
+            ],
+        )
+        self.assertEqual(
+            redis_conn.get("tasks.post:batch_scheduled:topic_id=1"),
+            result1.id.encode("utf-8"),
+        )
+        self.assertGreater(redis_conn.pttl("tasks.post:batch_scheduled:topic_id=1"), 0)
+
+    @unittest.mock.patch("fanboi2.tasks.post.add_posts.apply_async")
+    def test_queue_post_schedule_failed(self, apply_async):
+        from fakeredis import FakeStrictRedis
+        from ..tasks.post import queue_post
+
+        redis_conn = FakeStrictRedis()
+        apply_async.side_effect = ConnectionError
+        with self.assertRaises(ConnectionError):
+            queue_post(redis_conn, 0.5, 1, "Hello", True, "127.0.0.1", {})
+        apply_async.side_effect = None
+        queue_post(redis_conn, 0.5, 1, "World", True, "127.0.0.1", {})
+        self.assertEqual(apply_async.call_count, 2)
+
+    @unittest.mock.patch("fanboi2.tasks.post.add_posts.apply_async")
+    def test_queue_post_schedule_expired(self, apply_async):
+        from fakeredis import FakeStrictRedis
+        from ..tasks.post import queue_post
+
+        redis_conn = FakeStrictRedis()
+        queue_post(redis_conn, 0.5, 1, "Hello", True, "127.0.0.1", {})
+        queue_post(redis_conn, 0.5, 1, "World", True, "127.0.0.1", {})
+        self.assertEqual(apply_async.call_count, 1)
+        redis_conn.delete("tasks.post:batch_scheduled:topic_id=1")
+        queue_post(redis_conn, 0.5, 1, "Foobar", True, "127.0.0.1", {})
+        self.assertEqual(apply_async.call_count, 2)
+        self.assertEqual(redis_conn.llen("tasks.post:batch:topic_id=1"), 3)
+
+    @unittest.mock.patch("fanboi2.tasks.post.add_posts.apply_async")
+    def test_add_posts(self, apply_async):
+        from fakeredis import FakeStrictRedis
+        from ..models import Board, Topic, TopicMeta, Post
+        from ..tasks.post import queue_post
+
+        board = self._make(Board(title="Foobar", slug="foo"))
+        topic = self._make(Topic(board=board, title="Foobar", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=0))
+        self.dbsession.commit()
+        redis_conn = FakeStrictRedis()
+        result1 = queue_post(redis_conn, 1, topic.id, "Hello", False, "10.0.0.1", {})
+        result2 = queue_post(redis_conn, 1, topic.id, "World", True, "10.0.0.2", {})
+        resp = self._get_target_func()(
+            topic.id,
+            _request=self._make_request(redis_conn),
+            _registry=self.config.registry,
+        )
+        self.assertEqual([task_id for task_id, _ in resp], [result1.id, result2.id])
+        post1 = self.dbsession.query(Post).get(resp[0][1][1])
+        post2 = self.dbsession.query(Post).get(resp[1][1][1])
+        topic_meta = self.dbsession.query(TopicMeta).get(topic.id)
+        self.assertEqual(resp[0][1][0], "post")
+        self.assertEqual(post1.number, 1)
+        self.assertEqual(post1.body, "Hello")
+        self.assertEqual(post1.ident, "foo,10.0.0.1")
+        self.assertFalse(post1.bumped)
+        self.assertEqual(post2.number, 2)
+        self.assertEqual(post2.body, "World")
+        self.assertTrue(post2.bumped)
+        self.assertEqual(topic_meta.post_count, 2)
+        self.assertIsNotNone(topic_meta.bumped_at)
+        self.assertEqual(redis_conn.llen("tasks.post:batch:topic_id=%s" % topic.id), 0)
+        self.assertFalse(
+            redis_conn.exists("tasks.post:batch_scheduled:topic_id=%s" % topic.id)
+        )
+        queue_post(redis_conn, 1, topic.id, "Again", True, "10.0.0.1", {})
+        self.assertEqual(apply_async.call_count, 2)
+
+    @unittest.mock.patch("fanboi2.tasks.post.add_posts.apply_async")
+    def test_add_posts_commit(self, apply_async):
+        from celery import states
+        from fakeredis import FakeStrictRedis
+        from ..models import Board, Topic, TopicMeta
+        from ..tasks.post import queue_post
+
+        board = self._make(Board(title="Foobar", slug="foo"))
+        topic = self._make(Topic(board=board, title="Foobar", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=0))
+        self.dbsession.commit()
+        redis_conn = FakeStrictRedis()
+        queue_post(redis_conn, 1, topic.id, "Hello", True, "10.0.0.1", {})
+        queue_post(redis_conn, 1, topic.id, "World", True, "10.0.0.2", {})
+        add_posts = self._get_target_func()
+        resp = add_posts(
+            topic.id,
+            _request=self._make_request(redis_conn),
+            _registry=self.config.registry,
+        )
+        self.assertEqual(len(redis_conn.keys("tasks.post:batch_processing:*")), 1)
+        with unittest.mock.patch.object(add_posts, "_backend") as backend:
+            add_posts.on_success(resp, "batch", (topic.id,), {})
+        self.assertEqual(
+            backend.store_result.call_args_list,
+            [
+                unittest.mock.call(task_id, result, states.SUCCESS)
+                for task_id, result in resp
+            ],
+        )
+        backend.mark_as_failure.assert_not_called()
+        self.assertEqual(redis_conn.keys("tasks.post:batch_processing:*"), [])
+
+    @unittest.mock.patch("fanboi2.tasks.post.add_posts.apply_async")
+    def test_add_posts_commit_failed(self, apply_async):
+        import transaction
+        from fakeredis import FakeStrictRedis
+        from ..models import Board, Topic, TopicMeta
+        from ..tasks.post import queue_post
+
+        board = self._make(Board(title="Foobar", slug="foo"))
+        topic = self._make(Topic(board=board, title="Foobar", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=0))
+        self.dbsession.commit()
+        redis_conn = FakeStrictRedis()
+        result1 = queue_post(redis_conn, 1, topic.id, "Hello", True, "10.0.0.1", {})
+        result2 = queue_post(redis_conn, 1, topic.id, "World", True, "10.0.0.2", {})
+        add_posts = self._get_target_func()
+        resp = add_posts(
+            topic.id,
+            _request=self._make_request(redis_conn),
+            _registry=self.config.registry,
+        )
+        transaction.get().join(_FailingDataManager(transaction.manager))
+        with unittest.mock.patch.object(add_posts, "_backend") as backend:
+            with self.assertRaises(RuntimeError):
+                add_posts.on_success(resp, "batch", (topic.id,), {})
+        self.assertEqual(
+            [c[0][0] for c in backend.mark_as_failure.call_args_list],
+            [result1.id, result2.id],
+        )
+        for c in backend.mark_as_failure.call_args_list:
+            self.assertIsInstance(c[0][1], RuntimeError)
+        backend.store_result.assert_not_called()
+        self.assertEqual(redis_conn.keys("tasks.post:batch_processing:*"), [])
+        self.assertEqual(
+            redis_conn.llen("tasks.post:batch:topic_id=%s" % (topic.id,)), 0
+        )
+
+    def test_drain_posts_redelivered(self):
+        from fakeredis import FakeStrictRedis
+        from ..tasks.post import _drain_posts, queue_post
+
+        redis_conn = FakeStrictRedis()
+        with unittest.mock.patch("fanboi2.tasks.post.add_posts.apply_async"):
+            result1 = queue_post(redis_conn, 1, 1, "Hello", True, "10.0.0.1", {})
+            items = _drain_posts(redis_conn, 1, "batch")
+            result2 = queue_post(redis_conn, 1, 1, "World", True, "10.0.0.1", {})
+        self.assertEqual([i["task_id"] for i in items], [result1.id])
+        items = _drain_posts(redis_conn, 1, "batch")
+        self.assertEqual([i["task_id"] for i in items], [result1.id])
+        items = _drain_posts(redis_conn, 1, "other")
+        self.assertEqual([i["task_id"] for i in items], [result2.id])
+
+    @unittest.mock.patch("fanboi2.tasks.post.add_posts.apply_async")
+    def test_add_posts_empty(self, apply_async):
+        from fakeredis import FakeStrictRedis
+
+        resp = self._get_target_func()(
+            1,
+            _request=self._make_request(FakeStrictRedis()),
+            _registry=self.config.registry,
+        )
+        self.assertEqual(resp, [])
+
+    @unittest.mock.patch("fanboi2.tasks.post.add_posts.apply_async")
+    def test_add_posts_rejected(self, apply_async):
+        from fakeredis import FakeStrictRedis
+        from ..models import Board, Topic, TopicMeta, Post
+        from ..tasks.post import queue_post
+
+        board = self._make(Board(title="Foobar", slug="foo"))
+        topic = self._make(Topic(board=board, title="Foobar", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=0))
+        self.dbsession.commit()
+        redis_conn = FakeStrictRedis()
+        queue_post(redis_conn, 1, topic.id, "Hello", True, "10.0.0.1", {})
+        resp = self._get_target_func()(
+            topic.id,
+            _request=self._make_request(redis_conn, _DummyFilterService("akismet")),
+            _registry=self.config.registry,
+        )
+        self.assertEqual(resp[0][1], ("failure", "akismet_rejected"))
+        self.assertEqual(self.dbsession.query(Post).count(), 0)
+
+    @unittest.mock.patch("fanboi2.tasks.post.add_posts.apply_async")
+    def test_add_posts_topic_limit(self, apply_async):
+        from fakeredis import FakeStrictRedis
+        from ..models import Board, Topic, TopicMeta
+        from ..tasks.post import queue_post
+
+        board = self._make(
+            Board(title="Foobar", slug="foo", settings={"max_posts": 10})
+        )
+        topic = self._make(Topic(board=board, title="Foobar", status="open"))
+        self._make(TopicMeta(topic=topic, post_count=9))
+        self.dbsession.commit()
+        redis_conn = FakeStrictRedis()
+        queue_post(redis_conn, 1, topic.id, "Hello", True, "10.0.0.1", {})
+        queue_post(redis_conn, 1, topic.id, "World", True, "10.0.0.2", {})
+        resp = self._get_target_func()(
+            topic.id,
+            _request=self._make_request(redis_conn),
+            _registry=self.config.registry,
+        )
+        topic = self.dbsession.query(Topic).get(topic.id)
+        topic_meta = self.dbsession.query(TopicMeta).get(topic.id)
+        self.assertEqual(resp[0][1][0], "post")
+        self.assertEqual(resp[1][1], ("failure", "status_rejected", "archived"))
+        self.assertEqual(topic_meta.post_count, 10)
+        self.assertEqual(topic.status, "archived")
+
+
 class TestAddTopicTask(ModelSessionMixin, unittest.TestCase):
     def setUp(self):
         from ..tasks import celery
@@ -872,6 +1303,7 @@ class TestAddTopicTask(ModelSessionMixin, unittest.TestCase):
         return add_topic
 
     def test_add_topic(self):
+        from ..helpers.formatters import prerender_post
         from ..interfaces import IFilterService, ITopicCreateService
         from ..models import Board, Topic, TopicMeta
         from ..services import TopicCreateService, UserQueryService
@@ -891,6 +1323,7 @@ class TestAddTopicTask(ModelSessionMixin, unittest.TestCase):
                     _DummyIdentityService(),
                     _DummySettingQueryService(),
                     UserQueryService(self.dbsession),
+                    prerender_fn=lambda p, t: prerender_post(self.request, p, t),
                 ),
             },
         )
@@ -921,6 +1354,8 @@ class TestAddTopicTask(ModelSessionMixin, unittest.TestCase):
         self.assertEqual(topic.posts[0].ip_address, "127.0.0.1")
         self.assertEqual(topic.posts[0].body, "Hello, world!")
         self.assertEqual(topic.posts[0].ident, "foo,127.0.0.1")
+        self.assertEqual(topic.posts[0].body_formatted, "<p>Hello, world!</p>")
+        self.assertEqual(topic.posts[0].version, 1)
 
     def test_add_topic_without_ident(self):
         from ..interfaces import IFilterService, ITopicCreateService
@@ -1351,3 +1786,143 @@ class TestExpireTopicsTask(ModelSessionMixin, unittest.TestCase):
             self._get_target_func()(
                 "notfound", _request=request, _registry=self.config.registry
             )
+
+
+class TestTaskTimings(unittest.TestCase):
+    def _make_one(self):
+        from ..tasks._base import TaskTimings
+
+        return TaskTimings()
+
+    @unittest.mock.patch("time.perf_counter")
+    def test_measure(self, perf_counter):
+        perf_counter.side_effect = [1.0, 1.25, 2.0, 2.5, 3.0, 3.125]
+        timings = self._make_one()
+        with timings.measure("prepare"):
+            pass
+        with timings.measure("filter"):
+            pass
+        with timings.measure("prepare"):
+            pass
+        self.assertEqual(timings.phases, {"prepare": 0.375, "filter": 0.5})
+        self.assertEqual(timings.total(), 0.875)
+        self.assertEqual(str(timings), "prepare=375.0ms filter=500.0ms")
+
+    @unittest.mock.patch("time.perf_counter")
+    def test_measure_error(self, perf_counter):
+        perf_counter.side_effect = [1.0, 1.5]
+        timings = self._make_one()
+        with self.assertRaises(ValueError):
+            with timings.measure("create"):
+                raise ValueError()
+        self.assertEqual(timings.phases, {"create": 0.5})
+
+
+class TestWorkerEnv(ModelSessionMixin, unittest.TestCase):
+    def setUp(self):
+        super(TestWorkerEnv, self).setUp()
+        from . import make_cache_region
+
+        self.config = testing.setUp()
+        self.config.include("pyramid_services")
+        self.config.registry["filters"] = []
+        self.cache_region = make_cache_region({})
+        self.config.register_service(self.dbsession, name="db")
+        self.config.register_service(self.cache_region, name="cache")
+
+    def tearDown(self):
+        super(TestWorkerEnv, self).tearDown()
+        testing.tearDown()
+
+    def _make_one(self):
+        from ..tasks._env import WorkerEnv
+
+        return WorkerEnv(self.config.registry)
+
+    def test_prepare(self):
+        from ..interfaces import IFilterService, IScopeService
+        from ..interfaces import ISettingQueryService
+
+        worker_env = self._make_one()
+        self.assertIsNone(worker_env.request)
+        with worker_env.prepare() as env1:
+            request1 = env1["request"]
+            self.assertEqual(worker_env.request, request1)
+            self.assertEqual(request1.find_service(name="db"), self.dbsession)
+            services1 = [
+                request1.find_service(iface)
+                for iface in (IFilterService, IScopeService, ISettingQueryService)
+            ]
+        self.assertIsNone(worker_env.request)
+        with worker_env.prepare() as env2:
+            request2 = env2["request"]
+            self.assertEqual(worker_env.request, request2)
+            services2 = [
+                request2.find_service(iface)
+                for iface in (IFilterService, IScopeService, ISettingQueryService)
+            ]
+        self.assertIsNot(request1, request2)
+        for service1, service2 in zip(services1, services2):
+            self.assertIs(service1, service2)
+
+    @unittest.mock.patch("time.monotonic")
+    def test_prepare_setting_query(self, monotonic):
+        from ..interfaces import ISettingQueryService
+        from ..models import Setting
+
+        monotonic.return_value = 10
+        worker_env = self._make_one()
+        with worker_env.prepare() as env:
+            setting_query_svc = env["request"].find_service(ISettingQueryService)
+            self.assertEqual(setting_query_svc.value_from_key("app.time_zone"), "UTC")
+
+        self._make(Setting(key="app.time_zone", value="Asia/Bangkok"))
+        self.dbsession.commit()
+        self.cache_region.invalidate()
+        with worker_env.prepare() as env:
+            setting_query_svc = env["request"].find_service(ISettingQueryService)
+            self.assertEqual(setting_query_svc.value_from_key("app.time_zone"), "UTC")
+            self.assertEqual(
+                setting_query_svc.value_from_key("app.time_zone", use_cache=False),
+                "Asia/Bangkok",
+            )
+            monotonic.return_value = 16
+            self.assertEqual(
+                setting_query_svc.value_from_key("app.time_zone"), "Asia/Bangkok"
+            )
+
+    @unittest.mock.patch("time.monotonic")
+    def test_prepare_filter_settings_updated(self, monotonic):
+        from ..interfaces import IFilterService
+        from ..services import SettingUpdateService
+
+        class _DummyFilter(object):
+            def __init__(self, settings=None, services=None):
+                self.settings = settings
+
+            def should_reject(self, payload):
+                return False
+
+        monotonic.return_value = 10
+        self.config.registry["filters"] = [("dummy", _DummyFilter)]
+        setting_update_svc = SettingUpdateService(self.dbsession, self.cache_region)
+        worker_env = self._make_one()
+        with worker_env.prepare() as env:
+            filter_svc = env["request"].find_service(IFilterService)
+            setting_update_svc.update("ext.filters.dummy", "foo")
+            self.dbsession.commit()
+            self.assertEqual(filter_svc.chain().filters[0][1].settings, "foo")
+            setting_update_svc.update("ext.filters.dummy", "bar")
+            self.dbsession.commit()
+            self.assertEqual(filter_svc.chain().filters[0][1].settings, "bar")
+            setting_update_svc.update("ext.filters.dummy", "baz")
+            self.dbsession.commit()
+            self.assertEqual(filter_svc.chain().filters[0][1].settings, "baz")
+
+    def test_get_worker_env(self):
+        from ..tasks._env import get_worker_env
+
+        worker_env = get_worker_env(self.config.registry)
+        self.assertEqual(worker_env.registry, self.config.registry)
+        self.assertIs(get_worker_env(self.config.registry), worker_env)
+        self.assertIsNot(get_worker_env(testing.setUp().registry), worker_env)
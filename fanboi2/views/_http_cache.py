@@ -0,0 +1,89 @@
+import hashlib
+
+from webob.datetime_utils import parse_date
+from webob.etag import ETagMatcher
+
+from ..version import __VERSION__
+
+TOPIC_FINAL_STATUS = ("archived", "expired")
+TOPIC_FINAL_MAX_AGE = 86400
+
+
+def topic_validators(topic):
+    """Returns a 2-tuple of a list of values identifying the current state
+    of the given topic and the last time it was modified. Any new post,
+    status change or post deletion changes these values.
+
+    :param topic: A :class:`fanboi2.models.Topic` object.
+    """
+    parts = [topic.id, topic.status, topic.updated_at]
+    modified = [topic.created_at, topic.updated_at]
+    if topic.meta is not None:
+        parts.extend([topic.meta.post_count, topic.meta.posted_at])
+        modified.append(topic.meta.posted_at)
+
+    modified = [m for m in modified if m is not None]
+    return parts, max(modified) if modified else None
+
+
+def topics_validators(board, topics):
+    """Returns a 2-tuple similar to :func:`topic_validators` for a listing
+    of the given topics in the given board, so the listing is considered
+    modified whenever the set or order of topics, or any listed topic has
+    changed, such as when a topic is bumped.
+
+    :param board: A :class:`fanboi2.models.Board` object.
+    :param topics: A list of :class:`fanboi2.models.Topic` objects.
+    """
+    parts = [board.id, board.updated_at]
+    modified = [board.updated_at]
+    for topic in topics:
+        topic_parts, topic_modified = topic_validators(topic)
+        parts.extend(topic_parts)
+        modified.append(topic_modified)
+
+    modified = [m for m in modified if m is not None]
+    return parts, max(modified) if modified else None
+
+
+def not_modified(request, validators, final=False, private=False, extra=()):
+    """Set the validators on :attr:`request.response` and returns the
+    response as ``304 Not Modified`` if the request already has the
+    current version of the resource, or :type:`None` otherwise, in which
+    case the view should continue rendering.
+
+    Resources are always revalidated unless :param:`final` is set, in which
+    case they're cached for :data:`TOPIC_FINAL_MAX_AGE` seconds.
+
+    :param request: A :class:`pyramid.request.Request` object.
+    :param validators: A 2-tuple of values and last modified time.
+    :param final: A :type:`bool` whether the resource will no longer change.
+    :param private: A :type:`bool` whether the response is user-specific.
+    :param extra: Additional values that the response is varied by.
+    """
+    parts, last_modified = validators
+    value = "\0".join(str(p) for p in [__VERSION__, *parts, *extra])
+
+    response = request.response
+    response.etag = hashlib.sha1(value.encode("utf-8")).hexdigest()
+    if last_modified is not None:
+        response.last_modified = last_modified
+    if final:
+        response.cache_control.max_age = TOPIC_FINAL_MAX_AGE
+    else:
+        response.cache_control.no_cache = True
+    if private:
+        response.cache_control.private = True
+
+    if_none_match = request.headers.get("If-None-Match")
+    if_modified_since = parse_date(request.headers.get("If-Modified-Since"))
+    if if_none_match is not None:
+        matched = response.etag in ETagMatcher.parse(if_none_match, strong=False)
+    elif if_modified_since is not None and last_modified is not None:
+        matched = last_modified.replace(microsecond=0) <= if_modified_since
+    else:
+        matched = False
+
+    if matched:
+        response.status = "304 Not Modified"
+        return response
@@ -1,26 +1,24 @@
 from sqlalchemy.orm.exc import NoResultFound
 from webob.multidict import MultiDict
 
-from ..errors import (
-    ParamsInvalidError,
-    RateLimitedError,
-    BanRejectedError,
-    BanwordRejectedError,
-    BaseError,
-)
+from ..errors import ParamsInvalidError, BaseError
 from ..forms import TopicForm, PostForm
 from ..interfaces import (
-    IBanQueryService,
-    IBanwordQueryService,
     IBoardQueryService,
     IPageQueryService,
     IPostCreateService,
+    IPostingGuardService,
     IPostQueryService,
-    IRateLimiterService,
     ITaskQueryService,
     ITopicCreateService,
     ITopicQueryService,
 )
+from ._http_cache import (
+    TOPIC_FINAL_STATUS,
+    not_modified,
+    topic_validators,
+    topics_validators,
+)
 
 
 def _get_params(request):
@@ -63,15 +61,34 @@ def board_get(request):
 
 
 def board_topics_get(request):
-    """Retrieve all available topics within a single board.
+    """Retrieve a page of available topics within a single board. If there
+    are more topics, a ``Link`` header pointing to the next page is included
+    in the response. Responds with ``304 Not Modified`` if none of the topics
+    in the page have changed.
 
     :param request: A :class:`pyramid.request.Request` object.
     """
     board_query_svc = request.find_service(IBoardQueryService)
     topic_query_svc = request.find_service(ITopicQueryService)
     board_slug = request.matchdict["board"]
-    board_query_svc.board_from_slug(board_slug)  # ensure exists
-    topics = topic_query_svc.list_from_board_slug(board_slug)
+    board = board_query_svc.board_from_slug(board_slug)
+
+    try:
+        topics, next_cursor = topic_query_svc.page_from_board_slug(
+            board_slug, cursor=request.params.get("cursor")
+        )
+    except ValueError:
+        raise ParamsInvalidError({"cursor": ["Invalid cursor."]})
+
+    if next_cursor is not None:
+        next_url = request.route_url(
+            "api_board_topics", board=board_slug, _query={"cursor": next_cursor}
+        )
+        request.response.headers["Link"] = '<%s>; rel="next"' % (next_url,)
+
+    response = not_modified(request, topics_validators(board, topics))
+    if response is not None:
+        return response
     return topics
 
 
@@ -90,27 +107,13 @@ def board_topics_post(request):
     if not form.validate():
         raise ParamsInvalidError(form.errors)
 
-    ban_query_svc = request.find_service(IBanQueryService)
+    posting_guard_svc = request.find_service(IPostingGuardService)
     ban_scope = {"board": board.slug}
-    if ban_query_svc.is_banned(request.client_addr, scopes=ban_scope):
-        raise BanRejectedError()
-
-    banword_query_svc = request.find_service(IBanwordQueryService)
-    if banword_query_svc.is_banned(form.body.data, scopes=ban_scope):
-        raise BanwordRejectedError()
-
-    rate_limiter_svc = request.find_service(IRateLimiterService)
-    if rate_limiter_svc:
-        payload = {"ip_address": request.client_addr, "board": board.slug}
-        if rate_limiter_svc.is_limited(**payload):
-            time_left = rate_limiter_svc.time_left(**payload)
-            raise RateLimitedError(time_left)
-
-        rate_limiter_svc.limit_for(
-            board.settings["post_delay"],
-            board.settings["post_delay_threshold"],
-            board.settings["post_delay_period"],
-            **payload)
+    verdict = posting_guard_svc.check(
+        board, request.client_addr, form.body.data, scopes=ban_scope
+    )
+    if not verdict.ok:
+        raise verdict.error()
 
     topic_create_svc = request.find_service(ITopicCreateService)
     return topic_create_svc.enqueue(
@@ -156,9 +159,12 @@ def topic_get(request):
 
 def topic_posts_get(request):
     """Retrieve all posts in a single topic or by or by search criteria.
+    Responds with ``304 Not Modified`` if the topic has not changed, before
+    any post is loaded.
 
     :param request: A :class:`pyramid.request.Request` object.
     """
+    topic_query_svc = request.find_service(ITopicQueryService)
     post_query_svc = request.find_service(IPostQueryService)
     topic_id = request.matchdict["topic"]
     query = None
@@ -166,6 +172,13 @@ def topic_posts_get(request):
     if "query" in request.matchdict:
         query = request.matchdict["query"]
 
+    topic = topic_query_svc.topic_from_id(topic_id)
+    response = not_modified(
+        request, topic_validators(topic), final=topic.status in TOPIC_FINAL_STATUS
+    )
+    if response is not None:
+        return response
+
     return post_query_svc.list_from_topic_id(topic_id, query)
 
 
@@ -186,29 +199,21 @@ def topic_posts_post(request):
     if not form.validate():
         raise ParamsInvalidError(form.errors)
 
-    ban_query_svc = request.find_service(IBanQueryService)
+    posting_guard_svc = request.find_service(IPostingGuardService)
     ban_scope = {"board": board.slug, "topic": topic.title}
-    if ban_query_svc.is_banned(request.client_addr, scopes=ban_scope):
-        raise BanRejectedError()
-
-    banword_query_svc = request.find_service(IBanwordQueryService)
-    if banword_query_svc.is_banned(form.body.data, scopes=ban_scope):
-        raise BanwordRejectedError()
-
-    rate_limiter_svc = request.find_service(IRateLimiterService)
-    if rate_limiter_svc:
-        payload = {"ip_address": request.client_addr, "board": board.slug}
-        if rate_limiter_svc.is_limited(**payload):
-            time_left = rate_limiter_svc.time_left(**payload)
-            raise RateLimitedError(time_left)
-
-        rate_limiter_svc.limit_for(
-            board.settings["post_delay"],
-            board.settings["post_delay_threshold"],
-            board.settings["post_delay_period"],
-            **payload)
+    verdict = posting_guard_svc.check(
+        board, request.client_addr, form.body.data, scopes=ban_scope
+    )
+    if not verdict.ok:
+        raise verdict.error()
 
     post_create_svc = request.find_service(IPostCreateService)
+    post = post_create_svc.create_direct(
+        topic.id, form.body.data, form.bumped.data, request.client_addr
+    )
+    if post is not None:
+        return post
+
     return post_create_svc.enqueue(
         topic.id,
         form.body.data,
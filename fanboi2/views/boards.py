@@ -1,21 +1,25 @@
-from pyramid.csrf import check_csrf_token, BadCSRFToken
+from pyramid.csrf import check_csrf_token, get_csrf_token, BadCSRFToken
 from pyramid.httpexceptions import HTTPNotFound, HTTPFound, HTTPForbidden
 from pyramid.renderers import render_to_response
 from sqlalchemy.orm.exc import NoResultFound
 
-from ..errors import BaseError
+from ..errors import BaseError, StatusRejectedError
 from ..forms import PostForm, TopicForm
 from ..interfaces import (
-    IBanQueryService,
-    IBanwordQueryService,
     IBoardQueryService,
     IPostCreateService,
+    IPostingGuardService,
     IPostQueryService,
-    IRateLimiterService,
     ITaskQueryService,
     ITopicCreateService,
     ITopicQueryService,
 )
+from ._http_cache import (
+    TOPIC_FINAL_STATUS,
+    not_modified,
+    topic_validators,
+    topics_validators,
+)
 
 
 def root(request):
@@ -28,16 +32,33 @@ def root(request):
 
 
 def board_show(request):
-    """Display a single board with its related topics.
+    """Display a single board with its related topics. Responds with
+    ``304 Not Modified`` if none of the listed topics have changed.
 
     :param request: A :class:`pyramid.request.Request` object.
     """
     board_query_svc = request.find_service(IBoardQueryService)
     topic_query_svc = request.find_service(ITopicQueryService)
+    post_query_svc = request.find_service(IPostQueryService)
     board_slug = request.matchdict["board"]
+    board = board_query_svc.board_from_slug(board_slug)
+    topics = topic_query_svc.list_recent_from_board_slug(board_slug)
+
+    response = not_modified(
+        request,
+        topics_validators(board, topics),
+        private=True,
+        extra=(request.cookies.get("_theme"),),
+    )
+    if response is not None:
+        return response
+
     return {
-        "board": board_query_svc.board_from_slug(board_slug),
-        "topics": topic_query_svc.list_recent_from_board_slug(board_slug),
+        "board": board,
+        "topics": topics,
+        "recent_posts": post_query_svc.list_recent_from_topic_ids(
+            [topic.id for topic in topics], count=5
+        ),
     }
 
 
@@ -49,10 +70,16 @@ def board_all(request):
     board_query_svc = request.find_service(IBoardQueryService)
     topic_query_svc = request.find_service(ITopicQueryService)
     board_slug = request.matchdict["board"]
-    return {
-        "board": board_query_svc.board_from_slug(board_slug),
-        "topics": topic_query_svc.list_from_board_slug(board_slug),
-    }
+    board = board_query_svc.board_from_slug(board_slug)
+
+    try:
+        topics, next_cursor = topic_query_svc.page_from_board_slug(
+            board_slug, cursor=request.params.get("cursor")
+        )
+    except ValueError:
+        raise HTTPNotFound(request.path)
+
+    return {"board": board, "topics": topics, "next_cursor": next_cursor}
 
 
 def board_new_get(request):
@@ -119,49 +146,24 @@ def board_new_post(request):
         request.response.status = "400 Bad Request"
         return {"board": board, "form": form}
 
-    ban_query_svc = request.find_service(IBanQueryService)
+    posting_guard_svc = request.find_service(IPostingGuardService)
     ban_scope = {"board": board.slug}
-    if ban_query_svc.is_banned(request.client_addr, scopes=ban_scope):
-        response = render_to_response(
-            "boards/new_error.mako",
-            {"board": board, "name": "ban_rejected"},
-            request=request,
-        )
-        response.status = "403 Forbidden"
-        return response
+    verdict = posting_guard_svc.check(
+        board, request.client_addr, form.body.data, scopes=ban_scope
+    )
+    if not verdict.ok:
+        extra_locals = {}
+        if verdict.time_left is not None:
+            extra_locals["time_left"] = verdict.time_left
 
-    banword_query_svc = request.find_service(IBanwordQueryService)
-    if banword_query_svc.is_banned(form.body.data, scopes=ban_scope):
         response = render_to_response(
             "boards/new_error.mako",
-            {"board": board, "name": "banword_rejected"},
+            {"board": board, "name": verdict.name, **extra_locals},
             request=request,
         )
-        response.status = "403 Forbidden"
+        response.status = verdict.http_status
         return response
 
-    rate_limiter_svc = request.find_service(IRateLimiterService)
-    if rate_limiter_svc:
-        payload = {"ip_address": request.client_addr, "board": board.slug}
-        if rate_limiter_svc.is_limited(**payload):
-            response = render_to_response(
-                "boards/new_error.mako",
-                {
-                    "board": board,
-                    "name": "rate_limited",
-                    "time_left": rate_limiter_svc.time_left(**payload),
-                },
-                request=request,
-            )
-            response.status = "429 Too Many Requests"
-            return response
-
-        rate_limiter_svc.limit_for(
-            board.settings["post_delay"],
-            board.settings["post_delay_threshold"],
-            board.settings["post_delay_period"],
-            **payload)
-
     topic_create_svc = request.find_service(ITopicCreateService)
     task = topic_create_svc.enqueue(
         board.slug,
@@ -186,7 +188,8 @@ def board_new_post(request):
 def topic_show_get(request):
     """Display a single topic with its related posts. If a `task` query string
     is given, the function will try to retrieve and process that task in topic
-    context instead.
+    context instead. Responds with ``304 Not Modified`` if the topic has not
+    changed, before any post is loaded.
 
     :param request: A :class:`pyramid.request.Request` object.
     """
@@ -254,6 +257,20 @@ def topic_show_get(request):
             request=request,
         )
 
+    response = not_modified(
+        request,
+        topic_validators(topic),
+        final=topic.status in TOPIC_FINAL_STATUS,
+        private=True,
+        extra=(
+            board.updated_at,
+            get_csrf_token(request),
+            request.cookies.get("_theme"),
+        ),
+    )
+    if response is not None:
+        return response
+
     post_query_svc = request.find_service(IPostQueryService)
     posts = post_query_svc.list_from_topic_id(topic_id, query)
     if not posts:
@@ -281,57 +298,53 @@ def topic_show_post(request):
     if topic.board_id != board.id:
         raise HTTPNotFound(request.path)
 
-    post_create_svc = request.find_service(IPostCreateService)
     form = PostForm(request.POST, request=request)
     if not form.validate():
         request.response.status = "400 Bad Request"
         return {"board": board, "topic": topic, "form": form}
 
-    ban_query_svc = request.find_service(IBanQueryService)
+    posting_guard_svc = request.find_service(IPostingGuardService)
     ban_scope = {"board": board.slug, "topic": topic.title}
-    if ban_query_svc.is_banned(request.client_addr, scopes=ban_scope):
+    verdict = posting_guard_svc.check(
+        board, request.client_addr, form.body.data, scopes=ban_scope
+    )
+    if not verdict.ok:
+        extra_locals = {}
+        if verdict.time_left is not None:
+            extra_locals["time_left"] = verdict.time_left
+
         response = render_to_response(
             "topics/show_error.mako",
-            {"board": board, "topic": topic, "name": "ban_rejected"},
+            {"board": board, "topic": topic, "name": verdict.name, **extra_locals},
             request=request,
         )
-        response.status = "403 Forbidden"
+        response.status = verdict.http_status
         return response
 
-    banword_query_svc = request.find_service(IBanwordQueryService)
-    if banword_query_svc.is_banned(form.body.data, scopes=ban_scope):
+    post_create_svc = request.find_service(IPostCreateService)
+    try:
+        post = post_create_svc.create_direct(
+            topic.id, form.body.data, form.bumped.data, request.client_addr
+        )
+    except StatusRejectedError as e:
         response = render_to_response(
             "topics/show_error.mako",
-            {"board": board, "topic": topic, "name": "banword_rejected"},
+            {"board": board, "topic": topic, "name": e.name, "status": e.status},
             request=request,
         )
-        response.status = "403 Forbidden"
+        response.status = e.http_status
         return response
 
-    rate_limiter_svc = request.find_service(IRateLimiterService)
-    if rate_limiter_svc:
-        payload = {"ip_address": request.client_addr, "board": board.slug}
-        if rate_limiter_svc.is_limited(**payload):
-            response = render_to_response(
-                "topics/show_error.mako",
-                {
-                    "board": board,
-                    "topic": topic,
-                    "name": "rate_limited",
-                    "time_left": rate_limiter_svc.time_left(**payload),
-                },
-                request=request,
+    if post is not None:
+        return HTTPFound(
+            location=request.route_path(
+                route_name="topic_scoped",
+                board=board.slug,
+                topic=topic.id,
+                query="l10",
             )
-            response.status = "429 Too Many Requests"
-            return response
-
-        rate_limiter_svc.limit_for(
-            board.settings["post_delay"],
-            board.settings["post_delay_threshold"],
-            board.settings["post_delay_period"],
-            **payload)
+        )
 
-    post_create_svc = request.find_service(IPostCreateService)
     task = post_create_svc.enqueue(
         topic.id,
         form.body.data,
@@ -0,0 +1,61 @@
+"""add bump key to topic meta
+
+Revision ID: 9c4d1f2e8a73
+Revises: 5d4ef3966456
+Create Date: 2026-10-18 10:12:40.528113
+"""
+from alembic import op
+from sqlalchemy import sql
+import sqlalchemy as sa
+
+
+revision = "9c4d1f2e8a73"
+down_revision = "5d4ef3966456"
+
+
+def upgrade():
+    op.add_column("topic_meta", sa.Column("board_id", sa.Integer))
+    op.add_column("topic_meta", sa.Column("bump_key", sa.DateTime(timezone=True)))
+
+    topic_meta_table = sql.table(
+        "topic_meta",
+        sql.column("topic_id"),
+        sql.column("board_id"),
+        sql.column("bumped_at"),
+        sql.column("bump_key"),
+    )
+
+    topic_table = sql.table(
+        "topic", sql.column("id"), sql.column("board_id"), sql.column("created_at")
+    )
+
+    op.execute(
+        topic_meta_table.update()
+        .values(
+            board_id=topic_table.c.board_id,
+            bump_key=sa.func.coalesce(
+                topic_meta_table.c.bumped_at, topic_table.c.created_at
+            ),
+        )
+        .where(topic_meta_table.c.topic_id == topic_table.c.id)
+    )
+
+    op.alter_column("topic_meta", "board_id", nullable=False)
+    op.alter_column("topic_meta", "bump_key", nullable=False)
+    op.create_foreign_key(
+        "fk_topic_meta_board_id_board", "topic_meta", "board", ["board_id"], ["id"]
+    )
+    op.create_index(
+        "ix_topic_meta_board_id_bump_key",
+        "topic_meta",
+        ["board_id", "bump_key", "topic_id"],
+    )
+    op.create_index("ix_topic_meta_bump_key", "topic_meta", ["bump_key", "topic_id"])
+
+
+def downgrade():
+    op.drop_index("ix_topic_meta_bump_key", "topic_meta")
+    op.drop_index("ix_topic_meta_board_id_bump_key", "topic_meta")
+    op.drop_constraint("fk_topic_meta_board_id_board", "topic_meta", type_="foreignkey")
+    op.drop_column("topic_meta", "bump_key")
+    op.drop_column("topic_meta", "board_id")
@@ -0,0 +1,24 @@
+"""add body formatted to post
+
+Revision ID: d3a7e5b10f42
+Revises: 9c4d1f2e8a73
+Create Date: 2026-10-18 11:02:17.316744
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "d3a7e5b10f42"
+down_revision = "9c4d1f2e8a73"
+
+
+def upgrade():
+    for table_name in ("post", "post_history"):
+        op.add_column(table_name, sa.Column("body_formatted", sa.Text))
+        op.add_column(table_name, sa.Column("body_formatted_version", sa.Integer))
+
+
+def downgrade():
+    for table_name in ("post", "post_history"):
+        op.drop_column(table_name, "body_formatted_version")
+        op.drop_column(table_name, "body_formatted")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""Benchmark the post formatter against the regular expression substitution
+formatter it replaced, on posts of increasing length. Must be run from the
+source tree as the reference implementation lives in the test suite::
+
+    python tools/scripts/bench-formatters.py
+"""
+
+import timeit
+
+from pyramid import testing
+
+from fanboi2.helpers.formatters import _format_post
+from fanboi2.models import Board, Post, Topic
+from fanboi2.tests import _legacy_formatters as legacy
+
+WORKLOADS = (
+    (
+        "prose",
+        "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do\n"
+        "eiusmod tempor incididunt ut labore et dolore magna aliqua. Ut enim\n"
+        'ad minim veniam, quis nostrud "exercitation" ullamco & laboris nisi\n'
+        "ut aliquip ex ea commodo consequat.\n\n",
+    ),
+    (
+        "mixed",
+        "Lorem ipsum dolor sit amet, consectetur adipiscing elit. >>{n}\n"
+        "See https://www.example.com/foo/{n}?baz=1 and >>>/demo/{n}/4-5 too.\n"
+        'Sed do eiusmod tempor incididunt ut labore & "dolore" magna aliqua.\n'
+        "https://imgur.com/foobar{n} >>1-{n}\n\n",
+    ),
+)
+
+
+def _make_body(paragraph, count):
+    return "".join(paragraph.format(n=n) for n in range(1, count + 1))
+
+
+def main():
+    config = testing.setUp()
+    config.add_route("board", "/{board}")
+    config.add_route("topic_scoped", "/{board}/{topic}/{query}")
+    request = testing.DummyRequest()
+    request.registry = config.registry
+
+    board = Board(title="Foobar", slug="foobar")
+    topic = Topic(id=1, board=board, title="Foobar")
+
+    print(
+        "%-8s %10s %12s %12s %8s"
+        % ("workload", "length", "legacy (ms)", "tokens (ms)", "speedup")
+    )
+    for name, paragraph in WORKLOADS:
+        for count in (1, 10, 50, 200):
+            post = Post(number=1, topic=topic, body=_make_body(paragraph, count))
+            assert _format_post(request, post) == legacy.format_post(request, post)
+
+            number = max(10, 2000 // count)
+            times = []
+            for fn in (legacy.format_post, _format_post):
+                timer = timeit.Timer(lambda: fn(request, post))
+                times.append(min(timer.repeat(repeat=5, number=number)) / number)
+
+            print(
+                "%-8s %10d %12.3f %12.3f %7.2fx"
+                % (
+                    name,
+                    len(post.body),
+                    times[0] * 1000,
+                    times[1] * 1000,
+                    times[0] / times[1],
+                )
+            )
+
+    testing.tearDown()
+
+
+if __name__ == "__main__":
+    main()